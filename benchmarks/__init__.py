@@ -0,0 +1,6 @@
+"""
+Paquet de benchmarks reproduïbles del projecte.
+
+Conté un generador de dades sintètiques amb el mateix esquema que els
+datasets de data/ i un executor que mesura cada etapa del flux.
+"""
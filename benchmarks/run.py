@@ -0,0 +1,264 @@
+"""
+Executor dels benchmarks de les etapes del flux.
+
+Per a cada factor d'escala genera els datasets sintètics i mesura, per
+separat i en seqüència, load_dataset, clean_and_homogenize,
+aggregate_by_branch, merge_datasets, plot_temporal_trends i analyze_dataset.
+Els resultats es desen en JSON a benchmarks/results/ i es poden comparar amb
+una execució anterior.
+
+Ús:
+    python -m benchmarks.run --scales 10 100 --repeat 3
+    python -m benchmarks.run --scales 10 --compare benchmarks/results/bench_X.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import EXCEL_MAX_ROWS, generate_datasets
+from src.analysis import analyze_dataset
+from src.data_loader import load_dataset
+from src.data_processing import clean_and_homogenize, aggregate_by_branch, merge_datasets
+from src.visualization import plot_temporal_trends
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT_DIR, "benchmarks", "results")
+DATA_DIR = os.path.join(ROOT_DIR, "benchmarks", ".data")
+
+
+def _time_call(func, repeat):
+    """
+    Executa una funció diverses vegades i en mesura el temps.
+
+    Args:
+        func (callable): Funció sense arguments a mesurar.
+        repeat (int): Nombre de repeticions.
+    Returns:
+        dict: Temps mínim, mediana i de cada repetició (en segons).
+        object: Resultat de l'última execució.
+    """
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = func()
+        times.append(time.perf_counter() - start)
+    return {
+        "min_s": round(min(times), 6),
+        "mediana_s": round(statistics.median(times), 6),
+        "tiempos_s": [round(t, 6) for t in times]
+    }, result
+
+
+def _plot(merged_df):
+    """Genera el gràfic de tendències (la figura s'allibera en acabar)."""
+    plot_temporal_trends(merged_df, "benchmark")
+
+
+def _excel_paths(raw_perf, raw_drop, scale, seed):
+    """
+    Retorna els fitxers Excel sintètics d'una escala, creant-los si cal.
+
+    Args:
+        raw_perf (pd.DataFrame): Dataset de rendiment sintètic.
+        raw_drop (pd.DataFrame): Dataset d'abandonament sintètic.
+        scale (float): Factor d'escala.
+        seed (int): Llavor.
+    Returns:
+        tuple | None: Rutes dels dos fitxers, o None si superen el límit d'Excel.
+    """
+    if max(len(raw_perf), len(raw_drop)) > EXCEL_MAX_ROWS:
+        return None
+    os.makedirs(DATA_DIR, exist_ok=True)
+    paths = []
+    for name, df in (("rendiment", raw_perf), ("abandonament", raw_drop)):
+        path = os.path.join(DATA_DIR, f"{name}_x{scale:g}_s{seed}.xlsx")
+        if not os.path.exists(path):
+            print(f"   -> Generant {path}...")
+            df.to_excel(path, index=False)
+        paths.append(path)
+    return tuple(paths)
+
+
+def run_scale(scale, repeat, seed, with_load):
+    """
+    Executa tots els benchmarks d'un factor d'escala.
+
+    Args:
+        scale (float): Factor d'escala.
+        repeat (int): Repeticions de cada mesura.
+        seed (int): Llavor del generador.
+        with_load (bool): Si s'ha de mesurar load_dataset (requereix escriure Excel).
+    Returns:
+        dict: Resultats de l'escala.
+    """
+    raw_perf, raw_drop = generate_datasets(scale, seed)
+    stages = {}
+
+    paths = _excel_paths(raw_perf, raw_drop, scale, seed) if with_load else None
+    if paths is not None:
+        stages["load_dataset"], _ = _time_call(
+            lambda: (load_dataset(paths[0]), load_dataset(paths[1])), repeat
+        )
+
+    stages["clean_and_homogenize"], (perf_clean, drop_clean) = _time_call(
+        lambda: clean_and_homogenize(raw_perf, raw_drop), repeat
+    )
+    stages["aggregate_by_branch"], (perf_agg, drop_agg) = _time_call(
+        lambda: (aggregate_by_branch(perf_clean, 'Taxa rendiment'),
+                 aggregate_by_branch(drop_clean, '% Abandonament a primer curs')),
+        repeat
+    )
+    stages["merge_datasets"], merged_df = _time_call(
+        lambda: merge_datasets(perf_agg, drop_agg), repeat
+    )
+    stages["plot_temporal_trends"], _ = _time_call(lambda: _plot(merged_df), repeat)
+    stages["analyze_dataset"], _ = _time_call(lambda: analyze_dataset(merged_df), repeat)
+
+    def pipeline():
+        perf, drop = (load_dataset(paths[0]), load_dataset(paths[1])) if paths else (
+            raw_perf, raw_drop
+        )
+        perf, drop = clean_and_homogenize(perf, drop)
+        merged = merge_datasets(aggregate_by_branch(perf, 'Taxa rendiment'),
+                                aggregate_by_branch(drop, '% Abandonament a primer curs'))
+        _plot(merged)
+        analyze_dataset(merged)
+
+    stages["seqüència_completa"], _ = _time_call(pipeline, repeat)
+
+    return {
+        "escala": scale,
+        "files_rendimiento": len(raw_perf),
+        "files_abandono": len(raw_drop),
+        "files_fusionadas": len(merged_df),
+        "incluye_carga": paths is not None,
+        "etapas": stages
+    }
+
+
+def _environment():
+    """
+    Descriu l'entorn d'execució perquè els resultats siguin comparables.
+
+    Returns:
+        dict: Versions, plataforma, nombre de CPUs i commit actual.
+    """
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+        "commit": commit
+    }
+
+
+def compare(previous, current):
+    """
+    Imprimeix la comparació entre dues execucions per escala i etapa.
+
+    Args:
+        previous (dict): Resultats d'una execució anterior.
+        current (dict): Resultats de l'execució actual.
+    """
+    old = {(r["escala"], name): stage["min_s"]
+           for r in previous["resultados"] for name, stage in r["etapas"].items()}
+
+    print(f"\n{'Escala':>8}  {'Etapa':<24}{'Abans (s)':>12}{'Ara (s)':>12}{'Ràtio':>8}")
+    for result in current["resultados"]:
+        for name, stage in result["etapas"].items():
+            before = old.get((result["escala"], name))
+            if before is None:
+                continue
+            ratio = stage["min_s"] / before if before else float('nan')
+            print(f"{result['escala']:>8g}  {name:<24}{before:>12.4f}"
+                  f"{stage['min_s']:>12.4f}{ratio:>8.2f}")
+
+
+def main(argv=None):
+    """
+    Punt d'entrada dels benchmarks.
+
+    Args:
+        argv (list, opcional): Arguments de línia de comandes.
+    Returns:
+        str: Ruta del fitxer de resultats.
+    """
+    parser = argparse.ArgumentParser(description="Benchmarks de les etapes del flux PEC4")
+    parser.add_argument('--scales', type=float, nargs='+', default=[1, 10],
+                        help="Factors d'escala respecte a les dades originals (per defecte 1 10).")
+    parser.add_argument('--repeat', type=int, default=3, help="Repeticions de cada mesura.")
+    parser.add_argument('--seed', type=int, default=0, help="Llavor del generador sintètic.")
+    parser.add_argument('--no-load', action='store_true',
+                        help="No mesura load_dataset (evita escriure fitxers Excel).")
+    parser.add_argument('--compare', type=str, help="Fitxer de resultats anterior a comparar.")
+    parser.add_argument('--output', type=str, help="Fitxer de sortida dels resultats.")
+    args = parser.parse_args(argv)
+
+    results = {
+        "fecha": datetime.now().isoformat(timespec='seconds'),
+        "entorno": _environment(),
+        "repeticiones": args.repeat,
+        "semilla": args.seed,
+        "resultados": []
+    }
+
+    # Els gràfics i l'informe es desen en rutes relatives: els generem en una
+    # carpeta temporal per no sobreescriure els resultats reals del projecte.
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as scratch:
+        os.chdir(scratch)
+        try:
+            for scale in args.scales:
+                print(f"Escala x{scale:g}...")
+                results["resultados"].append(
+                    run_scale(scale, args.repeat, args.seed, not args.no_load)
+                )
+        finally:
+            os.chdir(cwd)
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"Resultats desats a: {output}")
+
+    for result in results["resultados"]:
+        print(f"\nEscala x{result['escala']:g} ({result['files_rendimiento']} + "
+              f"{result['files_abandono']} files)")
+        for name, stage in result["etapas"].items():
+            print(f"   {name:<24}{stage['min_s']:>10.4f} s")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare(json.load(f), results)
+
+    return output
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
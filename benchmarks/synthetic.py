@@ -0,0 +1,201 @@
+"""
+Generador de datasets sintètics per als benchmarks.
+
+Reprodueix l'esquema (noms de columnes i tipus) i les cardinalitats de
+data/rendiment_estudiants.xlsx i data/taxa_abandonament.xlsx: els mateixos
+cursos acadèmics, universitats, sigles, branques, sexes, tipus d'estudi i
+tipus de centre, amb les proporcions observades. El nombre de files es
+multiplica pel factor d'escala, i els valors es generen amb una llavor fixa
+perquè cada execució sigui reproduïble.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Nombre de files dels datasets originals (escala 1).
+BASE_ROWS_PERF = 14117
+BASE_ROWS_DROP = 10875
+
+# Límit de files d'un full d'Excel (sense la capçalera).
+EXCEL_MAX_ROWS = 1_048_575
+
+YEARS_PERF = ['19-20', '20-21', '21-22', '22-23', '23-24']
+YEARS_DROP = ['18-19', '19-20', '20-21', '21-22', '22-23']
+
+# (Sigles, nom, tipus, files al dataset de rendiment, files al d'abandonament)
+UNIVERSITIES = [
+    ('UAB', 'UNIVERSITAT AUTÒNOMA DE BARCELONA', 'PÚBLICA', 2222, 1880),
+    ('UAO', 'UNIVERSITAT ABAT OLIBA CEU', 'PRIVADA', 241, 203),
+    ('UB', 'UNIVERSITAT DE BARCELONA', 'PÚBLICA', 2391, 2122),
+    ('UIC', 'UNIVERSITAT INTERNACIONAL DE CATALUNYA', 'PRIVADA', 314, 294),
+    ('UOC', 'UNIVERSITAT OBERTA DE CATALUNYA', 'NO PRESENCIAL', 843, 0),
+    ('UPC', 'UNIVERSITAT POLITÈCNICA DE CATALUNYA', 'PÚBLICA', 1956, 1244),
+    ('UPF', 'UNIVERSITAT POMPEU FABRA', 'PÚBLICA', 1224, 1046),
+    ('URL', 'UNIVERSITAT RAMON LLULL', 'PRIVADA', 1156, 904),
+    ('URV', 'UNIVERSITAT ROVIRA I VIRGILI', 'PÚBLICA', 1192, 1034),
+    ('UVIC-UCC', 'UNIVERSITAT DE VIC - UNIVERSITAT CENTRAL DE CATALUNYA', 'PRIVADA', 533, 449),
+    ('UdG', 'UNIVERSITAT DE GIRONA', 'PÚBLICA', 998, 864),
+    ('UdL', 'UNIVERSITAT DE LLEIDA', 'PÚBLICA', 1047, 835),
+]
+
+BRANCHES = {
+    'Ciències socials i jurídiques': 0.386,
+    'Enginyeria i arquitectura': 0.248,
+    'Ciències de la salut': 0.141,
+    'Arts i humanitats': 0.134,
+    'Ciències': 0.091,
+}
+SEXES = {'HOME': 0.503, 'DONA': 0.497}
+STUDY_TYPES = {'grau': 0.527, 'màster universitari': 0.473}
+CENTRE_TYPES = {'Integrat': 0.877, 'Adscrit': 0.123}
+
+# Cardinalitat de les columnes descriptives que s'eliminen en la neteja.
+N_UNITS_PERF, N_STUDIES_PERF = 169, 1155
+N_UNITS_DROP, N_STUDIES_DROP = 156, 922
+
+# Proporció de valors nuls d'abandonament observada a les dades originals.
+DROP_NAN_RATE = 37 / BASE_ROWS_DROP
+
+
+def _choice(rng, options, size):
+    """
+    Tria valors d'un diccionari {valor: pes} amb les proporcions indicades.
+
+    Args:
+        rng (np.random.Generator): Generador aleatori.
+        options (dict): Valors possibles i els seus pesos.
+        size (int): Nombre de valors a generar.
+    Returns:
+        np.ndarray: Array d'objectes amb els valors triats.
+    """
+    values = np.array(list(options), dtype=object)
+    weights = np.array(list(options.values()), dtype=float)
+    return values[rng.choice(len(values), size=size, p=weights / weights.sum())]
+
+
+def _universities(rng, size, column):
+    """
+    Tria universitats amb el mateix pes que als datasets originals.
+
+    Args:
+        rng (np.random.Generator): Generador aleatori.
+        size (int): Nombre de files.
+        column (int): Posició del pes a UNIVERSITIES (3 rendiment, 4 abandonament).
+    Returns:
+        tuple: Arrays de sigles, noms i tipus d'universitat.
+    """
+    table = [u for u in UNIVERSITIES if u[column] > 0]
+    weights = np.array([u[column] for u in table], dtype=float)
+    idx = rng.choice(len(table), size=size, p=weights / weights.sum())
+    sigles, names, types = (np.array(col, dtype=object) for col in list(zip(*table))[:3])
+    return sigles[idx], names[idx], types[idx]
+
+
+def _vocabulary(prefix, cardinality):
+    """
+    Construeix el vocabulari d'etiquetes d'una columna descriptiva.
+
+    Args:
+        prefix (str): Prefix de l'etiqueta.
+        cardinality (int): Nombre de valors diferents.
+    Returns:
+        np.ndarray: Array d'objectes amb les etiquetes.
+    """
+    return np.array([f"{prefix}{i:04d}" for i in range(cardinality)], dtype=object)
+
+
+def _labels(rng, prefix, cardinality, size):
+    """
+    Genera etiquetes descriptives (unitats, estudis) amb la cardinalitat donada.
+
+    Args:
+        rng (np.random.Generator): Generador aleatori.
+        prefix (str): Prefix de l'etiqueta.
+        cardinality (int): Nombre de valors diferents.
+        size (int): Nombre de files.
+    Returns:
+        np.ndarray: Array d'objectes amb les etiquetes.
+    """
+    return _vocabulary(prefix, cardinality)[rng.integers(0, cardinality, size=size)]
+
+
+def generate_performance(scale=1, seed=0):
+    """
+    Genera un dataset de rendiment amb l'esquema de rendiment_estudiants.xlsx.
+
+    Args:
+        scale (float, opcional): Factor d'escala sobre el nombre de files original.
+        seed (int, opcional): Llavor del generador aleatori.
+    Returns:
+        pd.DataFrame: Dataset sintètic de rendiment.
+    """
+    rng = np.random.default_rng(seed)
+    size = int(round(BASE_ROWS_PERF * scale))
+    sigles, names, types = _universities(rng, size, 3)
+
+    enrolled = np.round(rng.lognormal(mean=7.2, sigma=1.3, size=size))
+    rate = np.clip(rng.beta(6.0, 0.9, size=size), 0.0, 1.0)
+    studies = rng.integers(0, N_STUDIES_PERF, size=size)
+
+    return pd.DataFrame({
+        'Curs Acadèmic': _choice(rng, dict.fromkeys(YEARS_PERF, 1), size),
+        'Tipus universitat': types,
+        'Universitat': names,
+        'Sigles': sigles,
+        'Unitat': _labels(rng, "UNITAT ", N_UNITS_PERF, size),
+        'Tipus Estudi': _choice(rng, STUDY_TYPES, size),
+        'Branca': _choice(rng, BRANCHES, size),
+        'Codi Estudi': _vocabulary("G", N_STUDIES_PERF)[studies],
+        'Estudi': _vocabulary("ESTUDI ", N_STUDIES_PERF)[studies],
+        'Sexe': _choice(rng, SEXES, size),
+        'Integrat S/N': _choice(rng, CENTRE_TYPES, size),
+        'Crèdits ordinaris superats': np.round(enrolled * rate),
+        'Crèdits ordinaris matriculats': enrolled,
+        'Taxa rendiment': rate,
+    })
+
+
+def generate_abandonment(scale=1, seed=0):
+    """
+    Genera un dataset d'abandonament amb l'esquema de taxa_abandonament.xlsx.
+
+    Args:
+        scale (float, opcional): Factor d'escala sobre el nombre de files original.
+        seed (int, opcional): Llavor del generador aleatori.
+    Returns:
+        pd.DataFrame: Dataset sintètic d'abandonament.
+    """
+    rng = np.random.default_rng(seed + 1)
+    size = int(round(BASE_ROWS_DROP * scale))
+    sigles, names, types = _universities(rng, size, 4)
+
+    # Una quarta part dels estudis no té cap abandonament, com a les dades reals.
+    rate = np.where(rng.random(size) < 0.25, 0.0, rng.beta(1.2, 11.0, size=size))
+    rate[rng.random(size) < DROP_NAN_RATE] = np.nan
+
+    return pd.DataFrame({
+        'Curs Acadèmic': _choice(rng, dict.fromkeys(YEARS_DROP, 1), size),
+        'Naturalesa universitat responsable': types,
+        'Universitat Responsable': names,
+        'Sigles': sigles,
+        'Unitat': _labels(rng, "UNITAT ", N_UNITS_DROP, size),
+        'Tipus Estudi': _choice(rng, STUDY_TYPES, size),
+        'Branca': _choice(rng, BRANCHES, size),
+        'Estudi': _labels(rng, "ESTUDI ", N_STUDIES_DROP, size),
+        'Sexe Alumne': _choice(rng, SEXES, size),
+        'Tipus de centre': _choice(rng, CENTRE_TYPES, size),
+        '% Abandonament a primer curs': rate,
+    })
+
+
+def generate_datasets(scale=1, seed=0):
+    """
+    Genera els dos datasets sintètics per a un factor d'escala.
+
+    Args:
+        scale (float, opcional): Factor d'escala sobre el nombre de files original.
+        seed (int, opcional): Llavor del generador aleatori.
+    Returns:
+        tuple: (dataset de rendiment, dataset d'abandonament).
+    """
+    return generate_performance(scale, seed), generate_abandonment(scale, seed)
@@ -1,30 +1,117 @@
 import argparse
 import sys
-import os
-from src.data_loader import load_dataset
-from src.data_processing import clean_and_homogenize, aggregate_by_branch, merge_datasets
-from src.visualization import plot_temporal_trends
-from src.analysis import analyze_dataset
+
+# Els mòduls de src (i per tant pandas, scipy i matplotlib) s'importen dins de
+# cada etapa, de manera que '--help' o '-ex 1' no carreguen llibreries que no
+# necessiten.
+# pylint: disable=import-outside-toplevel
+from src.profiling import StageProfiler
 
 # Rutes per defecte
 DEFAULT_RENDIMENT = "data/rendiment_estudiants.xlsx"
 DEFAULT_ABANDONAMENT = "data/taxa_abandonament.xlsx"
 
+# Mòduls de src que s'instrumenten amb --profile, en ordre de dependència.
+PROFILED_MODULES = [
+    "src.data_cache", "src.data_loader", "src.data_processing", "src.engines", "src.pipeline",
+    "src.incremental", "src.render_cache", "src.visualization", "src.charts",
+    "src.report_writers", "src.analysis", "src.reports"
+]
+
+
+def load_all_or_exit(paths, use_cache):
+    """
+    Carrega tots els datasets en paral·lel i atura el programa si algun falla.
+
+    Cada dataset que no s'ha pogut carregar s'informa per separat.
 
-def run_batch_mode(level, path_rendiment, path_abandonament):
+    Args:
+        paths (list): Fitxer, carpeta o patró glob de cada dataset.
+        use_cache (bool): Si s'ha d'utilitzar la memòria cau columnar.
+    Returns:
+        list: Els DataFrames carregats, en el mateix ordre que les rutes.
+    """
+    from src.data_loader import load_dataset_groups
+
+    results = load_dataset_groups(paths, use_cache=use_cache)
+
+    errors = [result for result in results if isinstance(result, Exception)]
+    for error in errors:
+        print(f"Error crític carregant dades: {error}")
+    if errors:
+        sys.exit(1)
+
+    return results
+
+
+def load_pair_or_exit(path_rendiment, path_abandonament, use_cache):
+    """
+    Carrega els datasets de rendiment i d'abandonament (vegeu load_all_or_exit).
+
+    Args:
+        path_rendiment (str): Fitxer, carpeta o patró glob del dataset de rendiment.
+        path_abandonament (str): Fitxer, carpeta o patró glob del dataset d'abandonament.
+        use_cache (bool): Si s'ha d'utilitzar la memòria cau columnar.
+    Returns:
+        tuple: (rendiment, abandonament) originals.
+    """
+    return tuple(load_all_or_exit([path_rendiment, path_abandonament], use_cache))
+
+
+def build_merged_in_batches(path_rendiment, path_abandonament, chunk_size):
+    """
+    Genera el dataset fusionat de l'exercici 2 llegint els fitxers per lots.
+
+    Cada lot es neteja i s'acumula per grup, de manera que mai no es té el
+    dataset sencer en memòria.
+
+    Args:
+        path_rendiment (str): Fitxer, carpeta o patró glob del dataset de rendiment.
+        path_abandonament (str): Fitxer, carpeta o patró glob del dataset d'abandonament.
+        chunk_size (int): Nombre de files per lot.
+    Returns:
+        pd.DataFrame: Dataset fusionat, igual que en el mode complet.
+    """
+    from src.data_loader import iter_dataset_files_batches
+    from src.data_processing import (
+        clean_performance, clean_abandonment, aggregate_by_branch_batches, merge_datasets
+    )
+
+    perf_agg = aggregate_by_branch_batches(
+        map(clean_performance, iter_dataset_files_batches(path_rendiment, chunk_size)),
+        'Taxa rendiment'
+    )
+    drop_agg = aggregate_by_branch_batches(
+        map(clean_abandonment, iter_dataset_files_batches(path_abandonament, chunk_size)),
+        '% Abandonament a primer curs'
+    )
+    return merge_datasets(perf_agg, drop_agg)
+
+
+def run_batch_mode(level, path_rendiment, path_abandonament, use_cache=True,
+                   chunk_size=None, incremental=False, profiler=None, chart_outputs=None,
+                   partition_reports=None, partition_format='files', report_formats=None,
+                   engine='pandas', sqlite_path=None):
     """
     Executa la lògica del programa.
     """
+    if profiler is None:
+        profiler = StageProfiler(enabled=False)
+
     print(f"\n--- Iniciant execució automàtica fins a l'exercici {level} ---")
 
     print("1. [Ex 1] Carregant datasets...")
 
     # Exercici 1
     if level == 1:
+        from src.data_loader import load_dataset
+
         # CAS A: L'usuari selecciona l'exercici 1 i NO passa cap path com a argument.
         if path_rendiment is None and path_abandonament is None:
             try:
-                df_exploracio = load_dataset(None)
+                with profiler.stage("load") as stage:
+                    df_exploracio = load_dataset(None, use_cache=use_cache)
+                    stage["rows_out"] = len(df_exploracio)
                 print("\n--- Vista prèvia del dataset Seleccionat ---")
                 print(df_exploracio.head())
                 print("Finalitzat exercici 1")
@@ -36,7 +123,9 @@ def run_batch_mode(level, path_rendiment, path_abandonament):
         # CAS B: L'usuari selecciona l'exercici 1 i passa el path de rendiment com a argument.
         elif path_rendiment is not None and path_abandonament is None:
             print(f"   -> Carregant NOMÉS rendiment: {path_rendiment}")
-            df = load_dataset(path_rendiment)
+            with profiler.stage("load") as stage:
+                (df,) = load_all_or_exit([path_rendiment], use_cache)
+                stage["rows_out"] = len(df)
             print("\n--- Vista prèvia rendiment acadèmic ---")
             print(df.head())
             print("Finalitzat exercici 1.")
@@ -45,7 +134,9 @@ def run_batch_mode(level, path_rendiment, path_abandonament):
         # CAS C: L'usuari selecciona l'exercici 1 i passa el path d'abandonament com a argument.
         elif path_abandonament is not None and path_rendiment is None:
             print(f"   -> Carregant NOMÉS abandonament: {path_abandonament}")
-            df = load_dataset(path_abandonament)
+            with profiler.stage("load") as stage:
+                (df,) = load_all_or_exit([path_abandonament], use_cache)
+                stage["rows_out"] = len(df)
             print("\n--- Vista prèvia abandonament acadèmic ---")
             print(df.head())
             print("Finalitzat exercici 1.")
@@ -61,23 +152,48 @@ def run_batch_mode(level, path_rendiment, path_abandonament):
     if path_abandonament is None:
         path_abandonament = DEFAULT_ABANDONAMENT
 
-    # Carreguem els dos datasets necessaris.
-    try:
+    if chunk_size:
+        # Mode per lots: la càrrega, la neteja i l'agregació es fan alhora.
         print(f"   -> Rendiment: {path_rendiment}")
-        raw_perf = load_dataset(path_rendiment)
-
         print(f"   -> Abandonament: {path_abandonament}")
-        raw_drop = load_dataset(path_abandonament)
-    except Exception as e:
-        print(f"Error crític carregant dades: {e}")
-        sys.exit(1)
+        print(f"\n2. [Ex 2] Netejant i fusionant dades en lots de {chunk_size} files...")
+        try:
+            with profiler.stage("load_aggregate_merge_batches") as stage:
+                merged_df = build_merged_in_batches(path_rendiment, path_abandonament, chunk_size)
+                stage["rows_out"] = len(merged_df)
+        except Exception as e:
+            print(f"Error crític carregant dades: {e}")
+            sys.exit(1)
+    elif incremental:
+        # Carreguem els dos datasets necessaris en paral·lel.
+        print(f"   -> Rendiment: {path_rendiment}")
+        print(f"   -> Abandonament: {path_abandonament}")
+        with profiler.stage("load") as stage:
+            raw_perf, raw_drop = load_all_or_exit([path_rendiment, path_abandonament], use_cache)
+            stage["rows_out"] = len(raw_perf) + len(raw_drop)
+
+        # Exercici 2.
+        print("\n2. [Ex 2] Netejant i fusionant dades...")
+        from src.incremental import update_merged_dataset
+
+        with profiler.stage("incremental_merge", len(raw_perf) + len(raw_drop)) as stage:
+            merged_df, changed_years = update_merged_dataset(raw_perf, raw_drop)
+            stage["rows_out"] = len(merged_df)
+        print(f"   -> Cursos recalculats: {', '.join(changed_years) or 'cap'}")
+    else:
+        # Les etapes de l'exercici 2 s'executen com un graf: si el dataset
+        # fusionat (o algun agregat) ja és al magatzem d'artefactes per a
+        # aquestes dades i aquest codi, no es torna a carregar ni a calcular.
+        from src.pipeline import merged_dataset_pipeline
 
-    # Exercici 2.
-    print("\n2. [Ex 2] Netejant i fusionant dades...")
-    perf_clean, drop_clean = clean_and_homogenize(raw_perf, raw_drop)
-    perf_agg = aggregate_by_branch(perf_clean, 'Taxa rendiment')
-    drop_agg = aggregate_by_branch(drop_clean, '% Abandonament a primer curs')
-    merged_df = merge_datasets(perf_agg, drop_agg)
+        print(f"   -> Rendiment: {path_rendiment}")
+        print(f"   -> Abandonament: {path_abandonament}")
+        print("\n2. [Ex 2] Netejant i fusionant dades...")
+        pipeline = merged_dataset_pipeline(path_rendiment, path_abandonament,
+                                           use_cache=use_cache, profiler=profiler,
+                                           load=load_pair_or_exit, engine=engine,
+                                           export_path=sqlite_path)
+        merged_df = pipeline.run('export' if sqlite_path else 'merge')
 
     if level == 2:
         print(f"Datasets fusionats. Total files: {len(merged_df)}")
@@ -86,7 +202,16 @@ def run_batch_mode(level, path_rendiment, path_abandonament):
 
     # Exercici 3.
     print("\n3. [Ex 3] Generant gràfics...")
-    plot_temporal_trends(merged_df, "Marc_Roige")
+    from src.visualization import plot_temporal_trends
+
+    with profiler.stage("plot", len(merged_df)):
+        plot_temporal_trends(merged_df, "Marc_Roige")
+
+    if chart_outputs:
+        from src.charts import generate_dimension_charts
+
+        with profiler.stage("charts", len(merged_df)) as stage:
+            stage["rows_out"] = len(generate_dimension_charts(merged_df, outputs=chart_outputs))
 
     if level == 3:
         print("Gràfics generats a 'src/img/'. Finalitzat exercici 3.")
@@ -94,7 +219,18 @@ def run_batch_mode(level, path_rendiment, path_abandonament):
 
     # Exercici 4.
     print("\n4. [Ex 4] Generant informe estadístic...")
-    analyze_dataset(merged_df)
+    from src.analysis import analyze_dataset
+
+    with profiler.stage("analyze", len(merged_df)):
+        analyze_dataset(merged_df, report_formats)
+
+    if partition_reports:
+        from src.reports import generate_partition_reports
+
+        with profiler.stage("partition_reports", len(merged_df)) as stage:
+            stage["rows_out"] = len(generate_partition_reports(
+                merged_df, partition_reports, fmt=partition_format
+            ))
     print("Informe generat a 'src/report/'. Finalitzat exercici 4 (Flux complet).")
 
 
@@ -102,6 +238,8 @@ def main():
     """
     Punt d'entrada principal.
     """
+    from src.results_db import DATABASE_PATH
+
     parser = argparse.ArgumentParser(
         description="PEC4: Anàlisi de Rendiment i Abandonament Universitari"
     )
@@ -116,7 +254,132 @@ def main():
     parser.add_argument(
         '-d', '--dataset',
         type=str,
-        help="Ruta a un dels fitxers de dades."
+        help="Ruta (fitxer, carpeta o patró glob) a un dels datasets. El tipus "
+             "(rendiment o abandonament) es detecta per les columnes de la capçalera."
+    )
+
+    parser.add_argument(
+        '--rendiment',
+        metavar='RUTA',
+        help="Fitxer, carpeta o patró glob amb el dataset de rendiment "
+             "(ex: 'dades/rendiment_*.xlsx'). Els fitxers es llegeixen en paral·lel."
+    )
+
+    parser.add_argument(
+        '--abandonament',
+        metavar='RUTA',
+        help="Fitxer, carpeta o patró glob amb el dataset d'abandonament."
+    )
+
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help="Desactiva la memòria cau columnar i el magatzem d'artefactes de l'exercici 2: "
+             "llegeix sempre els fitxers Excel i recalcula totes les etapes."
+    )
+
+    parser.add_argument(
+        '--engine',
+        choices=['pandas', 'polars', 'duckdb'],
+        default='pandas',
+        help="Motor de l'agregació i la fusió de l'exercici 2 (per defecte pandas). "
+             "Polars i DuckDB són opcionals i fan servir tots els nuclis; "
+             "--incremental i --chunk-size sempre fan servir pandas."
+    )
+
+    parser.add_argument(
+        '--sqlite',
+        nargs='?',
+        const=DATABASE_PATH,
+        metavar='RUTA',
+        help="Desa el dataset fusionat i els agregats en una base de dades SQLite indexada "
+             f"(per defecte {DATABASE_PATH}) que es pot consultar sense tornar a executar el flux."
+    )
+
+    parser.add_argument(
+        '--chunk-size',
+        type=int,
+        help="Llegeix els fitxers en lots d'aquest nombre de files (memòria acotada)."
+    )
+
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help="Només recalcula els cursos acadèmics nous o modificats des de l'última execució."
+    )
+
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help="Registra temps, CPU, memòria i files de cada etapa i funció a src/report/."
+    )
+
+    parser.add_argument(
+        '--profile-format',
+        choices=['json', 'csv'],
+        default='json',
+        help="Format de la traça de rendiment (per defecte json)."
+    )
+
+    parser.add_argument(
+        '--profile-stage',
+        choices=['load', 'clean', 'aggregate_perf', 'aggregate_drop', 'merge', 'export',
+                 'incremental_merge', 'load_aggregate_merge_batches', 'plot', 'charts',
+                 'analyze', 'partition_reports'],
+        help="Desa també la sortida de cProfile d'aquesta etapa (implica --profile)."
+    )
+
+    parser.add_argument(
+        '--charts',
+        nargs='+',
+        metavar='FORMAT[:DPI]',
+        help="Genera també els gràfics per Sigles, Tipus universitat, Sexe i Tipus Estudi "
+             "a src/img/charts/, en cada format indicat (ex: --charts png:150 svg)."
+    )
+
+    parser.add_argument(
+        '--partition-reports',
+        nargs='+',
+        choices=['Sigles', 'Tipus universitat', 'Sexe'],
+        help="Genera també l'informe de cada valor d'aquestes dimensions a "
+             "src/report/particions/ (ex: --partition-reports Sigles Sexe)."
+    )
+
+    parser.add_argument(
+        '--partition-format',
+        choices=['files', 'ndjson', 'parquet'],
+        default='files',
+        help="Un fitxer JSON per partició (files), un NDJSON per dimensió (ndjson) "
+             "o una taula Parquet per dimensió (parquet)."
+    )
+
+    parser.add_argument(
+        '--report-format',
+        nargs='+',
+        choices=['json', 'json-compact', 'ndjson', 'parquet'],
+        default=['json'],
+        help="Formats de l'informe de l'exercici 4 (per defecte json). "
+             "Parquet requereix pyarrow."
+    )
+
+    parser.add_argument(
+        '--serve',
+        action='store_true',
+        help="Carrega les dades un cop i serveix l'informe, les tendències, els rànquings "
+             "i consultes per HTTP local (POST /recarga per actualitzar-les)."
+    )
+
+    parser.add_argument(
+        '--host',
+        default='127.0.0.1',
+        help="Adreça on escolta el servidor de --serve (per defecte 127.0.0.1)."
+    )
+
+    parser.add_argument(
+        '--port',
+        type=int,
+        default=8000,
+        help="Port on escolta el servidor de --serve (per defecte 8000)."
     )
 
     args = parser.parse_args()
@@ -126,18 +389,85 @@ def main():
     final_rendiment = None
     final_abandonament = None
 
-    if args.dataset:
-        user_path = args.dataset
-        filename = os.path.basename(user_path).lower()
+    # Cada fitxer indicat s'identifica i es valida per la capçalera abans de llegir-lo sencer.
+    from src.dataset_files import sniff_dataset_files
 
-        # Si l'usuari passa com argument un fitxer, assignem aquell i deixem l'altre com a None.
-        if "abandonament" in filename:
-            final_abandonament = user_path
+    if args.dataset:
+        # Assignem el fitxer al dataset que li correspon i deixem l'altre com a None.
+        try:
+            kind = sniff_dataset_files(args.dataset)
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+        if kind == 'abandonament':
+            final_abandonament = args.dataset
         else:
-            final_rendiment = user_path
+            final_rendiment = args.dataset
+
+    for kind, path in (('rendiment', args.rendiment), ('abandonament', args.abandonament)):
+        if path is None:
+            continue
+        try:
+            found = sniff_dataset_files(path)
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+        if found != kind:
+            parser.error(f"{path} no conté dades de {kind} (tipus detectat: {found}).")
+
+    # Les rutes explícites tenen prioritat sobre -d.
+    final_rendiment = args.rendiment or final_rendiment
+    final_abandonament = args.abandonament or final_abandonament
+
+    chart_outputs = None
+    if args.charts:
+        from src.charts import parse_output_spec
+
+        try:
+            chart_outputs = [parse_output_spec(spec) for spec in args.charts]
+        except ValueError as e:
+            parser.error(str(e))
+
+    if 'parquet' in args.report_format or args.partition_format == 'parquet':
+        from src.report_writers import is_parquet_available
+
+        if not is_parquet_available():
+            parser.error("El format parquet requereix pyarrow (pip install pyarrow).")
+
+    if args.sqlite and (args.incremental or args.chunk_size):
+        parser.error("--sqlite no es pot combinar amb --incremental ni amb --chunk-size.")
+
+    if args.engine != 'pandas':
+        from src.engines import check_engine
+
+        try:
+            check_engine(args.engine)
+        except ImportError as e:
+            parser.error(str(e))
+
+    if args.serve:
+        from src.server import serve
+
+        serve(final_rendiment or DEFAULT_RENDIMENT, final_abandonament or DEFAULT_ABANDONAMENT,
+              host=args.host, port=args.port, use_cache=not args.no_cache)
+        return
+
+    # Preparem el registre de rendiment si s'ha demanat.
+    profiler = StageProfiler(enabled=args.profile or args.profile_stage is not None,
+                             cprofile_stage=args.profile_stage)
+    profiler.instrument_modules(PROFILED_MODULES)
+    profiler.start()
 
     # Executem la lògica
-    run_batch_mode(target_level, final_rendiment, final_abandonament)
+    try:
+        run_batch_mode(target_level, final_rendiment, final_abandonament,
+                       use_cache=not args.no_cache, chunk_size=args.chunk_size,
+                       incremental=args.incremental, profiler=profiler,
+                       chart_outputs=chart_outputs, partition_reports=args.partition_reports,
+                       partition_format=args.partition_format,
+                       report_formats=args.report_format, engine=args.engine,
+                       sqlite_path=args.sqlite)
+    finally:
+        profiler.write_trace(args.profile_format)
+        profiler.stop()
 
 
 if __name__ == "__main__":
@@ -16,5 +16,11 @@ setup(
         "openpyxl",
         "numpy"
     ],
+    extras_require={
+        "cache": ["pyarrow"],
+        "parquet": ["pyarrow"],
+        "polars": ["polars>=0.20"],
+        "duckdb": ["duckdb"],
+    },
     python_requires='>=3.8',
 )
@@ -0,0 +1,194 @@
+"""
+Mòdul d'acumuladors estadístics d'una sola passada.
+
+Els acumuladors mantenen els moments necessaris (nombre de valors, mitjana,
+suma de quadrats de les desviacions i co-moment) per obtenir la mitjana, la
+variància i la correlació de Pearson sense desar les dades. S'actualitzen per
+lots amb operacions vectoritzades i es combinen amb la fórmula de Chan et al.
+(la generalització per lots de l'algorisme de Welford), de manera que els
+resultats parcials de diversos fragments o processos es poden fusionar.
+"""
+
+import numpy as np
+
+
+class RunningMoments:
+    """
+    Mitjana, variància i extrems d'una variable, acumulats per lots.
+
+    Opcionalment guarda l'etiqueta (per exemple, la branca) del valor màxim
+    i del mínim. En cas d'empat es manté la primera aparició.
+    """
+
+    def __init__(self):
+        """Inicialitza un acumulador buit."""
+        self.count = 0
+        # Sense cap valor no hi ha mitjana: NaN, com la mitjana de pandas.
+        self.mean = np.nan
+        self.m2 = 0.0
+        self.min = np.nan
+        self.max = np.nan
+        self.min_label = None
+        self.max_label = None
+
+    def update(self, values, labels=None):
+        """
+        Afegeix un lot de valors. Els NaN s'ignoren.
+
+        Args:
+            values (array-like): Valors del lot.
+            labels (array-like, opcional): Etiqueta de cada valor.
+        Returns:
+            RunningMoments: El mateix acumulador, per encadenar crides.
+        """
+        values = np.asarray(values, dtype=float)
+        valid = ~np.isnan(values)
+        if labels is not None:
+            labels = np.asarray(labels, dtype=object)[valid]
+        values = values[valid]
+        if values.size == 0:
+            return self
+
+        batch = RunningMoments()
+        batch.count = int(values.size)
+        batch.mean = float(values.mean())
+        batch.m2 = float(((values - batch.mean) ** 2).sum())
+        # argmin/argmax són O(N): no cal ordenar el lot.
+        i_min, i_max = int(values.argmin()), int(values.argmax())
+        batch.min, batch.max = float(values[i_min]), float(values[i_max])
+        if labels is not None:
+            batch.min_label, batch.max_label = labels[i_min], labels[i_max]
+        return self.merge(batch)
+
+    def merge(self, other):
+        """
+        Fusiona un altre acumulador (d'un altre fragment o procés) en aquest.
+
+        Args:
+            other (RunningMoments): Acumulador a fusionar.
+        Returns:
+            RunningMoments: El mateix acumulador, per encadenar crides.
+        """
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.__dict__.update(other.__dict__)
+            return self
+
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+
+        if other.min < self.min:
+            self.min, self.min_label = other.min, other.min_label
+        if other.max > self.max:
+            self.max, self.max_label = other.max, other.max_label
+        return self
+
+    def variance(self, ddof=1):
+        """
+        Retorna la variància dels valors acumulats.
+
+        Args:
+            ddof (int, opcional): Graus de llibertat descomptats. Per defecte 1 (mostral).
+        Returns:
+            float: Variància, o NaN si no hi ha prou valors.
+        """
+        return self.m2 / (self.count - ddof) if self.count > ddof else np.nan
+
+    def std(self, ddof=1):
+        """
+        Retorna la desviació típica dels valors acumulats.
+
+        Args:
+            ddof (int, opcional): Graus de llibertat descomptats. Per defecte 1 (mostral).
+        Returns:
+            float: Desviació típica, o NaN si no hi ha prou valors.
+        """
+        return float(np.sqrt(self.variance(ddof)))
+
+
+class RunningCovariance:
+    """
+    Moments conjunts de dues variables per calcular la correlació de Pearson.
+
+    Només es tenen en compte les files on les dues variables tenen valor
+    (files completes per parelles), de manera que x i y sempre estan alineades.
+    """
+
+    def __init__(self):
+        """Inicialitza un acumulador buit."""
+        self.count = 0
+        self.mean_x = 0.0
+        self.mean_y = 0.0
+        self.m2_x = 0.0
+        self.m2_y = 0.0
+        self.c_xy = 0.0
+
+    def update(self, x, y):
+        """
+        Afegeix un lot de parelles de valors.
+
+        Args:
+            x (array-like): Valors de la primera variable.
+            y (array-like): Valors de la segona variable, alineats amb x.
+        Returns:
+            RunningCovariance: El mateix acumulador, per encadenar crides.
+        """
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        complete = ~(np.isnan(x) | np.isnan(y))
+        x, y = x[complete], y[complete]
+        if x.size == 0:
+            return self
+
+        batch = RunningCovariance()
+        batch.count = int(x.size)
+        batch.mean_x, batch.mean_y = float(x.mean()), float(y.mean())
+        dx, dy = x - batch.mean_x, y - batch.mean_y
+        batch.m2_x = float((dx * dx).sum())
+        batch.m2_y = float((dy * dy).sum())
+        batch.c_xy = float((dx * dy).sum())
+        return self.merge(batch)
+
+    def merge(self, other):
+        """
+        Fusiona un altre acumulador (d'un altre fragment o procés) en aquest.
+
+        Args:
+            other (RunningCovariance): Acumulador a fusionar.
+        Returns:
+            RunningCovariance: El mateix acumulador, per encadenar crides.
+        """
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.__dict__.update(other.__dict__)
+            return self
+
+        count = self.count + other.count
+        weight = self.count * other.count / count
+        delta_x = other.mean_x - self.mean_x
+        delta_y = other.mean_y - self.mean_y
+
+        self.mean_x += delta_x * other.count / count
+        self.mean_y += delta_y * other.count / count
+        self.m2_x += other.m2_x + delta_x * delta_x * weight
+        self.m2_y += other.m2_y + delta_y * delta_y * weight
+        self.c_xy += other.c_xy + delta_x * delta_y * weight
+        self.count = count
+        return self
+
+    def correlation(self):
+        """
+        Retorna el coeficient de correlació de Pearson.
+
+        Returns:
+            float: Correlació entre -1 i 1, o NaN si alguna variable és constant
+            o hi ha menys de dues parelles.
+        """
+        if self.count < 2 or self.m2_x <= 0 or self.m2_y <= 0:
+            return np.nan
+        return float(np.clip(self.c_xy / np.sqrt(self.m2_x * self.m2_y), -1.0, 1.0))
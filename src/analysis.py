@@ -5,28 +5,268 @@ Aquest mòdul conté funcions per calcular estadístiques tant globals com espec
 per branca d'estudi, tendències de rendiment i abandonament
 i generar un informe final en format JSON.
 """
-import json
-import os
 from datetime import datetime
-from scipy.stats import linregress, pearsonr
+import numpy as np
+import pandas as pd
+from src.accumulators import RunningCovariance, RunningMoments
+from src.report_writers import write_report
 
+# Pendent mínim (en valor absolut) per considerar que una sèrie no és estable.
+TREND_THRESHOLD = 0.01
 
-def get_tendencia(years, values):
+# Puntuació z robusta (basada en la MAD) a partir de la qual un any és anòmal,
+# i nombre mínim d'anys amb dades perquè una sèrie tingui historial suficient.
+ANOMALY_THRESHOLD = 3.5
+ANOMALY_MIN_YEARS = 5
+# Escala mínima de la puntuació z, en unitats de la mètrica (taxes entre 0 i 1).
+# Amb pocs anys la MAD s'anul·la si els valors s'agrupen, i qualsevol
+# variació petita donaria una z enorme: cal una desviació de més de
+# ANOMALY_THRESHOLD * ANOMALY_MIN_SCALE (7 punts) per marcar un any.
+ANOMALY_MIN_SCALE = 0.02
+
+
+def classify_trends(values, threshold=TREND_THRESHOLD, observed=None):
+    """
+    Calcula la regressió lineal i la tendència de moltes sèries alhora.
+
+    Cada fila de la matriu és una sèrie temporal (grups × anys). L'eix x és
+    la posició de cada any dins dels anys de la sèrie, indicats per observed.
+    Com linregress, si un any de la sèrie no té valor (NaN), el pendent és
+    NaN i la sèrie es considera 'estable'. Sense observed, els anys de cada
+    sèrie són els que tenen valor. Tot el càlcul es fa amb operacions
+    vectoritzades de NumPy, sense cap bucle per sèrie.
+
+    Args:
+        values (array-like): Matriu 2-D (o una sola sèrie 1-D) de valors.
+        threshold (float, opcional): Pendent a partir del qual la tendència
+            és 'creciente' o 'decreciente'. Per defecte TREND_THRESHOLD.
+        observed (array-like, opcional): Matriu booleana amb els anys que
+            formen part de cada sèrie. Per defecte, els anys amb valor.
+    Returns:
+        dict: Arrays 'slope', 'intercept', 'rvalue' i 'tendencia' amb un
+        element per sèrie. Les sèries amb menys de dos valors o amb algun
+        any sense valor tenen pendent NaN i es consideren 'estable'.
+    """
+    y = np.atleast_2d(np.asarray(values, dtype=float))
+    mask = ~np.isnan(y)
+    if observed is not None:
+        observed = np.broadcast_to(np.atleast_2d(np.asarray(observed, dtype=bool)), y.shape)
+        # Un any de la sèrie sense valor anul·la tota la regressió.
+        mask = np.where((observed & ~mask).any(axis=1, keepdims=True), False, observed)
+    n = mask.sum(axis=1)
+
+    # Posició de cada valor dins dels anys de la seva sèrie.
+    x = np.cumsum(mask, axis=1) - 1.0
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        x_mean = np.where(mask, x, 0.0).sum(axis=1) / n
+        y_mean = np.where(mask, y, 0.0).sum(axis=1) / n
+        dx = np.where(mask, x - x_mean[:, np.newaxis], 0.0)
+        dy = np.where(mask, y - y_mean[:, np.newaxis], 0.0)
+
+        sxx = (dx * dx).sum(axis=1)
+        syy = (dy * dy).sum(axis=1)
+        sxy = (dx * dy).sum(axis=1)
+
+        slope = np.where(sxx > 0, sxy / sxx, np.nan)
+        intercept = y_mean - slope * x_mean
+        # Com scipy, una sèrie constant té correlació 0.
+        rvalue = np.where(syy > 0, sxy / np.sqrt(sxx * syy), 0.0)
+        rvalue = np.where(sxx > 0, np.clip(rvalue, -1.0, 1.0), np.nan)
+
+    tendencia = np.full(y.shape[0], "estable", dtype=object)
+    tendencia[slope > threshold] = "creciente"
+    tendencia[slope < -threshold] = "decreciente"
+
+    return {
+        "slope": slope,
+        "intercept": intercept,
+        "rvalue": rvalue,
+        "tendencia": tendencia
+    }
+
+
+def detect_anomalies(values, threshold=ANOMALY_THRESHOLD, min_years=ANOMALY_MIN_YEARS,
+                     min_scale=ANOMALY_MIN_SCALE):
+    """
+    Detecta els anys anòmals de moltes sèries alhora amb la puntuació z robusta.
+
+    Cada fila de la matriu és una sèrie temporal (grups × anys) i es compara
+    amb el seu propi historial: z = (x - mediana) / escala, amb escala =
+    MAD / 0.6745. Si la MAD és 0 (més de la meitat dels anys tenen el mateix
+    valor), s'utilitza la desviació absoluta mitjana escalada (1.2533 *
+    mitjana |x - mediana|). L'escala mai no és inferior a min_scale.
+    Tot el càlcul es fa amb operacions vectoritzades sobre la matriu.
+
+    Args:
+        values (array-like): Matriu 2-D (o una sola sèrie 1-D) de valors, amb NaN
+            als anys sense dades.
+        threshold (float, opcional): |z| a partir del qual un any és anòmal.
+        min_years (int, opcional): Anys amb dades mínims per avaluar una sèrie.
+        min_scale (float, opcional): Escala mínima, en unitats de la mètrica.
+    Returns:
+        np.ndarray: Puntuacions z robustes (NaN on no es poden calcular).
+        np.ndarray: Matriu booleana amb els anys anòmals.
+    """
+    y = np.atleast_2d(np.asarray(values, dtype=float))
+    enough = (~np.isnan(y)).sum(axis=1) >= min_years
+    scores = np.full(y.shape, np.nan)
+    if not enough.any():
+        return scores, np.zeros(y.shape, dtype=bool)
+
+    rows = y[enough]
+    median = np.nanmedian(rows, axis=1, keepdims=True)
+    deviation = np.abs(rows - median)
+    mad = np.nanmedian(deviation, axis=1, keepdims=True)
+    mean_ad = np.nanmean(deviation, axis=1, keepdims=True)
+
+    scale = np.maximum(np.where(mad > 0, mad / 0.6745, 1.2533 * mean_ad), min_scale)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rows_scores = (rows - median) / scale
+    # Una sèrie constant no té cap any anòmal.
+    rows_scores[np.broadcast_to(mean_ad == 0, rows.shape) & ~np.isnan(rows)] = 0.0
+
+    scores[enough] = rows_scores
+    return scores, np.abs(np.nan_to_num(scores)) > threshold
+
+
+def get_tendencia(years, values, threshold=TREND_THRESHOLD):
     """
     Interpreta el pendent de la regressió lineal per categoritzar la tendència.
 
     Args:
         years (list): Llista amb els noms dels períodes temporals (ex: ['19-20', '20-21']).
         values (list): Llista de valors numèrics (mitjanes) corresponents a cada període.
+        threshold (float, opcional): Pendent mínim per considerar la sèrie no estable.
     Returns:
         str: Categorització de la tendència: 'creciente', 'decreciente' o 'estable'.
     """
-    slope, _, _, _, _ = linregress(range(len(years)), values)
-    if slope > 0.01:
-        return "creciente"
-    if slope < -0.01:
-        return "decreciente"
-    return "estable"
+    if len(years) != len(values):
+        raise ValueError("Els anys i els valors han de tenir la mateixa longitud.")
+    # Tots els anys rebuts formen part de la sèrie, amb valor o sense.
+    return classify_trends([values], threshold, observed=True)["tendencia"][0]
+
+
+def compute_group_statistics(df, group_col):
+    """
+    Calcula en una sola passada totes les estadístiques per grup.
+
+    Fa una única agregació agrupada per obtenir la mitjana, la desviació
+    típica, el mínim i el màxim de cada mètrica per grup, i una altra per
+    obtenir la mitjana de cada mètrica per grup i any acadèmic. El cost no
+    depèn del nombre de grups, per tant es pot utilitzar amb claus de més
+    granularitat com 'Sigles', 'Tipus universitat' o 'Sexe'.
+
+    Args:
+        df (pd.DataFrame): Dataset fusionat.
+        group_col (str): Columna per la qual s'agrupa (ex: 'Branca').
+    Returns:
+        pd.DataFrame: Estadístiques per grup, amb columnes (mètrica, estadístic).
+        pd.DataFrame: Mitjanes per grup i any, amb columnes (mètrica, curs) ordenades per curs.
+    """
+    metrics = ['% Abandonament a primer curs', 'Taxa rendiment']
+
+    summary = df.groupby(group_col, observed=True)[metrics].agg(['mean', 'std', 'min', 'max'])
+
+    yearly = (
+        df.groupby([group_col, 'Curs Acadèmic'], observed=True)[metrics]
+        .mean()
+        .unstack('Curs Acadèmic')
+        .sort_index(axis=1)
+    )
+    return summary, yearly
+
+
+def get_group_analysis(df, group_col, groups=None):
+    """
+    Construeix l'anàlisi estadístic de cada grup a partir de compute_group_statistics.
+
+    Args:
+        df (pd.DataFrame): Dataset fusionat.
+        group_col (str): Columna per la qual s'agrupa (ex: 'Branca', 'Sigles').
+        groups (iterable, opcional): Grups a analitzar i ordre de sortida.
+            Per defecte, els grups en ordre d'aparició.
+    Returns:
+        dict: Diccionari on cada clau és un grup amb les seves estadístiques i tendències.
+    """
+    if groups is None:
+        groups = df[group_col].unique()
+
+    summary, yearly = compute_group_statistics(df, group_col)
+
+    # Anys en què cada grup té files: la sèrie temporal de cada grup. Un any
+    # amb files però sense cap valor de la mètrica fa la tendència 'estable'.
+    observed = (
+        df.groupby([group_col, 'Curs Acadèmic'], observed=True).size()
+        .unstack('Curs Acadèmic')
+        .reindex(index=yearly.index, columns=yearly['Taxa rendiment'].columns)
+        .notna()
+        .to_numpy()
+    )
+
+    # Tendències de tots els grups calculades alhora sobre la matriu grups × anys.
+    abandonment_trends = pd.Series(
+        classify_trends(yearly['% Abandonament a primer curs'].to_numpy(),
+                        observed=observed)["tendencia"],
+        index=yearly.index
+    )
+    performance_trends = pd.Series(
+        classify_trends(yearly['Taxa rendiment'].to_numpy(), observed=observed)["tendencia"],
+        index=yearly.index
+    )
+    anomalies = _yearly_anomalies(yearly)
+
+    # Els grups sense cap fila agrupable (clau nul·la o sense curs) no són al
+    # resum: tenen estadístiques NaN i tendència 'estable'.
+    summary = summary.reindex(groups)
+
+    analysis = {}
+    for i, group in enumerate(groups):
+        stats = summary.iloc[i]
+
+        analysis[group] = {
+            "abandono_medio": round(float(stats[('% Abandonament a primer curs', 'mean')]), 2),
+            "abandono_std": round(float(stats[('% Abandonament a primer curs', 'std')]), 2),
+            "abandono_min": round(float(stats[('% Abandonament a primer curs', 'min')]), 2),
+            "abandono_max": round(float(stats[('% Abandonament a primer curs', 'max')]), 2),
+            "rendimiento_medio": round(float(stats[('Taxa rendiment', 'mean')]), 2),
+            "rendimiento_std": round(float(stats[('Taxa rendiment', 'std')]), 2),
+            "rendimiento_min": round(float(stats[('Taxa rendiment', 'min')]), 2),
+            "rendimiento_max": round(float(stats[('Taxa rendiment', 'max')]), 2),
+            "tendencia_abandono": abandonment_trends.get(group, "estable"),
+            "tendencia_rendimiento": performance_trends.get(group, "estable"),
+            "años_anomalos": anomalies.get(group, [])
+        }
+    return analysis
+
+
+def _yearly_anomalies(yearly):
+    """
+    Llista els anys anòmals de cada grup a partir de la matriu grups × anys.
+
+    Args:
+        yearly (pd.DataFrame): Mitjanes per grup i any de compute_group_statistics.
+    Returns:
+        dict: Per a cada grup amb anomalies, llista de diccionaris amb el curs,
+        la mètrica, el valor i la puntuació z robusta.
+    """
+    anomalies = {}
+    for metric, name in (('% Abandonament a primer curs', 'abandono'),
+                         ('Taxa rendiment', 'rendimiento')):
+        matrix = yearly[metric]
+        values = matrix.to_numpy(dtype=float)
+        scores, flags = detect_anomalies(values)
+        # Només es recorren les cel·les marcades, no tota la matriu.
+        for i, j in zip(*np.nonzero(flags)):
+            anomalies.setdefault(matrix.index[i], []).append({
+                "curso": str(matrix.columns[j]),
+                "metrica": name,
+                "valor": round(float(values[i, j]), 2),
+                "puntuacion_z": round(float(scores[i, j]), 2)
+            })
+    for group_anomalies in anomalies.values():
+        group_anomalies.sort(key=lambda anomaly: (anomaly["curso"], anomaly["metrica"]))
+    return anomalies
 
 
 def get_branch_analysis(df, branches):
@@ -43,47 +283,50 @@ def get_branch_analysis(df, branches):
     Returns:
         dict: Diccionari on cada clau és una branca amb les seves estadístiques i tendències.
     """
-    analysis_branch = {}
-    for branch in branches:
-        branch_data = df[df['Branca'] == branch]
-
-        # Agrupem les dades per any acadèmic per a cada branca.
-        branch_by_year = branch_data.groupby('Curs Acadèmic').agg({
-            '% Abandonament a primer curs': 'mean',
-            'Taxa rendiment': 'mean'
-        }).reset_index()
-
-        # Extreiem les llistes d'anys i valors.
-        years = branch_by_year['Curs Acadèmic'].tolist()
-        abandonment_values = branch_by_year['% Abandonament a primer curs'].tolist()
-        performance_values = branch_by_year['Taxa rendiment'].tolist()
-
-        # Seleccionem les columnes per facilitar el càlcul d'estadístics
-        col_aband = branch_data['% Abandonament a primer curs']
-        col_perf = branch_data['Taxa rendiment']
-
-        analysis_branch[branch] = {
-            "abandono_medio": round(float(col_aband.mean()), 2),
-            "abandono_std": round(float(col_aband.std()), 2),
-            "abandono_min": round(float(col_aband.min()), 2),
-            "abandono_max": round(float(col_aband.max()), 2),
-            "rendimiento_medio": round(float(col_perf.mean()), 2),
-            "rendimiento_std": round(float(col_perf.std()), 2),
-            "rendimiento_min": round(float(col_perf.min()), 2),
-            "rendimiento_max": round(float(col_perf.max()), 2),
-            "tendencia_abandono": get_tendencia(years, abandonment_values),
-            "tendencia_rendimiento": get_tendencia(years, performance_values),
-            "años_anomalos": []
-        }
-    return analysis_branch
+    return get_group_analysis(df, 'Branca', branches)
 
 
-def analyze_dataset(df):
+def compute_global_statistics(df, chunk_size=None):
     """
-    Informació bàsica sobre l'anàlisis estadística que estem realitzant.
+    Calcula les estadístiques globals del dataset en una sola passada.
+
+    Acumula la mitjana, la variància i els extrems de cada mètrica (amb la
+    branca del màxim i del mínim) i el co-moment entre l'abandonament i el
+    rendiment sobre les files on els dos valors existeixen. Si s'indica
+    chunk_size, el dataset es recorre per fragments i els acumuladors es
+    fusionen, igual que es faria amb resultats de diversos processos.
 
     Args:
-        df (pd.DataFrame): Dataset fusionat a analitzar estadísticament.
+        df (pd.DataFrame): Dataset fusionat.
+        chunk_size (int, opcional): Nombre de files per fragment. Per defecte, tot alhora.
+    Returns:
+        dict: Acumuladors 'abandono' i 'rendimiento' (RunningMoments) i
+        'correlacion' (RunningCovariance).
+    """
+    abandonment = df['% Abandonament a primer curs'].to_numpy(dtype=float)
+    performance = df['Taxa rendiment'].to_numpy(dtype=float)
+    branches = df['Branca'].to_numpy(dtype=object)
+
+    stats = {
+        "abandono": RunningMoments(),
+        "rendimiento": RunningMoments(),
+        "correlacion": RunningCovariance()
+    }
+    step = chunk_size or max(len(df), 1)
+    for start in range(0, len(df), step):
+        chunk = slice(start, start + step)
+        stats["abandono"].update(abandonment[chunk], branches[chunk])
+        stats["rendimiento"].update(performance[chunk], branches[chunk])
+        stats["correlacion"].update(abandonment[chunk], performance[chunk])
+    return stats
+
+
+def build_report(df):
+    """
+    Construeix l'informe estadístic complet d'un dataset, sense desar-lo.
+
+    Args:
+        df (pd.DataFrame): Dataset fusionat (o una partició) a analitzar.
     Returns:
         dict: Un diccionari amb el resum estadístic complet (metadades,
               correlacions, anàlisi per branca i rànquings).
@@ -92,56 +335,54 @@ def analyze_dataset(df):
     metadata = {
         "fecha_analisis": datetime.now().strftime("%Y-%m-%d"),
         "num_registros": int(len(df)),
-        "periodo_temporal": sorted(df['Curs Acadèmic'].unique().tolist())
+        "periodo_temporal": sorted(df['Curs Acadèmic'].dropna().unique().tolist())
     }
 
-    # Calculem la correlació entre l'abandonament i rendiment.
-    corr, _ = pearsonr(df['% Abandonament a primer curs'].dropna(),
-                       df['Taxa rendiment'].dropna())
+    # Estadístiques globals, correlació i extrems en una sola passada.
+    global_stats = compute_global_statistics(df)
+    abandonment = global_stats["abandono"]
+    performance = global_stats["rendimiento"]
 
     # Anàlisi detallat per branca.
     analysis_branch = get_branch_analysis(df, df['Branca'].unique())
 
-    # Ordenem de forma descendent per taxa de rendiment.
-    performance_sorted_df = df.sort_values(
-        by=["Taxa rendiment"],
-        ascending=False
-    )
-
-    best_performance_tax = performance_sorted_df["Branca"].iloc[0]
-    worst_performance_tax = performance_sorted_df["Branca"].iloc[-1]
-
-    abandonment_sorted_df = df.sort_values(
-        by=["% Abandonament a primer curs"],
-        ascending=False
-    )
-
-    best_abandonment = abandonment_sorted_df["Branca"].iloc[0]
-    worst_abandonment = abandonment_sorted_df["Branca"].iloc[-1]
-
     full_report = {
         "metadata": metadata,
         "estadisticas_globales": {
-            "abandono_medio": round(float(df['% Abandonament a primer curs'].mean()), 2),
-            "rendimiento_medio": round(float(df['Taxa rendiment'].mean()), 2),
-            "correlacion_abandono_rendimiento": round(float(corr), 2)
+            "abandono_medio": round(abandonment.mean, 2),
+            "rendimiento_medio": round(performance.mean, 2),
+            "correlacion_abandono_rendimiento": round(global_stats["correlacion"].correlation(), 2)
         },
         "analisis_por_rama": analysis_branch,
         "ranking_ramas": {
-            "mejor_rendimiento": [best_performance_tax],
-            "peor_rendimiento": [worst_performance_tax],
-            "mayor_abandono": [best_abandonment],
-            "menor_abandono": [worst_abandonment]
+            # Branca de la fila amb el valor màxim o mínim de cada mètrica.
+            "mejor_rendimiento": [performance.max_label],
+            "peor_rendimiento": [performance.min_label],
+            "mayor_abandono": [abandonment.max_label],
+            "menor_abandono": [abandonment.min_label]
         }
     }
 
-    # Exportació a JSON
-    output_path = "src/report/analisi_estadistic.json"
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    return full_report
+
+
+def analyze_dataset(df, formats=None):
+    """
+    Informació bàsica sobre l'anàlisis estadística que estem realitzant.
 
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(full_report, f, indent=2, ensure_ascii=False)
+    Args:
+        df (pd.DataFrame): Dataset fusionat a analitzar estadísticament.
+        formats (list, opcional): Formats de sortida de l'informe ('json',
+            'json-compact', 'ndjson', 'parquet'). Per defecte només 'json'.
+    Returns:
+        dict: Un diccionari amb el resum estadístic complet (metadades,
+              correlacions, anàlisi per branca i rànquings).
+    """
+    full_report = build_report(df)
 
-    print(f"Informe generat correctament a: {output_path}")
+    # Exportació en cada format demanat (per defecte, el JSON indentat).
+    for fmt in formats or ['json']:
+        output_path = write_report(full_report, "src/report/analisi_estadistic", fmt)
+        print(f"Informe generat correctament a: {output_path}")
 
     return full_report
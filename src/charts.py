@@ -0,0 +1,296 @@
+"""
+Mòdul de generació de gràfics per dimensió.
+
+Genera, a partir del dataset fusionat, les mateixes tendències de
+plot_temporal_trends desglossades per Sigles, Tipus universitat, Sexe i
+Tipus Estudi:
+
+- Un gràfic d'abandonament i rendiment per branca per a cada valor de la
+  dimensió (ex: src/img/charts/sigles/uab.png).
+- Una graella de petits múltiples per dimensió i mètrica, amb un panell per
+  valor (ex: src/img/charts/sigles/multiples_rendiment.png).
+
+Les sèries de cada dimensió es calculen un sol cop amb build_trend_series i
+cada gràfic es renderitza amb l'API orientada a objectes de Matplotlib (sense
+pyplot) en un pool de processos. Cada sortida pot tenir el seu format i DPI.
+"""
+
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from src.file_names import unique_slugs
+from src.render_cache import is_fresh, load_manifest, record, save_manifest, series_fingerprint
+from src.visualization import (
+    PLOT_METRICS, build_trend_series, draw_trend_lines, draw_trends_figure,
+    new_figure, tab10_colors
+)
+
+CHARTS_DIR = "src/img/charts"
+CHART_DIMENSIONS = ['Sigles', 'Tipus universitat', 'Sexe', 'Tipus Estudi']
+DEFAULT_OUTPUTS = [{"format": "png", "dpi": 150}]
+
+# Títol i nom curt de fitxer de cada mètrica.
+METRIC_LABELS = {
+    '% Abandonament a primer curs': ("% Abandonament", "abandonament"),
+    'Taxa rendiment': ("Taxa de Rendiment (0-1)", "rendiment"),
+}
+
+# Nombre màxim de panells per fila a les graelles de petits múltiples.
+MAX_GRID_COLUMNS = 4
+
+
+def parse_output_spec(spec):
+    """
+    Interpreta una sortida amb el format 'format' o 'format:dpi'.
+
+    Args:
+        spec (str): Especificació de la sortida (ex: 'png:300', 'svg').
+    Returns:
+        dict: Sortida amb les claus 'format' i 'dpi'.
+    Raises:
+        ValueError: Si el DPI no és un enter positiu.
+    """
+    fmt, _, dpi = spec.partition(':')
+    dpi = int(dpi) if dpi else DEFAULT_OUTPUTS[0]["dpi"]
+    if dpi <= 0:
+        raise ValueError(f"DPI no vàlid a la sortida '{spec}'")
+    return {"format": fmt.lower(), "dpi": dpi}
+
+
+def build_chart_jobs(df, dimensions=None, outputs=None, output_dir=None):
+    """
+    Prepara la llista de gràfics a renderitzar per a cada dimensió.
+
+    Cada feina conté només les sèries ja agregades que necessita, de manera
+    que es pot enviar a un altre procés amb un cost mínim.
+
+    Args:
+        df (pd.DataFrame): Dataset fusionat.
+        dimensions (list, opcional): Columnes per desglossar. Per defecte CHART_DIMENSIONS.
+        outputs (list, opcional): Sortides ({'format', 'dpi'}) de cada gràfic.
+        output_dir (str, opcional): Carpeta arrel. Per defecte CHARTS_DIR.
+    Returns:
+        list: Feines de renderització (diccionaris).
+    """
+    dimensions = dimensions or CHART_DIMENSIONS
+    outputs = outputs or DEFAULT_OUTPUTS
+    output_dir = output_dir or CHARTS_DIR
+
+    # Els colors de cada branca són els mateixos a tots els gràfics.
+    colors = tab10_colors(build_trend_series(df, 'Branca').groups)
+
+    # Noms de fitxer únics: dos valors amb el mateix slugify no se sobreescriuen.
+    dimension_names = unique_slugs(dimensions)
+    multiples_names = {
+        metric: f"multiples_{METRIC_LABELS[metric][1]}" for metric in PLOT_METRICS
+    }
+
+    jobs = []
+    for dimension in dimensions:
+        series = build_trend_series(df, [dimension, 'Branca'])
+        dimension_dir = os.path.join(output_dir, dimension_names[dimension])
+
+        # Posicions de les branques de cada valor de la dimensió, en ordre d'aparició.
+        panels = {}
+        for i, (value, _) in enumerate(series.groups):
+            panels.setdefault(value, []).append(i)
+        panels = [
+            (value, series.subset(indices, [series.groups[i][1] for i in indices]))
+            for value, indices in panels.items()
+        ]
+        value_names = unique_slugs([value for value, _ in panels],
+                                   reserved=multiples_names.values())
+
+        for value, panel in panels:
+            jobs.append({
+                "kind": "trends",
+                "title": f"{dimension}: {value}",
+                "series": panel,
+                "colors": colors,
+                "path": os.path.join(dimension_dir, value_names[value]),
+                "outputs": outputs
+            })
+        for metric in PLOT_METRICS:
+            jobs.append({
+                "kind": "multiples",
+                "title": dimension,
+                "metric": metric,
+                "panels": panels,
+                "colors": colors,
+                "path": os.path.join(dimension_dir, multiples_names[metric]),
+                "outputs": outputs
+            })
+    return jobs
+
+
+def _draw_multiples(job):
+    """
+    Dibuixa una graella amb un panell per valor de la dimensió.
+
+    Args:
+        job (dict): Feina de tipus 'multiples'.
+    Returns:
+        matplotlib.figure.Figure: Figura dibuixada.
+    """
+    n_panels = len(job["panels"])
+    n_cols = min(MAX_GRID_COLUMNS, n_panels)
+    n_rows = math.ceil(n_panels / n_cols)
+    label, _ = METRIC_LABELS[job["metric"]]
+
+    fig = new_figure((4 * n_cols, 3 * n_rows))
+    axes = fig.subplots(n_rows, n_cols, sharex=True, sharey=True, squeeze=False).ravel()
+    for ax, (value, series) in zip(axes, job["panels"]):
+        draw_trend_lines(ax, series, job["metric"], job["colors"])
+        ax.set_title(str(value), fontsize=10)
+        ax.grid(True, linestyle='--', alpha=0.7)
+        ax.tick_params(axis='x', labelrotation=45)
+    for ax in axes[n_panels:]:
+        ax.set_visible(False)
+
+    # Una sola llegenda per a tota la graella, amb totes les branques. Les
+    # entrades són línies soltes, no afegides a cap panell.
+    from matplotlib.lines import Line2D  # pylint: disable=import-outside-toplevel
+
+    handles = [
+        Line2D([], [], marker='o', color=color, label=branch)
+        for branch, color in job["colors"].items()
+    ]
+    fig.legend(handles=handles, title="Branques", loc='upper left', bbox_to_anchor=(1.0, 1.0))
+    fig.suptitle(f"{label} per {job['title']}", fontsize=14, fontweight='bold')
+    fig.tight_layout()
+    return fig
+
+
+def render_chart(job):
+    """
+    Renderitza un gràfic i el desa en totes les sortides demanades.
+
+    La figura es dibuixa un sol cop i s'allibera explícitament en acabar.
+
+    Args:
+        job (dict): Feina creada per build_chart_jobs.
+    Returns:
+        list: Rutes dels fitxers desats.
+    """
+    if job["kind"] == "multiples":
+        fig = _draw_multiples(job)
+    else:
+        fig = new_figure((14, 10))
+        draw_trends_figure(fig, job["series"], job["colors"], subtitle=job["title"])
+
+    try:
+        os.makedirs(os.path.dirname(job["path"]) or ".", exist_ok=True)
+        paths = []
+        for output in job["outputs"]:
+            path = f"{job['path']}.{output['format']}"
+            fig.savefig(path, format=output["format"], dpi=output["dpi"], bbox_inches='tight')
+            paths.append(path)
+        return paths
+    finally:
+        fig.clear()
+
+
+def _render_worker(job):
+    """
+    Renderitza un gràfic dins d'un procés del pool.
+
+    Args:
+        job (dict): Feina de renderització.
+    Returns:
+        list | Exception: Rutes desades o l'excepció produïda.
+    """
+    try:
+        return render_chart(job)
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        return e
+
+
+def render_charts(jobs, max_workers=None):
+    """
+    Renderitza una llista de gràfics en un pool de processos.
+
+    Els errors no aturen la resta de gràfics: es retornen a la posició
+    corresponent perquè es puguin informar un per un.
+
+    Args:
+        jobs (list): Feines creades per build_chart_jobs.
+        max_workers (int, opcional): Nombre màxim de processos. Per defecte,
+            el nombre de CPUs.
+    Returns:
+        list: Per a cada feina, les rutes desades o l'excepció produïda.
+    """
+    jobs = list(jobs)
+    if max_workers is None:
+        max_workers = min(len(jobs), os.cpu_count() or 1)
+
+    # Amb una sola feina o un sol procés no val la pena crear el pool.
+    if len(jobs) <= 1 or max_workers <= 1:
+        return [_render_worker(job) for job in jobs]
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(_render_worker, jobs, chunksize=4))
+
+
+def job_fingerprint(job):
+    """
+    Calcula l'empremta d'una feina de renderització.
+
+    Args:
+        job (dict): Feina creada per build_chart_jobs.
+    Returns:
+        str: Hash hexadecimal de les sèries i els paràmetres del gràfic.
+    """
+    if job["kind"] == "multiples":
+        series_list = [series for _, series in job["panels"]]
+        panels = [str(value) for value, _ in job["panels"]]
+    else:
+        series_list, panels = [job["series"]], None
+    params = {key: job.get(key) for key in ("kind", "title", "metric", "colors", "outputs")}
+    params["panels"] = panels
+    return series_fingerprint(series_list, params)
+
+
+def generate_dimension_charts(df, dimensions=None, outputs=None, output_dir=None,
+                              max_workers=None, use_cache=True):
+    """
+    Genera tots els gràfics per dimensió del dataset fusionat.
+
+    Els gràfics amb la mateixa empremta que a l'última execució (segons el
+    manifest de la carpeta de sortida) no es tornen a renderitzar.
+
+    Args:
+        df (pd.DataFrame): Dataset fusionat.
+        dimensions (list, opcional): Columnes per desglossar. Per defecte CHART_DIMENSIONS.
+        outputs (list, opcional): Sortides ({'format', 'dpi'}) de cada gràfic.
+        output_dir (str, opcional): Carpeta arrel. Per defecte CHARTS_DIR.
+        max_workers (int, opcional): Nombre màxim de processos.
+        use_cache (bool, opcional): Si s'han d'ometre els gràfics sense canvis.
+    Returns:
+        list: Rutes de tots els fitxers de gràfics, nous o reutilitzats.
+    """
+    output_dir = output_dir or CHARTS_DIR
+    jobs = build_chart_jobs(df, dimensions, outputs, output_dir)
+    manifest = load_manifest(output_dir)
+
+    saved, pending = [], []
+    for job in jobs:
+        key = os.path.relpath(job["path"], output_dir)
+        fingerprint = job_fingerprint(job)
+        if use_cache and is_fresh(manifest, key, fingerprint):
+            saved.extend(manifest["outputs"][key]["files"])
+        else:
+            pending.append((job, key, fingerprint))
+
+    rendered = render_charts([job for job, _, _ in pending], max_workers)
+    for (job, key, fingerprint), result in zip(pending, rendered):
+        if isinstance(result, Exception):
+            print(f"Error generant el gràfic {job['path']}: {result}")
+        else:
+            record(manifest, key, fingerprint, result)
+            saved.extend(result)
+    save_manifest(output_dir, manifest)
+
+    print(f"Gràfics per dimensió a {output_dir}: {len(saved)} fitxers "
+          f"({len(jobs) - len(pending)} gràfics sense canvis)")
+    return saved
@@ -0,0 +1,259 @@
+"""
+Mòdul de memòria cau columnar dels datasets acadèmics.
+
+Aquest mòdul evita tornar a llegir els fitxers Excel amb openpyxl a cada execució.
+La primera càrrega desa el full, amb els tipus de to_columnar_types (categories
+per a les columnes de baixa cardinalitat), en un fitxer Feather i les
+càrregues següents el llegeixen mapejat en memòria. Les entrades s'identifiquen
+pel contingut del fitxer original (ruta, mida, data de modificació i hash) i la
+carpeta té una mida màxima a partir de la qual s'eliminen les entrades menys
+utilitzades.
+
+La memòria cau depèn de pyarrow, que s'importa la primera vegada que es
+necessita. Si no està instal·lat, el mòdul es desactiva i la càrrega es fa
+directament des de l'Excel. Si un dataset no es pot desar en Feather (per
+exemple, una columna que barreja números i text), es retorna sense desar-lo.
+"""
+
+import glob
+import hashlib
+import os
+
+# Carpeta i límit de mida per defecte de la memòria cau.
+CACHE_DIR = "data/.cache"
+MAX_CACHE_BYTES = 512 * 1024 * 1024
+
+# Una columna de text es converteix a categoria si té pocs valors diferents
+# respecte al nombre de files (Branca, Sigles, Sexe, Curs Acadèmic...).
+CATEGORY_MAX_RATIO = 0.5
+
+_HASH_CHUNK = 1024 * 1024
+
+# Mòdul pyarrow.feather un cop importat (False si no està disponible).
+_FEATHER = None
+
+
+def _feather():
+    """
+    Importa pyarrow.feather només la primera vegada que es necessita.
+
+    Returns:
+        module | None: El mòdul pyarrow.feather, o None si no està disponible.
+    """
+    global _FEATHER  # pylint: disable=global-statement
+    if _FEATHER is None:
+        try:
+            import pyarrow.feather as feather  # pylint: disable=import-outside-toplevel
+            _FEATHER = feather
+        except ImportError:
+            _FEATHER = False
+    return _FEATHER or None
+
+
+def is_cache_available():
+    """
+    Indica si la memòria cau es pot utilitzar en aquest entorn.
+
+    Returns:
+        bool: True si pyarrow està disponible.
+    """
+    return _feather() is not None
+
+
+def _source_prefix(path):
+    """
+    Retorna el prefix de les entrades associades a una ruta d'origen.
+
+    Args:
+        path (str): Ruta del fitxer original.
+    Returns:
+        str: Prefix curt derivat de la ruta absoluta.
+    """
+    return hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()[:12]
+
+
+def cache_key(path):
+    """
+    Calcula la clau de contingut d'un fitxer de dades.
+
+    La clau combina la ruta absoluta, la mida, la data de modificació i el
+    hash SHA-256 del contingut, de manera que qualsevol canvi al fitxer
+    genera una entrada nova.
+
+    Args:
+        path (str): Ruta del fitxer original.
+    Returns:
+        str | None: Clau hexadecimal, o None si el fitxer no es pot llegir.
+    """
+    try:
+        stat = os.stat(path)
+        digest = hashlib.sha256()
+        digest.update(os.path.abspath(path).encode('utf-8'))
+        digest.update(f"{stat.st_size}:{stat.st_mtime_ns}".encode('utf-8'))
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(_HASH_CHUNK), b''):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+def _entry_path(path, key, cache_dir):
+    """
+    Construeix la ruta de l'entrada Feather per a un fitxer i una clau.
+
+    Args:
+        path (str): Ruta del fitxer original.
+        key (str): Clau de contingut retornada per cache_key.
+        cache_dir (str): Carpeta de la memòria cau.
+    Returns:
+        str: Ruta de l'entrada.
+    """
+    return os.path.join(cache_dir, f"{_source_prefix(path)}-{key[:24]}.feather")
+
+
+def to_columnar_types(df):
+    """
+    Converteix les columnes de text de baixa cardinalitat a categories.
+
+    load_dataset l'aplica a tots els datasets que llegeix de l'Excel, amb
+    memòria cau o sense, perquè els tipus no depenguin de si s'ha utilitzat.
+
+    Args:
+        df (pd.DataFrame): Dataset tal com el retorna read_excel.
+    Returns:
+        pd.DataFrame: Dataset amb les columnes categòriques convertides.
+    """
+    n_rows = max(len(df), 1)
+    for col in df.columns:
+        if df[col].dtype == object and df[col].nunique() / n_rows <= CATEGORY_MAX_RATIO:
+            df[col] = df[col].astype('category')
+    return df
+
+
+def read_cache(path, key, cache_dir=None):
+    """
+    Llegeix una entrada de la memòria cau mapejant el fitxer en memòria.
+
+    Args:
+        path (str): Ruta del fitxer original.
+        key (str): Clau de contingut retornada per cache_key.
+        cache_dir (str, opcional): Carpeta de la memòria cau.
+    Returns:
+        pd.DataFrame | None: El dataset, o None si no hi ha cap entrada vàlida.
+    """
+    feather = _feather()
+    if feather is None or key is None:
+        return None
+    entry = _entry_path(path, key, cache_dir or CACHE_DIR)
+    try:
+        table = feather.read_table(entry, memory_map=True)
+    except (OSError, ValueError):
+        return None
+
+    # Actualitzem la data d'accés per a la política d'expulsió LRU. En una
+    # carpeta de només lectura l'entrada continua sent vàlida.
+    try:
+        os.utime(entry)
+    except OSError:
+        pass
+    return table.to_pandas()
+
+
+def write_cache(path, key, df, cache_dir=None):
+    """
+    Desa el dataset a la memòria cau en format Feather sense comprimir.
+
+    Abans d'escriure s'eliminen les entrades antigues del mateix fitxer
+    d'origen i, després, s'aplica el límit de mida de la carpeta.
+
+    Args:
+        path (str): Ruta del fitxer original.
+        key (str): Clau de contingut retornada per cache_key.
+        df (pd.DataFrame): Dataset amb els tipus de to_columnar_types.
+        cache_dir (str, opcional): Carpeta de la memòria cau.
+    Returns:
+        pd.DataFrame: El mateix dataset, s'hagi pogut desar o no.
+    """
+    feather = _feather()
+    if feather is None or key is None:
+        return df
+
+    import pyarrow  # pylint: disable=import-outside-toplevel
+
+    cache_dir = cache_dir or CACHE_DIR
+    entry = _entry_path(path, key, cache_dir)
+    tmp_entry = f"{entry}.tmp"
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        invalidate_cache(path, cache_dir)
+        # Sense compressió perquè la lectura pugui ser mapejada (zero-copy).
+        feather.write_feather(df, tmp_entry, compression='uncompressed')
+        os.replace(tmp_entry, entry)
+        enforce_size_limit(cache_dir)
+    except (OSError, TypeError, ValueError, pyarrow.ArrowException) as e:
+        print(f"Avís: no s'ha pogut desar la memòria cau ({e}).")
+        try:
+            os.remove(tmp_entry)
+        except OSError:
+            pass
+    return df
+
+
+def invalidate_cache(path=None, cache_dir=None):
+    """
+    Elimina entrades de la memòria cau.
+
+    Args:
+        path (str, opcional): Si s'indica, només s'eliminen les entrades
+            d'aquest fitxer d'origen. Si és None, es buida tota la carpeta.
+        cache_dir (str, opcional): Carpeta de la memòria cau.
+    Returns:
+        int: Nombre d'entrades eliminades.
+    """
+    cache_dir = cache_dir or CACHE_DIR
+    pattern = f"{_source_prefix(path)}-*.feather" if path else "*.feather"
+    removed = 0
+    for entry in glob.glob(os.path.join(cache_dir, pattern)):
+        try:
+            os.remove(entry)
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+def enforce_size_limit(cache_dir=None, max_bytes=None):
+    """
+    Aplica el límit de mida eliminant les entrades menys utilitzades.
+
+    Args:
+        cache_dir (str, opcional): Carpeta de la memòria cau.
+        max_bytes (int, opcional): Mida màxima en bytes. Per defecte MAX_CACHE_BYTES.
+    Returns:
+        int: Nombre d'entrades eliminades.
+    """
+    cache_dir = cache_dir or CACHE_DIR
+    max_bytes = MAX_CACHE_BYTES if max_bytes is None else max_bytes
+
+    entries = []
+    for entry in glob.glob(os.path.join(cache_dir, "*.feather")):
+        try:
+            stat = os.stat(entry)
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, entry))
+
+    # Ordenem de més recent a més antic i expulsem a partir del límit.
+    entries.sort(reverse=True)
+    total = 0
+    removed = 0
+    for _, size, entry in entries:
+        total += size
+        if total > max_bytes:
+            try:
+                os.remove(entry)
+                removed += 1
+            except OSError:
+                pass
+    return removed
@@ -3,15 +3,26 @@ Mòdul de càrrega dels datasets acadèmics.
 
 Aquest mòdul proporciona les eines per importar fitxers Excel de rendiment
 i abandonament universitari, incloent-hi un menú interactiu per a la
-selecció de fitxers.
+selecció de fitxers. Opcionalment, la càrrega pot passar per la memòria cau
+columnar del mòdul data_cache per evitar tornar a llegir l'Excel. Per a
+fitxers massa grans per a la memòria, iter_dataset_batches llegeix el full
+en lots de files, i load_datasets_parallel carrega diversos fitxers alhora.
+Quan un dataset està repartit en diversos llibres (per exemple, un per curs),
+load_dataset_groups accepta carpetes i patrons glob, llegeix tots els fitxers
+en un sol pool i concatena els de cada dataset.
 """
 
 import os
 import warnings
+from concurrent.futures import ProcessPoolExecutor
+from numbers import Number
 import pandas as pd
+from pandas.api.types import union_categoricals
+from src.data_cache import cache_key, read_cache, to_columnar_types, write_cache
+from src.dataset_files import expand_dataset_paths
 
 
-def load_dataset(path=None):
+def load_dataset(path=None, use_cache=False):
     """
     Carrega el dataset passat per paràmetre.
     Si no es proporciona cap ruta, es demana a l'usuari quin dataset carregar.
@@ -20,8 +31,11 @@ def load_dataset(path=None):
 
     Args:
         path (str, opcional): Ruta al dataset. Per defecte és None.
+        use_cache (bool, opcional): Si és True, es llegeix de la memòria cau
+            columnar quan el fitxer no ha canviat i s'hi desa en cas contrari.
     Returns:
-        pd.DataFrame: El dataset carregat en un DataFrame de pandas.
+        pd.DataFrame: El dataset carregat en un DataFrame de pandas, amb les
+        columnes de text de baixa cardinalitat com a categories.
     """
     # Ignorem els avisos de format de openpyxl
     warnings.filterwarnings("ignore", category=UserWarning, module="openpyxl")
@@ -47,7 +61,299 @@ def load_dataset(path=None):
         print(f"ERROR: No s'ha trobat l'arxiu a la ruta: {path}")
         raise FileNotFoundError(f"No s'ha trobat l'arxiu a la ruta: {path}")
 
+    key = cache_key(path) if use_cache else None
+    if key is not None:
+        df = read_cache(path, key)
+        if df is not None:
+            print(f"Carregant el dataset des de la memòria cau: {path}...")
+            return df
+
     print(f"Carregant el dataset: {path}...")
-    df = pd.read_excel(path)
+    df = to_columnar_types(pd.read_excel(path))
+
+    if key is not None:
+        df = write_cache(path, key, df)
 
     return df
+
+
+def _load_worker(path, use_cache):
+    """
+    Carrega un dataset dins d'un procés del pool.
+
+    Args:
+        path (str): Ruta al dataset.
+        use_cache (bool): Si s'ha d'utilitzar la memòria cau columnar.
+    Returns:
+        pd.DataFrame | Exception: El dataset, o l'excepció produïda en carregar-lo.
+    """
+    try:
+        return load_dataset(path, use_cache=use_cache)
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        return e
+
+
+def load_datasets_parallel(paths, use_cache=False, max_workers=None):
+    """
+    Carrega diversos datasets alhora en un pool de processos.
+
+    La lectura amb openpyxl és intensiva en CPU, per tant cada fitxer es
+    processa en un procés diferent i el temps total s'apropa al del fitxer
+    més lent. Els errors no aturen la resta de càrregues: es retornen a la
+    posició corresponent perquè es puguin informar fitxer per fitxer.
+
+    Args:
+        paths (list): Rutes dels datasets a carregar.
+        use_cache (bool, opcional): Si s'ha d'utilitzar la memòria cau columnar.
+        max_workers (int, opcional): Nombre màxim de processos. Per defecte,
+            un per fitxer sense superar el nombre de CPUs.
+    Returns:
+        list: Per a cada ruta, en el mateix ordre, el pd.DataFrame carregat o
+        l'excepció que s'ha produït.
+    """
+    paths = list(paths)
+    if max_workers is None:
+        max_workers = min(len(paths), os.cpu_count() or 1)
+
+    # Amb un sol fitxer o un sol procés no val la pena crear el pool.
+    if len(paths) <= 1 or max_workers <= 1:
+        return [_load_worker(path, use_cache) for path in paths]
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(_load_worker, paths, [use_cache] * len(paths)))
+
+
+def check_schema(frames, paths):
+    """
+    Comprova que tots els fitxers d'un dataset tenen les mateixes columnes.
+
+    Args:
+        frames (list): DataFrames carregats.
+        paths (list): Ruta de cada DataFrame, per als missatges d'error.
+    Raises:
+        ValueError: Si algun fitxer té columnes diferents del primer.
+    """
+    expected = set(frames[0].columns)
+    for frame, path in zip(frames[1:], paths[1:]):
+        columns = set(frame.columns)
+        if columns != expected:
+            raise ValueError(
+                f"El fitxer {path} no té les mateixes columnes que {paths[0]}: "
+                f"falten {sorted(expected - columns)}, sobren {sorted(columns - expected)}"
+            )
+
+
+def concat_datasets(frames):
+    """
+    Concatena els fitxers d'un mateix dataset en un sol DataFrame tipat.
+
+    Un sol fitxer es retorna sense copiar-lo. Les columnes que són categòriques
+    a tots els fitxers (per exemple, les llegides de la memòria cau) es
+    recodifiquen a un vocabulari comú abans de concatenar, de manera que es
+    concatenen els codis i el resultat continua sent categòric.
+
+    Args:
+        frames (list): DataFrames amb les mateixes columnes.
+    Returns:
+        pd.DataFrame: Tots els fitxers en ordre, amb un índex nou.
+    """
+    if len(frames) == 1:
+        return frames[0]
+
+    columns = list(frames[0].columns)
+    categories = {
+        col: union_categoricals(
+            [frame[col].array for frame in frames], sort_categories=True
+        ).categories
+        for col in columns
+        if all(isinstance(frame[col].dtype, pd.CategoricalDtype) for frame in frames)
+    }
+    # Cada fitxer es reconstrueix amb les columnes en el mateix ordre i sense
+    # copiar-les; només es recodifiquen les categòriques.
+    aligned = [
+        pd.DataFrame({
+            col: frame[col].cat.set_categories(categories[col]) if col in categories
+            else frame[col]
+            for col in columns
+        }, index=frame.index, copy=False)
+        for frame in frames
+    ]
+    return pd.concat(aligned, ignore_index=True, copy=False)
+
+
+def load_dataset_groups(paths, use_cache=False, max_workers=None):
+    """
+    Carrega diversos datasets, cadascun format per un o més fitxers.
+
+    Els fitxers de tots els datasets es llegeixen alhora en un sol pool de
+    processos (vegeu load_datasets_parallel), de manera que vint fitxers
+    anuals triguen aproximadament el que triga el més gran. Després es
+    comprova l'esquema i es concatenen els fitxers de cada dataset.
+
+    Args:
+        paths (list): Per a cada dataset, un fitxer, una carpeta o un patró glob.
+        use_cache (bool, opcional): Si s'ha d'utilitzar la memòria cau columnar.
+        max_workers (int, opcional): Nombre màxim de processos.
+    Returns:
+        list: Per a cada dataset, en el mateix ordre, el pd.DataFrame
+        concatenat o l'excepció que s'ha produït (la primera, si n'hi ha diverses).
+    """
+    expanded = []
+    for path in paths:
+        try:
+            expanded.append(expand_dataset_paths(path))
+        except FileNotFoundError as e:
+            expanded.append(e)
+
+    files = [file for group in expanded if isinstance(group, list) for file in group]
+    loaded = iter(load_datasets_parallel(files, use_cache=use_cache, max_workers=max_workers))
+
+    results = []
+    for group in expanded:
+        if isinstance(group, Exception):
+            results.append(group)
+            continue
+        frames = [next(loaded) for _ in group]
+        errors = [frame for frame in frames if isinstance(frame, Exception)]
+        if errors:
+            results.append(errors[0])
+            continue
+        try:
+            check_schema(frames, group)
+            results.append(concat_datasets(frames))
+        except ValueError as e:
+            results.append(e)
+    return results
+
+
+def iter_dataset_files_batches(path, batch_size=5000):
+    """
+    Llegeix en lots tots els fitxers d'un dataset, un rere l'altre.
+
+    Args:
+        path (str): Fitxer, carpeta o patró glob.
+        batch_size (int, opcional): Nombre de files per lot.
+    Yields:
+        pd.DataFrame: Lots consecutius de tots els fitxers.
+    """
+    for file in expand_dataset_paths(path):
+        yield from iter_dataset_batches(file, batch_size)
+
+
+def _is_number(value):
+    """
+    Indica si un valor d'una cel·la és numèric (els booleans no ho són).
+
+    Args:
+        value: Valor llegit per openpyxl.
+    Returns:
+        bool: True si és un número.
+    """
+    return isinstance(value, Number) and not isinstance(value, bool)
+
+
+def _numeric_columns(header, rows):
+    """
+    Detecta les columnes numèriques a partir del primer lot de files.
+
+    Args:
+        header (list): Noms de les columnes.
+        rows (list): Files del primer lot (tuples de valors).
+    Returns:
+        list: Noms de les columnes on tots els valors no buits són numèrics.
+    """
+    numeric = []
+    for i, col in enumerate(header):
+        values = [row[i] for row in rows if row[i] is not None]
+        if values and all(_is_number(v) for v in values):
+            numeric.append(col)
+    return numeric
+
+
+def _rows_to_batch(path, header, rows, row_numbers, numeric_cols):
+    """
+    Construeix un DataFrame tipat a partir d'un lot de files.
+
+    Args:
+        path (str): Fitxer d'origen, per als missatges d'error.
+        header (list): Noms de les columnes.
+        rows (list): Files del lot.
+        row_numbers (list): Número de fila a l'Excel de cada fila del lot.
+        numeric_cols (list): Columnes que s'han de convertir a float64.
+    Returns:
+        pd.DataFrame: Lot amb els mateixos tipus que la resta de lots.
+    Raises:
+        ValueError: Si una columna numèrica conté text en aquest lot. Convertir-lo
+            en NaN faria que el resultat per lots no coincidís amb la lectura completa.
+    """
+    for col in numeric_cols:
+        i = header.index(col)
+        for row, number in zip(rows, row_numbers):
+            if row[i] is not None and not _is_number(row[i]):
+                raise ValueError(
+                    f"{path}: la columna '{col}' és numèrica a les primeres files, però la "
+                    f"fila {number} conté {row[i]!r}. Corregiu el fitxer o llegiu-lo sencer "
+                    f"(sense --chunk-size)."
+                )
+
+    batch = pd.DataFrame.from_records(rows, columns=header)
+    for col in numeric_cols:
+        batch[col] = batch[col].astype('float64')
+    return batch
+
+
+def iter_dataset_batches(path, batch_size=5000):
+    """
+    Llegeix el primer full d'un fitxer Excel en lots de files.
+
+    Utilitza el mode de només lectura d'openpyxl, que no construeix el
+    llibre sencer en memòria, de manera que el consum màxim depèn de la
+    mida del lot i no de la mida del fitxer. Les columnes numèriques es
+    detecten al primer lot i es mantenen com a float64 a tots els lots; si
+    un lot posterior hi té text, es llança un error en lloc de perdre el valor.
+
+    Args:
+        path (str): Ruta al fitxer Excel.
+        batch_size (int, opcional): Nombre de files per lot. Per defecte 5000.
+    Yields:
+        pd.DataFrame: Lots consecutius del dataset amb els mateixos tipus.
+    Raises:
+        ValueError: Si una columna numèrica del primer lot conté text en un lot posterior.
+    """
+    # Importació diferida: openpyxl només es necessita en la lectura per lots.
+    from openpyxl import load_workbook  # pylint: disable=import-outside-toplevel
+
+    if batch_size < 1:
+        raise ValueError("La mida del lot ha de ser com a mínim 1.")
+
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No s'ha trobat l'arxiu a la ruta: {path}")
+
+    warnings.filterwarnings("ignore", category=UserWarning, module="openpyxl")
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows_iter = workbook.worksheets[0].iter_rows(values_only=True)
+        header = list(next(rows_iter, ()))
+        numeric_cols = None
+        rows, row_numbers = [], []
+
+        # La capçalera és la fila 1 de l'Excel.
+        for number, row in enumerate(rows_iter, start=2):
+            # Ignorem les files completament buides.
+            if all(value is None for value in row):
+                continue
+            rows.append(row)
+            row_numbers.append(number)
+            if len(rows) == batch_size:
+                if numeric_cols is None:
+                    numeric_cols = _numeric_columns(header, rows)
+                yield _rows_to_batch(path, header, rows, row_numbers, numeric_cols)
+                rows, row_numbers = [], []
+
+        if rows:
+            if numeric_cols is None:
+                numeric_cols = _numeric_columns(header, rows)
+            yield _rows_to_batch(path, header, rows, row_numbers, numeric_cols)
+    finally:
+        workbook.close()
@@ -3,24 +3,147 @@ Mòdul de neteja de les dades i filtrat.
 
 Aquest mòdul conté les funcions per netejar, homogeneïtzar columnes i
 agregar dades de rendiment i abandonament universitari. Inclou la
-lògica per fusionar ambdós datasets mitjançant una operació de fusió.
+lògica per fusionar ambdós datasets mitjançant una operació de fusió, i una
+variant de l'agregació que consumeix el dataset en lots.
+
+La neteja selecciona i reanomena les columnes sense copiar-ne les dades, i
+després converteix les columnes de la clau a 'category' amb un vocabulari
+comú als dos datasets i redueix les mètriques a float32 quan no es perd
+precisió.
+
+L'agrupació i la fusió no comparen directament les set columnes de text de
+la clau: cada combinació es codifica abans en un únic enter de 64 bits amb
+un vocabulari compartit, i les etiquetes originals només es recuperen a la
+sortida.
 """
 
+import numpy as np
 import pandas as pd
 
+# Columnes que identifiquen un grup en l'agregació i la fusió.
+GROUP_COLS = [
+    'Curs Acadèmic', 'Tipus universitat', 'Sigles',
+    'Tipus Estudi', 'Branca', 'Sexe', 'Integrat S/N'
+]
+
+# Mètriques que es poden reduir a float32 si el valor no canvia.
+RATE_COLS = ['Taxa rendiment', '% Abandonament a primer curs']
+
+# Rang màxim d'una clau empaquetada abans de tornar-la a compactar.
+_MAX_KEY_SPAN = 2 ** 62
 
-def clean_and_homogenize(df_perf, df_aband):
+
+def sorted_vocabulary(values):
     """
-    Reanomenem les columnes del dataset taxa_abandonament.xlsx perquè coincideixi
-    amb el dataset rendiment_estudiants.xlsx.
-    També eliminem les columnes mencionades a l'enunciat.
+    Construeix el vocabulari ordenat dels valors no nuls d'una columna.
+
+    Si la columna barreja tipus que no es poden comparar (per exemple, un
+    codi numèric entre sigles de text), s'ordena com groupby: els números
+    primer i després el text.
 
     Args:
-        df_perf (pd.DataFrame): Dataset de rendiment acadèmic.
-        df_aband (pd.DataFrame): Dataset d'abandonament acadèmic.
+        values (array-like): Valors, sense nuls.
     Returns:
-        pd.DataFrame: Dataset de rendiment acadèmic netejat i transformat.
-        pd.DataFrame: Dataset d'abandonament acadèmic amb les columnes renombrades.
+        pd.Index: Valors únics ordenats (dtype object).
+    """
+    values = np.asarray(values, dtype=object)
+    try:
+        return pd.Index(values, dtype=object).unique().sort_values()
+    except TypeError:
+        return pd.Index(pd.factorize(values, sort=True)[1], dtype=object)
+
+
+def encode_group_keys(*frames, cols=None):
+    """
+    Codifica la clau composta de diversos datasets en un enter int64.
+
+    Cada columna de la clau es converteix a codis enters amb un vocabulari
+    ordenat i compartit per tots els datasets (el codi 0 es reserva per als
+    valors nuls), i els codis es combinen en base mixta. Com que el
+    vocabulari està ordenat, l'ordre de les claus és el mateix que l'ordre
+    lexicogràfic de les etiquetes. Si el rang de la clau s'apropa al límit
+    d'int64, es compacta amb una factorització ordenada i es continua.
+
+    Args:
+        *frames (pd.DataFrame): Datasets que han de compartir la codificació.
+        cols (list, opcional): Columnes de la clau. Per defecte GROUP_COLS.
+    Returns:
+        list: Un array int64 de claus per a cada dataset, en el mateix ordre.
+    """
+    cols = GROUP_COLS if cols is None else cols
+    keys = [np.zeros(len(frame), dtype=np.int64) for frame in frames]
+    span = 1
+
+    for col in cols:
+        # Una sola passada de hash per columna; el vocabulari comú es
+        # construeix només a partir dels valors únics de cada dataset.
+        factorized = [pd.factorize(frame[col]) for frame in frames]
+        vocab = sorted_vocabulary(
+            np.concatenate([np.asarray(uniques, dtype=object) for _, uniques in factorized])
+        )
+        cardinality = len(vocab) + 1
+
+        if span * cardinality > _MAX_KEY_SPAN:
+            # Compactem les claus parcials a codis densos mantenint l'ordre.
+            dense, uniques_keys = pd.factorize(np.concatenate(keys), sort=True)
+            keys = np.split(dense.astype(np.int64), np.cumsum([len(k) for k in keys])[:-1])
+            span = len(uniques_keys)
+
+        for i, (codes, uniques) in enumerate(factorized):
+            # El codi -1 de factorize (nul) passa a 0 i la resta a 1..n.
+            mapping = np.append(vocab.get_indexer(np.asarray(uniques, dtype=object)) + 1, 0)
+            keys[i] = keys[i] * cardinality + mapping[codes]
+        span *= cardinality
+
+    return keys
+
+
+def _select_columns(df, drop, rename=None):
+    """
+    Elimina i reanomena columnes sense copiar les dades.
+
+    A diferència de drop i rename, que retornen una còpia cadascun, el nou
+    DataFrame es construeix amb les mateixes columnes que l'original.
+
+    Args:
+        df (pd.DataFrame): Dataset original.
+        drop (list): Columnes a eliminar (les que no hi són s'ignoren).
+        rename (dict, opcional): Noms nous de les columnes.
+    Returns:
+        pd.DataFrame: Dataset que comparteix les dades de les columnes amb l'original.
+    """
+    rename = rename or {}
+    columns = {
+        rename.get(col, col): df[col]
+        for col in df.columns
+        if col not in drop and rename.get(col, col) not in drop
+    }
+    return pd.DataFrame(columns, index=df.index, copy=False)
+
+
+def clean_performance(df_perf):
+    """
+    Elimina les columnes del dataset de rendiment que no s'utilitzen.
+
+    Args:
+        df_perf (pd.DataFrame): Dataset (o lot) de rendiment acadèmic.
+    Returns:
+        pd.DataFrame: Dataset de rendiment sense les columnes descartades.
+    """
+    return _select_columns(df_perf, [
+        'Universitat', 'Unitat',
+        'Crèdits ordinaris superats', 'Crèdits ordinaris matriculats'
+    ])
+
+
+def clean_abandonment(df_aband):
+    """
+    Reanomena i elimina les columnes del dataset d'abandonament.
+
+    Args:
+        df_aband (pd.DataFrame): Dataset (o lot) d'abandonament acadèmic.
+    Returns:
+        pd.DataFrame: Dataset d'abandonament amb els noms homogeneïtzats.
     """
     # Renombrament de columnes del dataframe taxa_abandonament.
     rename_map = {
@@ -29,23 +152,133 @@ def clean_and_homogenize(df_perf, df_aband):
         'Sexe Alumne': 'Sexe',
         'Tipus de centre': 'Integrat S/N'
     }
-    df_aband = df_aband.rename(columns=rename_map)
+    return _select_columns(df_aband, ['Universitat', 'Unitat'], rename_map)
 
-    # Eliminar les columnes al dataframe de rendiment acadèmic.
-    df_perf = df_perf.drop(columns=[
-        'Universitat', 'Unitat',
-        'Crèdits ordinaris superats', 'Crèdits ordinaris matriculats'
-    ], errors='ignore')
 
-    # Eliminar les columnes al dataframe d'abandonament acadèmic.
-    df_aband = df_aband.drop(columns=[
-        'Universitat', 'Unitat'
-    ], errors='ignore')
+def shared_categories(frames, col):
+    """
+    Construeix el vocabulari ordenat d'una columna comú a diversos datasets.
 
-    return df_perf, df_aband
+    Args:
+        frames (list): Datasets que contenen la columna.
+        col (str): Columna categòrica.
+    Returns:
+        pd.Index: Valors no nuls de la columna en tots els datasets, ordenats
+        (vegeu sorted_vocabulary).
+    """
+    uniques = [np.asarray(frame[col].dropna().unique(), dtype=object) for frame in frames]
+    return sorted_vocabulary(np.concatenate(uniques))
 
 
-def aggregate_by_branch(df, metric_col):
+def downcast_rate(series):
+    """
+    Redueix una mètrica a float32 si cap valor no canvia en fer-ho.
+
+    Args:
+        series (pd.Series): Columna numèrica.
+    Returns:
+        pd.Series: La columna en float32, o l'original si es perdria precisió.
+    """
+    if series.dtype != np.float64:
+        return series
+    values = series.to_numpy()
+    narrow = values.astype(np.float32)
+    if not np.array_equal(narrow.astype(np.float64), values, equal_nan=True):
+        return series
+    return pd.Series(narrow, index=series.index, name=series.name)
+
+
+def shared_dtypes(*frames, cols=None):
+    """
+    Calcula el tipus categòric comú de cada columna de la clau.
+
+    Args:
+        *frames (pd.DataFrame): Datasets netejats.
+        cols (list, opcional): Columnes categòriques. Per defecte GROUP_COLS.
+    Returns:
+        dict: Columna -> pd.CategoricalDtype amb el vocabulari de tots els datasets.
+    """
+    dtypes = {}
+    for col in GROUP_COLS if cols is None else cols:
+        having = [frame for frame in frames if col in frame.columns]
+        if having:
+            dtypes[col] = pd.CategoricalDtype(shared_categories(having, col))
+    return dtypes
+
+
+def optimize_dtypes(*frames, cols=None):
+    """
+    Redueix la memòria dels datasets netejats modificant-los in situ.
+
+    Les columnes de la clau passen a 'category' amb un vocabulari ordenat i
+    comú a tots els datasets, de manera que un mateix valor té el mateix codi
+    a tots ells. Les mètriques de RATE_COLS passen a float32 si no es perd
+    precisió.
+
+    Args:
+        *frames (pd.DataFrame): Datasets netejats.
+        cols (list, opcional): Columnes categòriques. Per defecte GROUP_COLS.
+    Returns:
+        tuple: Els mateixos datasets, en el mateix ordre.
+    """
+    for col, dtype in shared_dtypes(*frames, cols=cols).items():
+        for frame in frames:
+            if col in frame.columns:
+                frame[col] = frame[col].astype(dtype)
+
+    for frame in frames:
+        for col in RATE_COLS:
+            if col in frame.columns:
+                narrow = downcast_rate(frame[col])
+                # Tornar a assignar la mateixa columna en faria una còpia.
+                if narrow.dtype != frame[col].dtype:
+                    frame[col] = narrow
+    return frames
+
+
+def frame_memory(df):
+    """
+    Calcula la memòria que ocupa un dataset, incloent-hi el text.
+
+    Args:
+        df (pd.DataFrame): Dataset.
+    Returns:
+        int: Bytes ocupats.
+    """
+    return int(df.memory_usage(deep=True).sum())
+
+
+def clean_and_homogenize(df_perf, df_aband, optimize=True, verbose=False):
+    """
+    Reanomenem les columnes del dataset taxa_abandonament.xlsx perquè coincideixi
+    amb el dataset rendiment_estudiants.xlsx.
+    També eliminem les columnes mencionades a l'enunciat.
+
+    Args:
+        df_perf (pd.DataFrame): Dataset de rendiment acadèmic.
+        df_aband (pd.DataFrame): Dataset d'abandonament acadèmic.
+        optimize (bool, opcional): Si s'han de reduir els tipus de dades amb
+            optimize_dtypes. Per defecte True.
+        verbose (bool, opcional): Si s'ha de mostrar la memòria estalviada per dataset.
+    Returns:
+        pd.DataFrame: Dataset de rendiment acadèmic netejat i transformat.
+        pd.DataFrame: Dataset d'abandonament acadèmic amb les columnes renombrades.
+    """
+    df_perf_clean, df_aband_clean = clean_performance(df_perf), clean_abandonment(df_aband)
+    if optimize:
+        optimize_dtypes(df_perf_clean, df_aband_clean)
+
+    if verbose:
+        for name, raw, clean in (('rendiment', df_perf, df_perf_clean),
+                                 ('abandonament', df_aband, df_aband_clean)):
+            before, after = frame_memory(raw), frame_memory(clean)
+            print(f"   -> Memòria {name}: {before / 1e6:.2f} MB -> {after / 1e6:.2f} MB "
+                  f"(estalvi del {100 * (1 - after / max(before, 1)):.0f}%)")
+
+    return df_perf_clean, df_aband_clean
+
+
+def aggregate_by_branch(df, metric_col, engine='pandas'):
     """
     Agrupem totes les files per les característiques demanades i
     calculem la mitjana de la mètrica en ambdós datasets.
@@ -53,24 +286,62 @@ def aggregate_by_branch(df, metric_col):
     Args:
         df (pd.DataFrame): Dataset de rendiment acadèmic o d'abandonament.
         metric_col (string): Columna amb el rendiment o abandonament mitjà.
+        engine (str, opcional): Motor de càlcul ('pandas', 'polars' o 'duckdb').
+            Vegeu el mòdul engines.
     Returns:
         pd.DataFrame: Dataset de rendiment mitjà en cas del dataset de rendiment i amb taxa mitjana
         d'abandonament en cas del dataset d'abandonament.
     """
+    if engine != 'pandas':
+        from src.engines import engine_aggregate  # pylint: disable=import-outside-toplevel
+
+        return engine_aggregate(df, metric_col, engine)
 
-    group_cols = [
-        'Curs Acadèmic', 'Tipus universitat', 'Sigles',
-        'Tipus Estudi', 'Branca', 'Sexe', 'Integrat S/N'
-    ]
+    # Agrupem per la clau codificada en un sol enter.
+    (keys,) = encode_group_keys(df)
+    # La mitjana es calcula i es retorna en float64 encara que la mètrica sigui float32.
+    means = df[metric_col].astype(np.float64).groupby(keys, sort=True).mean()
 
-    # Generem la nova columna amb el rendiment o abandonament mitjà i
-    # resetejem l'índex per obtenir el dataframe.
-    df_grouped = df.groupby(group_cols)[metric_col].mean().reset_index()
+    # Recuperem les etiquetes de cada grup a partir de la primera fila on apareix.
+    _, first_rows = np.unique(keys, return_index=True)
+    df_grouped = df.iloc[first_rows][GROUP_COLS].reset_index(drop=True)
+    df_grouped[metric_col] = means.to_numpy()
+
+    # Com groupby, descartem els grups amb algun valor nul a la clau.
+    if df_grouped[GROUP_COLS].isna().any(axis=None):
+        df_grouped = df_grouped.dropna(subset=GROUP_COLS).reset_index(drop=True)
 
     return df_grouped
 
 
-def merge_datasets(df_perf, df_aband):
+def aggregate_by_branch_batches(batches, metric_col):
+    """
+    Variant d'aggregate_by_branch que consumeix el dataset en lots.
+
+    Per a cada lot només es calcula la suma i el recompte de la mètrica per
+    grup, i s'acumulen amb els dels lots anteriors. La memòria necessària
+    depèn del nombre de grups i no del nombre de files del dataset.
+
+    Args:
+        batches (iterable): Lots (pd.DataFrame) ja netejats del dataset.
+        metric_col (string): Columna amb el rendiment o abandonament.
+    Returns:
+        pd.DataFrame: El mateix resultat que aggregate_by_branch sobre el dataset sencer.
+    """
+    totals = None
+    for batch in batches:
+        partial = batch.groupby(GROUP_COLS, observed=True)[metric_col].agg(['sum', 'count'])
+        totals = partial if totals is None else totals.add(partial, fill_value=0)
+
+    if totals is None:
+        return pd.DataFrame(columns=GROUP_COLS + [metric_col])
+
+    # La mitjana final és la suma acumulada entre el recompte de valors no nuls.
+    means = totals['sum'] / totals['count']
+    return means.rename(metric_col).sort_index().reset_index()
+
+
+def merge_datasets(df_perf, df_aband, engine='pandas'):
     """
     Fusionem ambdós datasets en un. El dataset resultant només contindrà les files
     coincidents en ambdós datasets.
@@ -78,14 +349,21 @@ def merge_datasets(df_perf, df_aband):
     Args:
         df_perf (pd.DataFrame): Dataset de rendiment acadèmic.
         df_aband (pd.DataFrame): Dataset d'abandonament.
+        engine (str, opcional): Motor de càlcul ('pandas', 'polars' o 'duckdb').
+            Vegeu el mòdul engines.
     Returns:
         pd.DataFrame: Dataset final resultat de la fusió d'ambdós datasets.
     """
-    join_cols = [
-        'Curs Acadèmic', 'Tipus universitat', 'Sigles',
-        'Tipus Estudi', 'Branca', 'Sexe', 'Integrat S/N'
-    ]
+    if engine != 'pandas':
+        from src.engines import engine_merge  # pylint: disable=import-outside-toplevel
+
+        return engine_merge(df_perf, df_aband, engine)
 
-    df_final = pd.merge(df_perf, df_aband, on=join_cols, how='inner')
+    # Fusionem per la clau codificada amb un vocabulari comú als dos datasets.
+    keys_perf, keys_aband = encode_group_keys(df_perf, df_aband)
+    df_final = pd.merge(
+        df_perf, df_aband.drop(columns=GROUP_COLS),
+        left_on=keys_perf, right_on=keys_aband, how='inner'
+    ).drop(columns='key_0')
 
     return df_final
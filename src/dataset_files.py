@@ -0,0 +1,250 @@
+"""
+Mòdul de localització i identificació dels fitxers de dades.
+
+Expandeix carpetes i patrons glob a llistes de fitxers, i identifica cada
+llibre Excel (rendiment o abandonament) només a partir de la fila de
+capçalera i de l'etiqueta de dimensions del primer full. Un fitxer .xlsx és
+un arxiu ZIP d'XML: es llegeix directament amb la biblioteca estàndard,
+sense importar pandas ni openpyxl i sense recórrer les files de dades, de
+manera que un fitxer equivocat o mal format es rebutja en mil·lisegons,
+abans de la lectura completa.
+"""
+
+import glob
+import os
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+
+# Extensió dels llibres que es llegeixen d'una carpeta.
+DATASET_EXTENSION = ".xlsx"
+
+# Columnes que ha de tenir cada tipus de fitxer, amb els noms originals.
+DATASET_SCHEMAS = {
+    'rendiment': [
+        'Curs Acadèmic', 'Tipus universitat', 'Sigles', 'Tipus Estudi',
+        'Branca', 'Sexe', 'Integrat S/N', 'Taxa rendiment'
+    ],
+    'abandonament': [
+        'Curs Acadèmic', 'Naturalesa universitat responsable', 'Sigles', 'Tipus Estudi',
+        'Branca', 'Sexe Alumne', 'Tipus de centre', '% Abandonament a primer curs'
+    ],
+}
+
+# Columna de mètrica que identifica cada tipus de fitxer.
+METRIC_COLUMNS = {
+    'rendiment': 'Taxa rendiment',
+    'abandonament': '% Abandonament a primer curs',
+}
+
+_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_PKG_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+
+def is_multi_file(path):
+    """
+    Indica si una ruta designa diversos fitxers (carpeta o patró glob).
+
+    Un fitxer que existeix no és mai un patró, encara que el nom contingui
+    caràcters de glob (ex: 'rendiment [2023].xlsx').
+
+    Args:
+        path (str): Ruta, carpeta o patró.
+    Returns:
+        bool: True si és una carpeta, o si no és un fitxer existent i conté
+        caràcters de glob.
+    """
+    if os.path.isfile(path):
+        return False
+    return os.path.isdir(path) or any(char in path for char in "*?[")
+
+
+def expand_dataset_paths(path):
+    """
+    Llista els fitxers d'un dataset donat com a fitxer, carpeta o patró glob.
+
+    D'una carpeta es prenen els fitxers DATASET_EXTENSION del primer nivell,
+    sense els fitxers temporals de bloqueig d'Excel ('~$...').
+
+    Args:
+        path (str): Fitxer, carpeta o patró glob (ex: 'data/rendiment_*.xlsx').
+    Returns:
+        list: Rutes dels fitxers, ordenades.
+    Raises:
+        FileNotFoundError: Si la carpeta o el patró no contenen cap fitxer.
+    """
+    if not is_multi_file(path):
+        return [path]
+
+    pattern = os.path.join(path, "*" + DATASET_EXTENSION) if os.path.isdir(path) else path
+    paths = sorted(
+        match for match in glob.glob(pattern, recursive=True)
+        if os.path.isfile(match) and not os.path.basename(match).startswith("~$")
+    )
+    if not paths:
+        raise FileNotFoundError(f"No s'ha trobat cap fitxer a: {path}")
+    return paths
+
+
+def _column_index(reference):
+    """
+    Converteix la referència d'una cel·la ('C1') en l'índex de columna (2).
+
+    Args:
+        reference (str): Referència de la cel·la.
+    Returns:
+        int: Índex de la columna, començant per 0.
+    """
+    index = 0
+    for char in re.match(r"[A-Z]+", reference).group():
+        index = index * 26 + ord(char) - ord('A') + 1
+    return index - 1
+
+
+def _first_sheet_path(archive):
+    """
+    Troba la ruta dins l'arxiu del primer full del llibre.
+
+    Args:
+        archive (zipfile.ZipFile): Llibre obert.
+    Returns:
+        str: Ruta de l'XML del full (ex: 'xl/worksheets/sheet1.xml').
+    """
+    workbook = ET.fromstring(archive.read("xl/workbook.xml"))
+    rel_id = workbook.find(f"{_NS}sheets/{_NS}sheet").get(f"{_REL_NS}id")
+    rels = ET.fromstring(archive.read("xl/_rels/workbook.xml.rels"))
+    target = next(rel.get("Target") for rel in rels.iter(f"{_PKG_NS}Relationship")
+                  if rel.get("Id") == rel_id)
+    return target.lstrip("/") if target.startswith("/") else "xl/" + target
+
+
+def _shared_strings(archive, indices):
+    """
+    Llegeix només les cadenes compartides necessàries.
+
+    Les cadenes de la capçalera solen ser les primeres de la taula, per tant
+    la lectura s'atura en arribar a l'índex més alt demanat.
+
+    Args:
+        archive (zipfile.ZipFile): Llibre obert.
+        indices (set): Índexs de les cadenes que es necessiten.
+    Returns:
+        dict: Índex -> text.
+    """
+    strings = {}
+    if not indices or "xl/sharedStrings.xml" not in archive.namelist():
+        return strings
+    last = max(indices)
+    with archive.open("xl/sharedStrings.xml") as stream:
+        position = 0
+        for _, element in ET.iterparse(stream):
+            if element.tag != f"{_NS}si":
+                continue
+            if position in indices:
+                # El text pot estar repartit en diversos fragments amb format.
+                strings[position] = "".join(
+                    node.text or "" for node in element.iter(f"{_NS}t")
+                )
+            element.clear()
+            if position >= last:
+                break
+            position += 1
+    return strings
+
+
+def read_header(path):
+    """
+    Llegeix la fila de capçalera i el nombre de files del primer full.
+
+    Args:
+        path (str): Ruta al fitxer Excel (.xlsx).
+    Returns:
+        list: Noms de les columnes (None per a les cel·les buides).
+        int | None: Nombre de files de dades segons l'etiqueta de dimensions,
+        o None si el fitxer no en té.
+    Raises:
+        FileNotFoundError: Si el fitxer no existeix.
+        ValueError: Si el fitxer no és un llibre .xlsx vàlid.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No s'ha trobat l'arxiu a la ruta: {path}")
+
+    try:
+        with zipfile.ZipFile(path) as archive:
+            n_rows, cells = None, {}
+            with archive.open(_first_sheet_path(archive)) as stream:
+                for event, element in ET.iterparse(stream, events=("start", "end")):
+                    if event == "start" and element.tag == f"{_NS}dimension":
+                        last_cell = element.get("ref", "").split(":")[-1]
+                        match = re.search(r"\d+$", last_cell)
+                        n_rows = int(match.group()) - 1 if match else None
+                    elif event == "end" and element.tag == f"{_NS}row":
+                        for cell in element.iter(f"{_NS}c"):
+                            cells[_column_index(cell.get("r"))] = cell
+                        # Només es llegeix la primera fila.
+                        break
+
+            shared = _shared_strings(archive, {
+                int(cell.findtext(f"{_NS}v")) for cell in cells.values() if cell.get("t") == "s"
+            })
+            header = [None] * (max(cells) + 1 if cells else 0)
+            for index, cell in cells.items():
+                if cell.get("t") == "s":
+                    header[index] = shared.get(int(cell.findtext(f"{_NS}v")))
+                elif cell.get("t") == "inlineStr":
+                    header[index] = "".join(node.text or "" for node in cell.iter(f"{_NS}t"))
+                else:
+                    header[index] = cell.findtext(f"{_NS}v")
+    except (zipfile.BadZipFile, KeyError, StopIteration, AttributeError, ET.ParseError) as e:
+        raise ValueError(f"No s'ha pogut llegir la capçalera de {path}: no és un "
+                         f"llibre Excel (.xlsx) vàlid ({type(e).__name__})") from e
+    return header, n_rows
+
+
+def sniff_dataset(path):
+    """
+    Identifica el tipus d'un fitxer de dades i en valida les columnes.
+
+    Args:
+        path (str): Ruta al fitxer Excel (.xlsx).
+    Returns:
+        dict: 'ruta', 'tipo' ('rendiment' o 'abandonament'), 'columnas' i
+        'filas' (nombre de files de dades, o None si no se sap).
+    Raises:
+        FileNotFoundError: Si el fitxer no existeix.
+        ValueError: Si no es pot llegir, no es pot identificar o hi falten columnes.
+    """
+    header, n_rows = read_header(path)
+    kinds = [kind for kind, metric in METRIC_COLUMNS.items() if metric in header]
+    if len(kinds) != 1:
+        raise ValueError(
+            f"No es pot identificar el fitxer {path}: ha de tenir exactament una de les "
+            f"columnes {list(METRIC_COLUMNS.values())}"
+        )
+
+    missing = [col for col in DATASET_SCHEMAS[kinds[0]] if col not in header]
+    if missing:
+        raise ValueError(f"Al fitxer de {kinds[0]} {path} hi falten les columnes {missing}")
+    return {"ruta": path, "tipo": kinds[0], "columnas": header, "filas": n_rows}
+
+
+def sniff_dataset_files(path):
+    """
+    Identifica el tipus de tots els fitxers d'un fitxer, carpeta o patró glob.
+
+    Args:
+        path (str): Fitxer, carpeta o patró glob.
+    Returns:
+        str: Tipus comú de tots els fitxers ('rendiment' o 'abandonament').
+    Raises:
+        FileNotFoundError: Si no hi ha cap fitxer o algun no existeix.
+        ValueError: Si algun fitxer no és vàlid o hi ha fitxers de tipus diferents.
+    """
+    kinds = {}
+    for file in expand_dataset_paths(path):
+        kinds.setdefault(sniff_dataset(file)["tipo"], []).append(file)
+    if len(kinds) > 1:
+        raise ValueError(f"{path} barreja fitxers de tipus diferents: "
+                         + ", ".join(f"{kind} ({files[0]}...)" for kind, files in kinds.items()))
+    return next(iter(kinds))
@@ -0,0 +1,314 @@
+"""
+Mòdul de motors de càlcul alternatius per a l'agregació i la fusió.
+
+L'agregació per branca i la fusió de l'exercici 2 es poden executar amb:
+
+- 'pandas' (per defecte): la implementació de data_processing.
+- 'polars': taules columnars de Polars, amb l'agrupació i la unió
+  repartides entre tots els nuclis.
+- 'duckdb': consultes SQL sobre una base de dades DuckDB en memòria, que
+  llegeix els DataFrames de pandas directament i també usa tots els nuclis.
+
+Polars i DuckDB són opcionals i s'importen només quan es demanen. Els motors
+no reben les etiquetes de la clau sinó la clau codificada en un enter amb
+encode_group_keys, igual que pandas, i la posició de les files: agrupen i
+uneixen sobre enters, i el resultat es construeix amb les files originals.
+Així tots els motors retornen el mateix DataFrame de pandas, amb les mateixes
+columnes, les files en el mateix ordre (els grups ordenats per la clau i la
+fusió en l'ordre del dataset de l'esquerra) i els valors i tipus originals,
+encara que la clau barregi tipus (ex: un codi numèric entre sigles de text).
+
+La neteja (clean_and_homogenize) és comuna a tots els motors: només
+selecciona columnes sense copiar-les i en canvia el tipus, i fer-la amb un
+altre motor només hi afegiria dues conversions.
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.data_processing import GROUP_COLS, encode_group_keys
+
+ENGINES = ['pandas', 'polars', 'duckdb']
+DEFAULT_ENGINE = 'pandas'
+
+# Paquet que cal instal·lar per a cada motor opcional.
+ENGINE_PACKAGES = {
+    'polars': "polars",
+    'duckdb': "duckdb",
+}
+
+# Columnes auxiliars: la clau codificada, la posició original de les files i
+# el valor de la mètrica.
+_KEY = "clau"
+_LEFT_ROW = "fila_esquerra"
+_RIGHT_ROW = "fila_dreta"
+_VALUE = "valor"
+
+# Mòdul de cada motor un cop importat (False si no està disponible).
+_MODULES = {}
+
+
+def _engine_module(engine):
+    """
+    Importa el mòdul d'un motor opcional només la primera vegada que es necessita.
+
+    Args:
+        engine (str): 'polars' o 'duckdb'.
+    Returns:
+        module | None: El mòdul, o None si no està disponible.
+    """
+    if engine not in _MODULES:
+        try:
+            # pylint: disable=import-outside-toplevel
+            if engine == 'polars':
+                import polars as module
+            else:
+                import duckdb as module
+            _MODULES[engine] = module
+        except ImportError:
+            _MODULES[engine] = False
+    return _MODULES[engine] or None
+
+
+def is_engine_available(engine):
+    """
+    Indica si un motor es pot utilitzar en aquest entorn.
+
+    Args:
+        engine (str): Nom del motor (vegeu ENGINES).
+    Returns:
+        bool: True si és pandas o si el paquet del motor està instal·lat.
+    """
+    if engine == DEFAULT_ENGINE:
+        return True
+    return engine in ENGINES and _engine_module(engine) is not None
+
+
+def check_engine(engine):
+    """
+    Comprova que un motor existeix i està instal·lat.
+
+    Args:
+        engine (str): Nom del motor.
+    Raises:
+        ValueError: Si el motor no existeix.
+        ImportError: Si el paquet del motor no està instal·lat.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Motor desconegut: {engine}. Motors disponibles: {ENGINES}")
+    if not is_engine_available(engine):
+        raise ImportError(f"El motor {engine} requereix {ENGINE_PACKAGES[engine]} "
+                          f"(pip install {ENGINE_PACKAGES[engine]}).")
+
+
+def _grouping_frame(df, metric_col):
+    """
+    Prepara les files agrupables d'un dataset amb la clau codificada.
+
+    La clau es codifica amb encode_group_keys, com fa pandas: els codis
+    segueixen l'ordre de les etiquetes encara que siguin de tipus diferents
+    (ex: un codi numèric entre sigles de text). Les files amb algun valor
+    nul a la clau es descarten, com a groupby.
+
+    Args:
+        df (pd.DataFrame): Dataset netejat.
+        metric_col (str): Columna de la mètrica.
+    Returns:
+        pd.DataFrame: Columnes _KEY, _LEFT_ROW (posició de la fila) i _VALUE (float64).
+    """
+    (keys,) = encode_group_keys(df)
+    valid = df[GROUP_COLS].notna().all(axis=1).to_numpy()
+    return pd.DataFrame({
+        _KEY: keys[valid],
+        _LEFT_ROW: np.flatnonzero(valid).astype(np.int64),
+        _VALUE: df[metric_col].to_numpy(dtype=np.float64)[valid],
+    })
+
+
+def _label_groups(df, metric_col, first_rows, means):
+    """
+    Construeix el resultat de l'agregació a partir de la primera fila de cada grup.
+
+    Args:
+        df (pd.DataFrame): Dataset netejat.
+        metric_col (str): Columna de la mètrica.
+        first_rows (array-like): Posició de la primera fila de cada grup, ordenats per clau.
+        means (array-like): Mitjana de la mètrica de cada grup.
+    Returns:
+        pd.DataFrame: Claus amb els valors i tipus originals i la mitjana en float64.
+    """
+    result = df.iloc[np.asarray(first_rows, dtype=np.int64)][GROUP_COLS].reset_index(drop=True)
+    result[metric_col] = np.asarray(means, dtype=np.float64)
+    return result
+
+
+def _merge_frames(df_perf, df_aband):
+    """
+    Prepara la clau codificada i la posició de les files dels dos datasets.
+
+    Els codis es calculen amb un vocabulari comú als dos datasets i el codi
+    dels valors nuls és el mateix a tots dos, de manera que, com a pandas,
+    les claus nul·les coincideixen entre si.
+
+    Args:
+        df_perf (pd.DataFrame): Dataset de l'esquerra.
+        df_aband (pd.DataFrame): Dataset de la dreta.
+    Returns:
+        pd.DataFrame: Columnes _KEY i _LEFT_ROW del dataset de l'esquerra.
+        pd.DataFrame: Columnes _KEY i _RIGHT_ROW del dataset de la dreta.
+    """
+    keys_perf, keys_aband = encode_group_keys(df_perf, df_aband)
+    left = pd.DataFrame({_KEY: keys_perf, _LEFT_ROW: np.arange(len(df_perf), dtype=np.int64)})
+    right = pd.DataFrame({_KEY: keys_aband, _RIGHT_ROW: np.arange(len(df_aband), dtype=np.int64)})
+    return left, right
+
+
+def _take_merged(df_perf, df_aband, left_rows, right_rows):
+    """
+    Construeix el resultat de la fusió a partir de les parelles de files.
+
+    Args:
+        df_perf (pd.DataFrame): Dataset de l'esquerra.
+        df_aband (pd.DataFrame): Dataset de la dreta.
+        left_rows (array-like): Posició de la fila de l'esquerra de cada parella.
+        right_rows (array-like): Posició de la fila de la dreta de cada parella.
+    Returns:
+        pd.DataFrame: Columnes de l'esquerra i columnes de la dreta sense la
+        clau, amb els tipus originals.
+    """
+    left = df_perf.iloc[np.asarray(left_rows, dtype=np.int64)].reset_index(drop=True)
+    right = df_aband.drop(columns=GROUP_COLS).iloc[
+        np.asarray(right_rows, dtype=np.int64)
+    ].reset_index(drop=True)
+    return pd.concat([left, right], axis=1)
+
+
+def _polars_frame(pl, df):
+    """
+    Converteix un DataFrame de pandas de columnes numèriques a Polars.
+
+    Els NaN passen a nuls perquè, com a pandas, la mitjana els ignori.
+
+    Args:
+        pl (module): Mòdul polars.
+        df (pd.DataFrame): Dataset de _grouping_frame o _merge_frames.
+    Returns:
+        polars.DataFrame: El mateix dataset.
+    """
+    return pl.DataFrame([
+        pl.Series(col, df[col].to_numpy(), nan_to_null=True) for col in df.columns
+    ])
+
+
+def _polars_aggregate(df, metric_col):
+    """
+    Agrega un dataset per branca amb Polars (vegeu aggregate_by_branch).
+    """
+    pl = _engine_module('polars')
+    result = (
+        _polars_frame(pl, _grouping_frame(df, metric_col))
+        .group_by(_KEY)
+        .agg(pl.col(_LEFT_ROW).min(), pl.col(_VALUE).mean())
+        .sort(_KEY)
+    )
+    return _label_groups(df, metric_col, result[_LEFT_ROW].to_numpy(),
+                         result[_VALUE].to_numpy())
+
+
+def _polars_merge(df_perf, df_aband):
+    """
+    Fusiona dos datasets amb Polars (vegeu merge_datasets).
+    """
+    pl = _engine_module('polars')
+    left, right = (_polars_frame(pl, frame) for frame in _merge_frames(df_perf, df_aband))
+    result = left.join(right, on=_KEY, how='inner').sort([_LEFT_ROW, _RIGHT_ROW])
+    return _take_merged(df_perf, df_aband, result[_LEFT_ROW].to_numpy(),
+                        result[_RIGHT_ROW].to_numpy())
+
+
+def _duckdb_query(sql, **tables):
+    """
+    Executa una consulta en una base de dades DuckDB temporal en memòria.
+
+    Args:
+        sql (str): Consulta.
+        **tables (pd.DataFrame): DataFrames accessibles des de la consulta pel nom.
+    Returns:
+        pd.DataFrame: Resultat de la consulta.
+    """
+    duckdb = _engine_module('duckdb')
+    connection = duckdb.connect()
+    try:
+        for name, frame in tables.items():
+            connection.register(name, frame)
+        return connection.execute(sql).df()
+    finally:
+        connection.close()
+
+
+def _duckdb_aggregate(df, metric_col):
+    """
+    Agrega un dataset per branca amb DuckDB (vegeu aggregate_by_branch).
+    """
+    result = _duckdb_query(
+        f"SELECT {_KEY}, MIN({_LEFT_ROW}) AS {_LEFT_ROW}, AVG({_VALUE}) AS {_VALUE} "
+        f"FROM dades GROUP BY {_KEY} ORDER BY {_KEY}",
+        dades=_grouping_frame(df, metric_col)
+    )
+    return _label_groups(df, metric_col, result[_LEFT_ROW].to_numpy(),
+                         result[_VALUE].to_numpy())
+
+
+def _duckdb_merge(df_perf, df_aband):
+    """
+    Fusiona dos datasets amb DuckDB (vegeu merge_datasets).
+    """
+    left, right = _merge_frames(df_perf, df_aband)
+    result = _duckdb_query(
+        f"SELECT l.{_LEFT_ROW}, r.{_RIGHT_ROW} "
+        f"FROM esquerra AS l JOIN dreta AS r ON l.{_KEY} = r.{_KEY} "
+        f"ORDER BY l.{_LEFT_ROW}, r.{_RIGHT_ROW}",
+        esquerra=left, dreta=right
+    )
+    return _take_merged(df_perf, df_aband, result[_LEFT_ROW].to_numpy(),
+                        result[_RIGHT_ROW].to_numpy())
+
+
+_AGGREGATE = {'polars': _polars_aggregate, 'duckdb': _duckdb_aggregate}
+_MERGE = {'polars': _polars_merge, 'duckdb': _duckdb_merge}
+
+
+def engine_aggregate(df, metric_col, engine):
+    """
+    Agrega un dataset per branca amb un motor alternatiu.
+
+    Args:
+        df (pd.DataFrame): Dataset netejat.
+        metric_col (str): Columna de la mètrica.
+        engine (str): 'polars' o 'duckdb'.
+    Returns:
+        pd.DataFrame: El mateix resultat que aggregate_by_branch amb pandas.
+    Raises:
+        ValueError: Si el motor no existeix.
+        ImportError: Si el paquet del motor no està instal·lat.
+    """
+    check_engine(engine)
+    return _AGGREGATE[engine](df, metric_col)
+
+
+def engine_merge(df_perf, df_aband, engine):
+    """
+    Fusiona els dos datasets agregats amb un motor alternatiu.
+
+    Args:
+        df_perf (pd.DataFrame): Dataset de rendiment acadèmic.
+        df_aband (pd.DataFrame): Dataset d'abandonament.
+        engine (str): 'polars' o 'duckdb'.
+    Returns:
+        pd.DataFrame: El mateix resultat que merge_datasets amb pandas.
+    Raises:
+        ValueError: Si el motor no existeix.
+        ImportError: Si el paquet del motor no està instal·lat.
+    """
+    check_engine(engine)
+    return _MERGE[engine](df_perf, df_aband)
@@ -0,0 +1,47 @@
+"""
+Mòdul d'utilitats per als noms dels fitxers de sortida.
+
+Els gràfics (charts) i els informes (reports) per dimensió desen un fitxer
+per valor amb el mateix nom curt, sense que un mòdul depengui de l'altre.
+"""
+
+import re
+
+
+def slugify(text):
+    """
+    Converteix un text en un nom de fitxer (minúscules i guions baixos).
+
+    Args:
+        text (str): Text original.
+    Returns:
+        str: Nom apte per a fitxers.
+    """
+    return re.sub(r'[^\w]+', '_', str(text).lower()).strip('_') or "buit"
+
+
+def unique_slugs(values, reserved=()):
+    """
+    Assigna un nom de fitxer diferent a cada valor.
+
+    Dos valors diferents poden tenir el mateix slugify (ex: 'Màster/Postgrau'
+    i 'Màster Postgrau'). Per no sobreescriure cap fitxer, els noms repetits
+    reben un sufix numèric ('master_postgrau_2') en l'ordre dels valors.
+
+    Args:
+        values (iterable): Valors originals, sense repeticions.
+        reserved (iterable, opcional): Noms que ja s'utilitzen a la mateixa carpeta.
+    Returns:
+        dict: Valor -> nom de fitxer únic.
+    """
+    used = set(reserved)
+    names = {}
+    for value in values:
+        base = name = slugify(value)
+        suffix = 1
+        while name in used:
+            suffix += 1
+            name = f"{base}_{suffix}"
+        used.add(name)
+        names[value] = name
+    return names
@@ -0,0 +1,157 @@
+"""
+Mòdul de fusió incremental per curs acadèmic.
+
+Els cursos acadèmics passats no canvien d'una actualització a l'altra, per
+tant el dataset fusionat es desa partit per 'Curs Acadèmic'. A cada execució
+es calcula una empremta de les files de cada curs als dos datasets d'entrada
+i només es tornen a netejar, agregar i fusionar els cursos nous o modificats.
+"""
+
+import hashlib
+import json
+import os
+import pandas as pd
+from src.data_processing import (
+    clean_and_homogenize, clean_performance, clean_abandonment, aggregate_by_branch,
+    merge_datasets, shared_dtypes
+)
+
+# Carpeta per defecte de les particions i versió del format desat.
+STORE_DIR = "data/.incremental"
+STORE_VERSION = 1
+
+YEAR_COL = 'Curs Acadèmic'
+_MANIFEST = "manifest.json"
+
+
+def year_fingerprints(df):
+    """
+    Calcula una empremta del contingut de cada curs acadèmic.
+
+    Args:
+        df (pd.DataFrame): Dataset original (rendiment o abandonament).
+    Returns:
+        dict: Curs acadèmic -> hash hexadecimal de les seves files.
+    """
+    row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    schema = "|".join(map(str, df.columns)).encode('utf-8')
+
+    fingerprints = {}
+    for year, positions in df.groupby(YEAR_COL, observed=True).indices.items():
+        digest = hashlib.sha256(schema)
+        digest.update(row_hashes[positions].tobytes())
+        fingerprints[str(year)] = digest.hexdigest()
+    return fingerprints
+
+
+def _load_manifest(store_dir):
+    """
+    Llegeix el manifest de particions, o en retorna un de buit.
+
+    Args:
+        store_dir (str): Carpeta de les particions.
+    Returns:
+        dict: Manifest amb la versió i les particions desades.
+    """
+    try:
+        with open(os.path.join(store_dir, _MANIFEST), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {"version": STORE_VERSION, "partitions": {}}
+
+    if manifest.get("version") != STORE_VERSION:
+        return {"version": STORE_VERSION, "partitions": {}}
+    return manifest
+
+
+def _partition_path(store_dir, year):
+    """
+    Retorna la ruta del fitxer d'una partició.
+
+    Args:
+        store_dir (str): Carpeta de les particions.
+        year (str): Curs acadèmic.
+    Returns:
+        str: Ruta del fitxer de la partició.
+    """
+    name = hashlib.sha1(year.encode('utf-8')).hexdigest()[:12]
+    return os.path.join(store_dir, f"curs-{name}.pkl")
+
+
+def _merge_years(raw_perf, raw_drop, years):
+    """
+    Neteja, agrega i fusiona només les files dels cursos indicats.
+
+    Args:
+        raw_perf (pd.DataFrame): Dataset de rendiment original.
+        raw_drop (pd.DataFrame): Dataset d'abandonament original.
+        years (list): Cursos acadèmics a recalcular.
+    Returns:
+        pd.DataFrame: Dataset fusionat dels cursos indicats.
+    """
+    perf = raw_perf[raw_perf[YEAR_COL].astype(str).isin(years)]
+    drop = raw_drop[raw_drop[YEAR_COL].astype(str).isin(years)]
+
+    perf_clean, drop_clean = clean_and_homogenize(perf, drop)
+    perf_agg = aggregate_by_branch(perf_clean, 'Taxa rendiment')
+    drop_agg = aggregate_by_branch(drop_clean, '% Abandonament a primer curs')
+    return merge_datasets(perf_agg, drop_agg)
+
+
+def update_merged_dataset(raw_perf, raw_drop, store_dir=None):
+    """
+    Actualitza el dataset fusionat recalculant només els cursos que han canviat.
+
+    Args:
+        raw_perf (pd.DataFrame): Dataset de rendiment original.
+        raw_drop (pd.DataFrame): Dataset d'abandonament original.
+        store_dir (str, opcional): Carpeta de les particions. Per defecte STORE_DIR.
+    Returns:
+        pd.DataFrame: Dataset fusionat complet, igual que en el mode no incremental.
+        list: Cursos acadèmics que s'han recalculat.
+    """
+    store_dir = store_dir or STORE_DIR
+    os.makedirs(store_dir, exist_ok=True)
+    manifest = _load_manifest(store_dir)
+    stored = manifest["partitions"]
+
+    perf_prints = year_fingerprints(raw_perf)
+    drop_prints = year_fingerprints(raw_drop)
+    years = sorted(set(perf_prints) | set(drop_prints))
+
+    # Un curs es recalcula si és nou, si ha canviat o si falta la partició.
+    changed = [
+        year for year in years
+        if stored.get(year, {}).get("perf") != perf_prints.get(year)
+        or stored.get(year, {}).get("drop") != drop_prints.get(year)
+        or not os.path.exists(_partition_path(store_dir, year))
+    ]
+
+    if changed:
+        merged_changed = _merge_years(raw_perf, raw_drop, changed)
+        by_year = merged_changed[YEAR_COL].astype(str)
+        for year in changed:
+            partition = merged_changed[by_year == year].reset_index(drop=True)
+            partition.to_pickle(_partition_path(store_dir, year))
+            stored[year] = {"perf": perf_prints.get(year), "drop": drop_prints.get(year)}
+
+    # Eliminem les particions dels cursos que ja no són a les dades.
+    for year in set(stored) - set(years):
+        stored.pop(year)
+        try:
+            os.remove(_partition_path(store_dir, year))
+        except OSError:
+            pass
+
+    with open(os.path.join(store_dir, _MANIFEST), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+
+    partitions = [pd.read_pickle(_partition_path(store_dir, year)) for year in years]
+    merged_df = pd.concat(partitions, ignore_index=True) if partitions else _merge_years(
+        raw_perf, raw_drop, []
+    )
+
+    # Cada partició té el vocabulari dels cursos amb què es va calcular; es
+    # restaura el tipus categòric comú, el mateix que en el mode no incremental.
+    dtypes = shared_dtypes(clean_performance(raw_perf), clean_abandonment(raw_drop))
+    return merged_df.astype(dtypes), changed
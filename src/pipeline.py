@@ -0,0 +1,446 @@
+"""
+Mòdul d'execució de les etapes de dades com un graf amb artefactes persistents.
+
+Les etapes de l'exercici 2 (càrrega, neteja, agregació de cada dataset i
+fusió) es declaren com a nodes d'un graf acíclic. La clau de cada etapa és
+un hash del seu nom, dels paràmetres, de la versió del codi (el contingut
+dels mòduls que executa) i de les claus de les etapes d'entrada; la de la
+càrrega inclou també el contingut dels fitxers de dades. Com que les claus
+es poden calcular sense executar res, en demanar una etapa es busca primer
+el seu artefacte: si existeix, es llegeix i no s'executa cap etapa anterior.
+Si no, es resolen les entrades de la mateixa manera, de manera que una
+execució sempre continua des de l'artefacte vàlid més profund.
+
+Els resultats de les etapes marcades com a persistents es desen amb pickle
+a ARTIFACTS_DIR. La càrrega no es desa (ja té la memòria cau columnar de
+data_cache) ni tampoc la neteja, que és més ràpida que llegir-ne l'artefacte.
+"""
+
+import hashlib
+import importlib
+import json
+import os
+import pickle
+
+from src.dataset_files import expand_dataset_paths
+from src.profiling import StageProfiler, count_rows
+
+ARTIFACTS_DIR = "data/.artifacts"
+# Versió del format dels artefactes; canviar-la invalida tots els existents.
+ARTIFACTS_VERSION = 1
+# Artefactes que es conserven per etapa (els més recents).
+MAX_ARTIFACTS_PER_STAGE = 4
+
+_HASH_CHUNK = 1024 * 1024
+_MODULE_DIGESTS = {}
+
+
+def file_digest(path):
+    """
+    Calcula el hash SHA-256 del contingut d'un fitxer.
+
+    Args:
+        path (str): Ruta del fitxer.
+    Returns:
+        str | None: Hash hexadecimal, o None si el fitxer no es pot llegir.
+    """
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(_HASH_CHUNK), b''):
+                digest.update(chunk)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+def code_version(modules):
+    """
+    Calcula la versió del codi d'una etapa a partir del contingut dels seus mòduls.
+
+    Args:
+        modules (list): Noms complets dels mòduls (ex: 'src.data_processing').
+    Returns:
+        str: Hash hexadecimal del codi font de tots els mòduls.
+    """
+    digest = hashlib.sha256()
+    for name in sorted(modules):
+        if name not in _MODULE_DIGESTS:
+            path = importlib.import_module(name).__file__
+            _MODULE_DIGESTS[name] = file_digest(path) or ""
+        digest.update(f"{name}:{_MODULE_DIGESTS[name]};".encode('utf-8'))
+    return digest.hexdigest()
+
+
+class ArtifactStore:
+    """
+    Magatzem local d'artefactes indexat per la clau de cada etapa.
+    """
+
+    def __init__(self, store_dir=None, max_per_stage=MAX_ARTIFACTS_PER_STAGE):
+        """
+        Args:
+            store_dir (str, opcional): Carpeta dels artefactes. Per defecte ARTIFACTS_DIR.
+            max_per_stage (int, opcional): Artefactes que es conserven per etapa.
+        """
+        self.store_dir = store_dir or ARTIFACTS_DIR
+        self.max_per_stage = max_per_stage
+
+    def path(self, stage, key):
+        """
+        Retorna la ruta de l'artefacte d'una etapa.
+
+        Args:
+            stage (str): Nom de l'etapa.
+            key (str): Clau de l'etapa.
+        Returns:
+            str: Ruta del fitxer pickle.
+        """
+        return os.path.join(self.store_dir, f"{stage}-{key[:32]}.pkl")
+
+    def contains(self, stage, key):
+        """
+        Indica si existeix l'artefacte d'una etapa.
+
+        Args:
+            stage (str): Nom de l'etapa.
+            key (str): Clau de l'etapa.
+        Returns:
+            bool: True si el fitxer de l'artefacte existeix.
+        """
+        return os.path.exists(self.path(stage, key))
+
+    def get(self, stage, key):
+        """
+        Llegeix un artefacte.
+
+        Args:
+            stage (str): Nom de l'etapa.
+            key (str): Clau de l'etapa.
+        Returns:
+            tuple: (True, valor) si l'artefacte existeix i es pot llegir, o (False, None).
+        """
+        try:
+            with open(self.path(stage, key), 'rb') as f:
+                return True, pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            return False, None
+
+    def put(self, stage, key, value):
+        """
+        Desa un artefacte de manera atòmica i elimina els més antics de l'etapa.
+
+        Com la memòria cau de data_cache, si l'artefacte no es pot desar (carpeta
+        sense permisos d'escriptura o valor no serialitzable) es mostra un avís
+        i l'execució continua amb el resultat ja calculat.
+
+        Args:
+            stage (str): Nom de l'etapa.
+            key (str): Clau de l'etapa.
+            value: Resultat de l'etapa (ha de ser serialitzable amb pickle).
+        """
+        path = self.path(stage, key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.store_dir, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+
+            entries = sorted(
+                (os.path.join(self.store_dir, name) for name in os.listdir(self.store_dir)
+                 if name.startswith(f"{stage}-") and name.endswith(".pkl")),
+                key=os.path.getmtime, reverse=True
+            )
+        except (OSError, pickle.PicklingError, TypeError, AttributeError) as e:
+            print(f"Avís: no s'ha pogut desar l'artefacte de {stage} ({e}).")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+
+        for old in entries[self.max_per_stage:]:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+
+
+class Stage:
+    """
+    Node del graf: una funció amb les seves entrades i paràmetres.
+    """
+
+    def __init__(self, name, func, inputs=(), params=None, sources=(), modules=None,
+                 persist=True):
+        """
+        Args:
+            name (str): Nom únic de l'etapa.
+            func (callable): Funció que rep els resultats de les entrades (en
+                ordre) i els paràmetres com a arguments amb nom.
+            inputs (tuple, opcional): Noms de les etapes d'entrada.
+            params (dict, opcional): Paràmetres serialitzables en JSON.
+            sources (tuple, opcional): Fitxers, carpetes o patrons glob de dades
+                el contingut dels quals forma part de la clau.
+            modules (list, opcional): Mòduls que defineixen la versió del codi.
+                Per defecte, el mòdul de la funció.
+            persist (bool, opcional): Si el resultat es desa al magatzem.
+        """
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.params = dict(params or {})
+        self.sources = tuple(sources)
+        self.modules = list(modules or [func.__module__])
+        self.persist = persist
+
+
+class Pipeline:
+    """
+    Executor d'un graf d'etapes amb memoització persistent.
+    """
+
+    def __init__(self, stages, store=None, profiler=None):
+        """
+        Args:
+            stages (list): Etapes del graf (Stage).
+            store (ArtifactStore, opcional): Magatzem d'artefactes. Sense
+                magatzem, totes les etapes s'executen sempre.
+            profiler (StageProfiler, opcional): Registre de rendiment per etapa.
+        """
+        self.stages = {stage.name: stage for stage in stages}
+        self.store = store
+        self.profiler = profiler or StageProfiler(enabled=False)
+        self._keys = {}
+
+    def key(self, name):
+        """
+        Calcula la clau d'una etapa sense executar-la.
+
+        Args:
+            name (str): Nom de l'etapa.
+        Returns:
+            str: Hash hexadecimal de l'etapa i de totes les seves entrades.
+        """
+        if name not in self._keys:
+            stage = self.stages[name]
+            sources = {}
+            for pattern in stage.sources:
+                try:
+                    files = expand_dataset_paths(pattern)
+                except FileNotFoundError:
+                    files = [pattern]
+                sources[pattern] = [file_digest(file) for file in files]
+
+            description = {
+                "version": ARTIFACTS_VERSION,
+                "stage": name,
+                "params": stage.params,
+                "code": code_version(stage.modules),
+                "inputs": [self.key(dependency) for dependency in stage.inputs],
+                "sources": sources,
+            }
+            self._keys[name] = hashlib.sha256(
+                json.dumps(description, sort_keys=True, default=str).encode('utf-8')
+            ).hexdigest()
+        return self._keys[name]
+
+    def run(self, name):
+        """
+        Retorna el resultat d'una etapa, llegint-lo del magatzem si és possible.
+
+        Els resultats intermedis només es guarden durant la crida, de manera
+        que en acabar només es conserva el resultat demanat.
+
+        Args:
+            name (str): Nom de l'etapa.
+        Returns:
+            Resultat de l'etapa.
+        """
+        return self._resolve(name, {})
+
+    def _resolve(self, name, values):
+        """
+        Resol una etapa dins d'una execució.
+
+        Args:
+            name (str): Nom de l'etapa.
+            values (dict): Resultats ja resolts en aquesta execució.
+        Returns:
+            Resultat de l'etapa.
+        """
+        if name in values:
+            return values[name]
+        stage = self.stages[name]
+
+        if stage.persist and self.store is not None and self.store.contains(name, self.key(name)):
+            with self.profiler.stage(name) as record:
+                found, value = self.store.get(name, self.key(name))
+                record["rows_out"] = count_rows(value)
+            # Un artefacte il·legible es torna a calcular.
+            if found:
+                print(f"   -> {name}: artefacte recuperat ({self.key(name)[:12]})")
+                values[name] = value
+                return value
+
+        inputs = [self._resolve(dependency, values) for dependency in stage.inputs]
+        with self.profiler.stage(name, count_rows(inputs)) as record:
+            value = stage.func(*inputs, **stage.params)
+            record["rows_out"] = count_rows(value)
+
+        if stage.persist and self.store is not None:
+            self.store.put(name, self.key(name), value)
+        values[name] = value
+        return value
+
+
+def _load(path_rendiment, path_abandonament, use_cache):
+    """
+    Carrega els dos datasets i llança el primer error que es produeixi.
+
+    Args:
+        path_rendiment (str): Fitxer, carpeta o patró del dataset de rendiment.
+        path_abandonament (str): Fitxer, carpeta o patró del dataset d'abandonament.
+        use_cache (bool): Si s'ha d'utilitzar la memòria cau columnar.
+    Returns:
+        tuple: (rendiment, abandonament) originals.
+    """
+    from src.data_loader import load_dataset_groups  # pylint: disable=import-outside-toplevel
+
+    results = load_dataset_groups([path_rendiment, path_abandonament], use_cache=use_cache)
+    for result in results:
+        if isinstance(result, Exception):
+            raise result
+    return tuple(results)
+
+
+def _clean(raw, verbose=False):
+    """
+    Neteja i homogeneïtza els dos datasets carregats.
+
+    Args:
+        raw (tuple): (rendiment, abandonament) originals.
+        verbose (bool, opcional): Si s'ha de mostrar la memòria estalviada.
+    Returns:
+        tuple: (rendiment, abandonament) netejats.
+    """
+    from src.data_processing import clean_and_homogenize  # pylint: disable=import-outside-toplevel
+
+    return clean_and_homogenize(*raw, verbose=verbose)
+
+
+def _aggregate(clean, index, metric_col, engine='pandas'):
+    """
+    Agrega un dels datasets netejats per branca.
+
+    Args:
+        clean (tuple): (rendiment, abandonament) netejats.
+        index (int): Posició del dataset a la tupla.
+        metric_col (str): Columna de la mètrica.
+        engine (str, opcional): Motor de càlcul.
+    Returns:
+        pd.DataFrame: Dataset agregat.
+    """
+    from src.data_processing import aggregate_by_branch  # pylint: disable=import-outside-toplevel
+
+    return aggregate_by_branch(clean[index], metric_col, engine=engine)
+
+
+def _merge(perf_agg, drop_agg, engine='pandas'):
+    """
+    Fusiona els dos datasets agregats.
+
+    Args:
+        perf_agg (pd.DataFrame): Rendiment agregat.
+        drop_agg (pd.DataFrame): Abandonament agregat.
+        engine (str, opcional): Motor de càlcul.
+    Returns:
+        pd.DataFrame: Dataset fusionat.
+    """
+    from src.data_processing import merge_datasets  # pylint: disable=import-outside-toplevel
+
+    return merge_datasets(perf_agg, drop_agg, engine=engine)
+
+
+def _export(merged, perf_agg, drop_agg, path, metadata):
+    """
+    Desa el dataset fusionat i els agregats a la base de dades SQLite.
+
+    Args:
+        merged (pd.DataFrame): Dataset fusionat.
+        perf_agg (pd.DataFrame): Rendiment agregat.
+        drop_agg (pd.DataFrame): Abandonament agregat.
+        path (str): Fitxer de la base de dades.
+        metadata (dict): Metadades de l'exportació.
+    Returns:
+        pd.DataFrame: El mateix dataset fusionat, per continuar el flux.
+    """
+    # pylint: disable=import-outside-toplevel
+    from src.results_db import MERGED_TABLE, PERFORMANCE_TABLE, DROPOUT_TABLE, export_results
+
+    export_results({MERGED_TABLE: merged, PERFORMANCE_TABLE: perf_agg, DROPOUT_TABLE: drop_agg},
+                   path, metadata)
+    print(f"   -> Resultats exportats a: {path}")
+    return merged
+
+
+def merged_dataset_pipeline(path_rendiment, path_abandonament, use_cache=True, store=None,
+                            profiler=None, load=None, engine='pandas', export_path=None):
+    """
+    Construeix el graf de l'exercici 2: load -> clean -> aggregate_perf /
+    aggregate_drop -> merge, i opcionalment -> export.
+
+    Args:
+        path_rendiment (str): Fitxer, carpeta o patró del dataset de rendiment.
+        path_abandonament (str): Fitxer, carpeta o patró del dataset d'abandonament.
+        use_cache (bool, opcional): Si s'utilitzen la memòria cau columnar i
+            el magatzem d'artefactes.
+        store (ArtifactStore, opcional): Magatzem. Per defecte, el d'ARTIFACTS_DIR
+            si use_cache és True.
+        profiler (StageProfiler, opcional): Registre de rendiment per etapa.
+        load (callable, opcional): Funció de càrrega que rep les dues rutes i
+            use_cache i retorna la tupla de datasets. Per defecte, la de data_loader.
+        engine (str, opcional): Motor de l'agregació i la fusió (vegeu el mòdul
+            engines). Forma part de la clau d'aquestes etapes.
+        export_path (str, opcional): Si s'indica, s'afegeix l'etapa 'export', que
+            desa els resultats en aquesta base de dades SQLite (vegeu
+            results_db) i retorna el dataset fusionat.
+    Returns:
+        Pipeline: Graf amb l'etapa final 'merge' (o 'export').
+    """
+    if store is None and use_cache:
+        store = ArtifactStore()
+    data_modules = ['src.pipeline', 'src.data_processing']
+    engine_modules = data_modules + ['src.engines']
+
+    stages = [
+        Stage('load', load or _load,
+              params={"path_rendiment": path_rendiment, "path_abandonament": path_abandonament,
+                      "use_cache": use_cache},
+              sources=(path_rendiment, path_abandonament),
+              # data_cache decideix els tipus que arriben a la neteja i l'agregació.
+              modules=['src.data_loader', 'src.data_cache', 'src.dataset_files'],
+              persist=False),
+        Stage('clean', _clean, inputs=['load'], params={"verbose": True},
+              modules=data_modules, persist=False),
+        Stage('aggregate_perf', _aggregate, inputs=['clean'],
+              params={"index": 0, "metric_col": 'Taxa rendiment', "engine": engine},
+              modules=engine_modules),
+        Stage('aggregate_drop', _aggregate, inputs=['clean'],
+              params={"index": 1, "metric_col": '% Abandonament a primer curs',
+                      "engine": engine},
+              modules=engine_modules),
+        Stage('merge', _merge, inputs=['aggregate_perf', 'aggregate_drop'],
+              params={"engine": engine}, modules=engine_modules),
+    ]
+    if export_path:
+        # L'exportació és un efecte sobre el fitxer: s'executa sempre i no es desa.
+        stages.append(Stage(
+            'export', _export, inputs=['merge', 'aggregate_perf', 'aggregate_drop'],
+            params={"path": export_path, "metadata": {
+                "fuentes": [path_rendiment, path_abandonament], "motor": engine
+            }},
+            modules=['src.pipeline', 'src.results_db'], persist=False
+        ))
+    return Pipeline(stages, store=store, profiler=profiler)
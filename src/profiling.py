@@ -0,0 +1,279 @@
+"""
+Mòdul d'instrumentació del rendiment de l'execució.
+
+Aquest mòdul registra, per a cada etapa de main.py (càrrega, neteja, agregació,
+fusió, gràfics i anàlisi) i per a cada funció pública dels mòduls de src, el
+temps real, el temps de CPU, el pic de memòria reservada per Python
+(tracemalloc), el pic de memòria del procés (RSS) i el nombre de files
+d'entrada i de sortida. La traça es desa en JSON o CSV a src/report/ i, si
+es demana, es genera també la sortida de cProfile d'una etapa concreta.
+
+Només utilitza la biblioteca estàndard, per no afegir cost a l'arrencada.
+Cal tenir en compte que tracemalloc alenteix l'execució mentre està actiu,
+per tant els temps absoluts d'una execució amb --profile són orientatius i
+s'han de comparar amb altres execucions amb --profile.
+"""
+
+import csv
+import functools
+import inspect
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - Windows no té el mòdul resource
+    resource = None
+
+REPORT_DIR = "src/report"
+
+TRACE_FIELDS = [
+    "name", "kind", "parent", "wall_s", "cpu_s",
+    "tracemalloc_peak_mb", "max_rss_mb", "rows_in", "rows_out"
+]
+
+
+def _max_rss_mb():
+    """
+    Retorna el pic de memòria resident del procés fins ara.
+
+    Returns:
+        float | None: Pic de RSS en MB, o None si la plataforma no ho permet.
+    """
+    if resource is None:
+        return None
+    # A Linux ru_maxrss està en kB.
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 2)
+
+
+def count_rows(obj):
+    """
+    Compta les files dels DataFrames continguts en un objecte.
+
+    Args:
+        obj: DataFrame, tupla o llista de DataFrames, o qualsevol altre valor.
+    Returns:
+        int | None: Nombre total de files, o None si no hi ha cap DataFrame.
+    """
+    shape = getattr(obj, 'shape', None)
+    if shape is not None and len(shape) == 2:
+        return int(shape[0])
+    if isinstance(obj, (tuple, list)):
+        counts = [count_rows(item) for item in obj]
+        counts = [count for count in counts if count is not None]
+        return sum(counts) if counts else None
+    return None
+
+
+class StageProfiler:
+    """
+    Registre de temps i memòria per etapes i per funcions.
+
+    Si es crea amb enabled=False, totes les operacions són buides i no
+    tenen cost apreciable, de manera que main.py pot utilitzar-lo sempre.
+    """
+
+    def __init__(self, enabled=False, cprofile_stage=None):
+        """
+        Inicialitza el registre.
+
+        Args:
+            enabled (bool, opcional): Si s'han de registrar les mesures.
+            cprofile_stage (str, opcional): Nom de l'etapa de la qual es vol
+                desar la sortida de cProfile.
+        """
+        self.enabled = enabled
+        self.cprofile_stage = cprofile_stage
+        self.records = []
+        self._stack = []
+        self._patched = []
+
+    def start(self):
+        """Comença el seguiment de memòria amb tracemalloc."""
+        if self.enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def stop(self):
+        """Atura el seguiment de memòria i restaura les funcions instrumentades."""
+        for module, name, original in reversed(self._patched):
+            setattr(module, name, original)
+        self._patched = []
+        if self.enabled and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    @contextmanager
+    def measure(self, name, kind="stage", rows_in=None):
+        """
+        Mesura un bloc de codi i n'afegeix el registre a la traça.
+
+        El diccionari que retorna el context es pot completar amb 'rows_out'
+        (o 'rows_in') dins del bloc.
+
+        Args:
+            name (str): Nom de l'etapa o funció.
+            kind (str, opcional): 'stage' o 'function'.
+            rows_in (int, opcional): Files d'entrada.
+        Yields:
+            dict: Registre de la mesura.
+        """
+        record = {"name": name, "kind": kind, "rows_in": rows_in, "rows_out": None}
+        if not self.enabled:
+            yield record
+            return
+
+        # El pic de l'etapa exterior inclou el de les etapes niades.
+        current, peak = tracemalloc.get_traced_memory()
+        if self._stack:
+            self._stack[-1]["_peak"] = max(self._stack[-1]["_peak"], peak)
+        record["parent"] = self._stack[-1]["name"] if self._stack else None
+        record["_start"] = current
+        record["_peak"] = current
+        self._stack.append(record)
+        tracemalloc.reset_peak()
+
+        profile = None
+        if kind == "stage" and name == self.cprofile_stage:
+            import cProfile  # pylint: disable=import-outside-toplevel
+            profile = cProfile.Profile()
+            profile.enable()
+
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield record
+        finally:
+            record["wall_s"] = round(time.perf_counter() - wall_start, 6)
+            record["cpu_s"] = round(time.process_time() - cpu_start, 6)
+            if profile is not None:
+                profile.disable()
+                self._dump_cprofile(profile, name)
+
+            # El pic es mesura respecte a la memòria ja reservada en començar.
+            peak = max(record.pop("_peak"), tracemalloc.get_traced_memory()[1])
+            record["tracemalloc_peak_mb"] = round((peak - record.pop("_start")) / (1024 * 1024), 3)
+            record["max_rss_mb"] = _max_rss_mb()
+            self._stack.pop()
+            if self._stack:
+                self._stack[-1]["_peak"] = max(self._stack[-1]["_peak"], peak)
+            self.records.append(record)
+
+    def stage(self, name, rows_in=None):
+        """
+        Drecera per mesurar una etapa de main.py.
+
+        Args:
+            name (str): Nom de l'etapa.
+            rows_in (int, opcional): Files d'entrada.
+        Returns:
+            contextmanager: Context de mesura de l'etapa.
+        """
+        return self.measure(name, "stage", rows_in)
+
+    def wrap(self, func, name):
+        """
+        Retorna una versió de la funció que es mesura a cada crida.
+
+        Args:
+            func (callable): Funció a instrumentar.
+            name (str): Nom que apareixerà a la traça.
+        Returns:
+            callable: Funció instrumentada.
+        """
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with self.measure(name, "function", count_rows(list(args))) as record:
+                result = func(*args, **kwargs)
+                record["rows_out"] = count_rows(result)
+            return result
+        return wrapper
+
+    def instrument(self, *modules):
+        """
+        Instrumenta totes les funcions públiques definides en els mòduls indicats.
+
+        Les funcions es reemplacen a l'atribut del mòdul, per tant també es
+        mesuren les crides internes entre funcions del mateix mòdul. stop()
+        restaura les funcions originals.
+
+        Args:
+            *modules (module): Mòduls de src a instrumentar.
+        """
+        if not self.enabled:
+            return
+        for module in modules:
+            for name, obj in list(vars(module).items()):
+                if (name.startswith('_') or not inspect.isfunction(obj)
+                        or obj.__module__ != module.__name__):
+                    continue
+                short_module = module.__name__.rsplit('.', 1)[-1]
+                setattr(module, name, self.wrap(obj, f"{short_module}.{name}"))
+                self._patched.append((module, name, obj))
+
+    def instrument_modules(self, names):
+        """
+        Importa i instrumenta mòduls en ordre de dependència.
+
+        Cada mòdul s'instrumenta just després d'importar-lo, de manera que els
+        mòduls posteriors que n'importen funcions ja reben les versions
+        instrumentades.
+
+        Args:
+            names (list): Noms complets dels mòduls (ex: 'src.data_loader').
+        """
+        if not self.enabled:
+            return
+        import importlib  # pylint: disable=import-outside-toplevel
+        for name in names:
+            self.instrument(importlib.import_module(name))
+
+    def _dump_cprofile(self, profile, name):
+        """
+        Desa la sortida de cProfile d'una etapa i n'imprimeix un resum.
+
+        Args:
+            profile (cProfile.Profile): Perfil recollit.
+            name (str): Nom de l'etapa.
+        """
+        import pstats  # pylint: disable=import-outside-toplevel
+
+        os.makedirs(REPORT_DIR, exist_ok=True)
+        path = os.path.join(REPORT_DIR, f"profile_{name}.prof")
+        profile.dump_stats(path)
+        print(f"Perfil cProfile de l'etapa '{name}' desat a: {path}")
+        pstats.Stats(profile).sort_stats("cumulative").print_stats(15)
+
+    def write_trace(self, fmt="json", output_dir=None):
+        """
+        Desa la traça de totes les mesures.
+
+        Args:
+            fmt (str, opcional): 'json' o 'csv'. Per defecte 'json'.
+            output_dir (str, opcional): Carpeta de sortida. Per defecte src/report.
+        Returns:
+            str | None: Ruta del fitxer desat, o None si el registre està desactivat.
+        """
+        if not self.enabled:
+            return None
+        output_dir = output_dir or REPORT_DIR
+        os.makedirs(output_dir, exist_ok=True)
+        path = os.path.join(output_dir, f"profile_trace.{fmt}")
+
+        if fmt == "csv":
+            with open(path, 'w', encoding='utf-8', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=TRACE_FIELDS)
+                writer.writeheader()
+                writer.writerows(self.records)
+        else:
+            trace = {
+                "fecha": datetime.now().isoformat(timespec='seconds'),
+                "registros": self.records
+            }
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(trace, f, indent=2, ensure_ascii=False)
+
+        print(f"Traça de rendiment desada a: {path}")
+        return path
@@ -0,0 +1,224 @@
+"""
+Mòdul de consultes en memòria sobre el dataset fusionat.
+
+DatasetQuery construeix una sola vegada uns índexs sobre 'Branca', 'Sigles',
+'Curs Acadèmic' i 'Sexe' del resultat de merge_datasets, i després respon
+consultes de filtre i agregació sense tornar a recórrer el DataFrame:
+
+- Per a cada columna indexada, un vocabulari ordenat i la llista ordenada de
+  files de cada valor (llistes de posicions), per seleccionar files.
+- Per a cada combinació de valors de les quatre columnes (cel·la), el nombre
+  de valors, la mitjana, la suma de quadrats de les desviacions, el mínim i
+  el màxim de cada mètrica. Una agregació només combina les cel·les que
+  compleixen el filtre, amb la mateixa fórmula que els acumuladors de
+  src/accumulators.py.
+
+Pensat per a un servei de llarga durada que respon moltes consultes sobre
+un mateix dataset carregat.
+"""
+
+import numpy as np
+import pandas as pd
+
+INDEX_COLS = ['Branca', 'Sigles', 'Curs Acadèmic', 'Sexe']
+QUERY_METRICS = ['% Abandonament a primer curs', 'Taxa rendiment']
+QUERY_STATS = ['count', 'mean', 'std', 'min', 'max', 'sum']
+
+
+class DatasetQuery:
+    """
+    Índexs i consultes d'agregació sobre el dataset fusionat.
+
+    Els filtres són un diccionari {columna: condició}, on la condició pot ser
+    un valor (igualtat), una llista o un conjunt de valors (pertinença) o una
+    tupla (inici, fi) amb un interval inclusiu segons l'ordre dels valors
+    (per exemple, ('20-21', '22-23') per a 'Curs Acadèmic'). Un extrem None
+    deixa l'interval obert.
+    """
+
+    def __init__(self, df, index_cols=None, metrics=None):
+        """
+        Construeix els índexs del dataset.
+
+        Args:
+            df (pd.DataFrame): Dataset fusionat (resultat de merge_datasets).
+            index_cols (list, opcional): Columnes indexades. Per defecte INDEX_COLS.
+            metrics (list, opcional): Mètriques agregables. Per defecte QUERY_METRICS.
+        """
+        self.df = df
+        self.index_cols = list(index_cols or INDEX_COLS)
+        self.metrics = list(metrics or QUERY_METRICS)
+
+        self.vocabularies = {}
+        self._postings = {}
+        codes = {}
+        for col in self.index_cols:
+            col_codes, uniques = pd.factorize(df[col], sort=True)
+            self.vocabularies[col] = list(uniques)
+            codes[col] = col_codes
+
+            # Llistes de posicions: tram de files ordenades de cada codi.
+            order = np.argsort(col_codes, kind='stable')
+            bounds = np.searchsorted(col_codes[order], np.arange(len(uniques) + 1))
+            self._postings[col] = (order, bounds)
+
+        self._build_cells(codes)
+
+    def _build_cells(self, codes):
+        """
+        Precalcula els moments de cada mètrica per cel·la.
+
+        Args:
+            codes (dict): Codis de cada columna indexada (-1 per als nuls).
+        """
+        valid = np.logical_and.reduce([codes[col] >= 0 for col in self.index_cols])
+        shape = tuple(len(self.vocabularies[col]) for col in self.index_cols)
+        flat = np.ravel_multi_index([codes[col][valid] for col in self.index_cols], shape)
+        cells, inverse = np.unique(flat, return_inverse=True)
+
+        self._cell_codes = dict(zip(self.index_cols, np.unravel_index(cells, shape)))
+        grouped = self.df.loc[valid, self.metrics].groupby(inverse)
+        self._cell_rows = np.bincount(inverse, minlength=len(cells))
+
+        self._moments = {}
+        for metric in self.metrics:
+            column = grouped[metric]
+            count = column.count().to_numpy(dtype=float)
+            mean = column.mean().to_numpy(dtype=float)
+            # Suma de quadrats de les desviacions respecte a la mitjana de la cel·la.
+            m2 = column.var(ddof=0).to_numpy(dtype=float) * count
+            self._moments[metric] = {
+                "count": count,
+                "mean": np.nan_to_num(mean),
+                "m2": np.nan_to_num(m2),
+                "min": column.min().to_numpy(dtype=float),
+                "max": column.max().to_numpy(dtype=float),
+            }
+
+    def _allowed_codes(self, col, condition):
+        """
+        Converteix una condició de filtre en els codis acceptats d'una columna.
+
+        Args:
+            col (str): Columna indexada.
+            condition: Valor, llista/conjunt de valors o tupla (inici, fi).
+        Returns:
+            np.ndarray: Codis acceptats.
+        Raises:
+            KeyError: Si la columna no està indexada.
+        """
+        if col not in self.vocabularies:
+            raise KeyError(f"La columna '{col}' no està indexada")
+        vocabulary = self.vocabularies[col]
+
+        if isinstance(condition, tuple):
+            start, end = condition
+            # El vocabulari està ordenat: l'interval és un tram de codis.
+            first = 0 if start is None else np.searchsorted(vocabulary, start, side='left')
+            last = len(vocabulary) if end is None else np.searchsorted(vocabulary, end, 'right')
+            return np.arange(first, last)
+
+        values = condition if isinstance(condition, (list, set, frozenset)) else [condition]
+        positions = {value: i for i, value in enumerate(vocabulary)}
+        return np.array([positions[v] for v in values if v in positions], dtype=np.int64)
+
+    def rows(self, filters=None):
+        """
+        Retorna les posicions de les files que compleixen els filtres.
+
+        Args:
+            filters (dict, opcional): Condicions per columna indexada.
+        Returns:
+            np.ndarray: Posicions ordenades de les files.
+        """
+        result = None
+        for col, condition in (filters or {}).items():
+            allowed = self._allowed_codes(col, condition)
+            order, bounds = self._postings[col]
+            matched = np.sort(np.concatenate(
+                [order[bounds[c]:bounds[c + 1]] for c in allowed]
+                or [np.empty(0, dtype=np.int64)]
+            ))
+            result = matched if result is None else np.intersect1d(
+                result, matched, assume_unique=True
+            )
+        return np.arange(len(self.df)) if result is None else result
+
+    def select(self, filters=None):
+        """
+        Retorna les files del dataset que compleixen els filtres.
+
+        Args:
+            filters (dict, opcional): Condicions per columna indexada.
+        Returns:
+            pd.DataFrame: Files seleccionades.
+        """
+        return self.df.iloc[self.rows(filters)]
+
+    def aggregate(self, metric, filters=None, stats=None):
+        """
+        Agrega una mètrica sobre les files que compleixen els filtres.
+
+        Només es combinen les cel·les precalculades, sense recórrer les files.
+
+        Args:
+            metric (str): Mètrica a agregar.
+            filters (dict, opcional): Condicions per columna indexada.
+            stats (list, opcional): Estadístics a retornar, de QUERY_STATS.
+                Per defecte tots.
+        Returns:
+            dict: Valor de cada estadístic (NaN si no hi ha cap valor), i
+            'rows' amb el nombre de files seleccionades.
+        """
+        mask = np.ones(len(self._cell_rows), dtype=bool)
+        for col, condition in (filters or {}).items():
+            allowed = np.zeros(len(self.vocabularies.get(col, [])), dtype=bool)
+            allowed[self._allowed_codes(col, condition)] = True
+            mask &= allowed[self._cell_codes[col]]
+
+        moments = self._moments[metric]
+        count = moments["count"][mask]
+        total = count.sum()
+        result = {"rows": int(self._cell_rows[mask].sum()), "count": int(total)}
+        if total == 0:
+            result.update({stat: np.nan for stat in QUERY_STATS if stat != "count"})
+        else:
+            means = moments["mean"][mask]
+            mean = float((count * means).sum() / total)
+            m2 = float(moments["m2"][mask].sum() + (count * (means - mean) ** 2).sum())
+            result.update({
+                "mean": mean,
+                "sum": float((count * means).sum()),
+                "std": float(np.sqrt(m2 / (total - 1))) if total > 1 else np.nan,
+                "min": float(np.nanmin(moments["min"][mask])),
+                "max": float(np.nanmax(moments["max"][mask])),
+            })
+
+        if stats is None:
+            return result
+        return {stat: result[stat] for stat in ["rows", *stats]}
+
+    def group_by(self, col, metric, filters=None, stats=None):
+        """
+        Agrega una mètrica per a cada valor d'una columna indexada.
+
+        Args:
+            col (str): Columna indexada per agrupar (ex: 'Curs Acadèmic').
+            metric (str): Mètrica a agregar.
+            filters (dict, opcional): Condicions per columna indexada.
+            stats (list, opcional): Estadístics a retornar. Per defecte tots.
+        Returns:
+            dict: Valor de la columna -> resultat d'aggregate, només per als
+            valors amb alguna fila.
+        """
+        filters = dict(filters or {})
+        allowed = set(self._allowed_codes(col, filters.pop(col))) if col in filters else None
+
+        result = {}
+        for code, value in enumerate(self.vocabularies[col]):
+            if allowed is not None and code not in allowed:
+                continue
+            aggregated = self.aggregate(metric, {**filters, col: value}, stats)
+            if aggregated["rows"]:
+                result[value] = aggregated
+        return result
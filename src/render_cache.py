@@ -0,0 +1,144 @@
+"""
+Mòdul de memòria cau de gràfics renderitzats.
+
+Renderitzar i desar una figura és l'etapa més lenta de l'exercici 3. Cada
+gràfic s'identifica amb una empremta de les sèries que dibuixa (TrendSeries),
+dels paràmetres del dibuix (format, DPI, colors, títol...) i de la versió del
+codi de dibuix: el contingut dels mòduls de DRAWING_MODULES (vegeu
+pipeline.code_version) i la versió de Matplotlib. Si l'empremta
+coincideix amb la del manifest de la carpeta de sortida i els fitxers encara
+existeixen, el gràfic no es torna a generar.
+
+El manifest (.render_manifest.json) desa, per a cada gràfic, l'empremta i
+els fitxers produïts.
+"""
+
+import hashlib
+import json
+import os
+from importlib import metadata
+
+import numpy as np
+
+from src.pipeline import code_version
+
+MANIFEST_NAME = ".render_manifest.json"
+
+# Versió del format del manifest; canviar-la invalida tots els gràfics desats.
+RENDER_VERSION = 1
+
+# Mòduls que dibuixen els gràfics: qualsevol canvi hi invalida els gràfics desats.
+DRAWING_MODULES = ['src.visualization', 'src.charts', 'src.render_cache']
+
+# Versió del codi de dibuix un cop calculada (no canvia durant l'execució).
+_DRAWING_VERSION = None
+
+
+def drawing_version():
+    """
+    Calcula la versió del codi que dibuixa els gràfics.
+
+    Returns:
+        str: Hash del codi font de DRAWING_MODULES amb la versió de Matplotlib.
+    """
+    global _DRAWING_VERSION  # pylint: disable=global-statement
+    if _DRAWING_VERSION is None:
+        try:
+            matplotlib_version = metadata.version('matplotlib')
+        except metadata.PackageNotFoundError:
+            matplotlib_version = ""
+        _DRAWING_VERSION = f"{code_version(DRAWING_MODULES)}:{matplotlib_version}"
+    return _DRAWING_VERSION
+
+
+def series_fingerprint(series_list, params):
+    """
+    Calcula l'empremta d'un gràfic a partir de les sèries, els paràmetres i
+    la versió del codi de dibuix.
+
+    Args:
+        series_list (list): Sèries (TrendSeries) que es dibuixen al gràfic.
+        params (dict): Paràmetres del dibuix (serialitzables en JSON).
+    Returns:
+        str: Hash hexadecimal.
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps(
+        {"version": RENDER_VERSION, "code": drawing_version(), "params": params},
+        sort_keys=True, default=str
+    ).encode('utf-8'))
+
+    for series in series_list:
+        labels = [str(series.group_col), [str(g) for g in series.groups],
+                  [str(y) for y in series.years]]
+        digest.update(json.dumps(labels, ensure_ascii=False).encode('utf-8'))
+        for metric in sorted(series.values):
+            digest.update(metric.encode('utf-8'))
+            digest.update(np.ascontiguousarray(series.values[metric], dtype=float).tobytes())
+        digest.update(np.ascontiguousarray(series.present).tobytes())
+    return digest.hexdigest()
+
+
+def load_manifest(output_dir):
+    """
+    Llegeix el manifest d'una carpeta de gràfics, o en retorna un de buit.
+
+    Args:
+        output_dir (str): Carpeta de sortida dels gràfics.
+    Returns:
+        dict: Manifest amb la versió i els gràfics desats.
+    """
+    try:
+        with open(os.path.join(output_dir, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {"version": RENDER_VERSION, "outputs": {}}
+
+    if manifest.get("version") != RENDER_VERSION:
+        return {"version": RENDER_VERSION, "outputs": {}}
+    return manifest
+
+
+def save_manifest(output_dir, manifest):
+    """
+    Desa el manifest de manera atòmica.
+
+    Args:
+        output_dir (str): Carpeta de sortida dels gràfics.
+        manifest (dict): Manifest a desar.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def is_fresh(manifest, key, fingerprint):
+    """
+    Indica si un gràfic ja està generat amb la mateixa empremta.
+
+    Args:
+        manifest (dict): Manifest de la carpeta de sortida.
+        key (str): Identificador del gràfic dins la carpeta.
+        fingerprint (str): Empremta actual del gràfic.
+    Returns:
+        bool: True si l'empremta coincideix i tots els fitxers existeixen.
+    """
+    entry = manifest["outputs"].get(key)
+    return (entry is not None and entry["fingerprint"] == fingerprint
+            and all(os.path.exists(path) for path in entry["files"]))
+
+
+def record(manifest, key, fingerprint, files):
+    """
+    Registra un gràfic generat al manifest.
+
+    Args:
+        manifest (dict): Manifest de la carpeta de sortida.
+        key (str): Identificador del gràfic dins la carpeta.
+        fingerprint (str): Empremta del gràfic.
+        files (list): Fitxers desats.
+    """
+    manifest["outputs"][key] = {"fingerprint": fingerprint, "files": list(files)}
@@ -0,0 +1,175 @@
+"""
+Mòdul de formats de sortida de l'informe estadístic.
+
+A més del JSON indentat original, l'informe es pot desar com a:
+
+- 'json-compact': el mateix JSON sense espais ni salts de línia.
+- 'ndjson': JSON per línies. La primera línia conté les metadades, les
+  estadístiques globals i els rànquings, i cada línia següent és una branca.
+  Les línies s'escriuen una a una i es poden llegir sense carregar la resta.
+- 'parquet': taula columnar amb una fila per branca i una columna per
+  estadístic. Les dades globals es desen a les metadades de l'esquema.
+  Requereix pyarrow, que s'importa només quan es necessita.
+"""
+
+import json
+import os
+
+REPORT_FORMATS = ['json', 'json-compact', 'ndjson', 'parquet']
+
+# Extensió del fitxer de cada format.
+FORMAT_EXTENSIONS = {
+    'json': '.json',
+    'json-compact': '.min.json',
+    'ndjson': '.ndjson',
+    'parquet': '.parquet',
+}
+
+# Mòdul pyarrow un cop importat (False si no està disponible).
+_PYARROW = None
+
+
+def _pyarrow():
+    """
+    Importa pyarrow i pyarrow.parquet només la primera vegada que es necessiten.
+
+    Returns:
+        tuple | None: (pyarrow, pyarrow.parquet), o None si no estan disponibles.
+    """
+    global _PYARROW  # pylint: disable=global-statement
+    if _PYARROW is None:
+        try:
+            # pylint: disable=import-outside-toplevel
+            import pyarrow
+            import pyarrow.parquet
+            _PYARROW = (pyarrow, pyarrow.parquet)
+        except ImportError:
+            _PYARROW = False
+    return _PYARROW or None
+
+
+def is_parquet_available():
+    """
+    Indica si es pot desar l'informe en format Parquet.
+
+    Returns:
+        bool: True si pyarrow està disponible.
+    """
+    return _pyarrow() is not None
+
+
+def group_records(report, group_key="rama"):
+    """
+    Recorre l'anàlisi per branca de l'informe com a registres plans.
+
+    Args:
+        report (dict): Informe generat per build_report.
+        group_key (str, opcional): Nom del camp amb el nom del grup.
+    Yields:
+        dict: Estadístiques d'una branca amb el seu nom.
+    """
+    for group, stats in report["analisis_por_rama"].items():
+        yield {group_key: group, **stats}
+
+
+def report_header(report):
+    """
+    Retorna la part de l'informe que no depèn de cada branca.
+
+    Args:
+        report (dict): Informe generat per build_report.
+    Returns:
+        dict: Informe sense l'anàlisi per branca.
+    """
+    return {key: value for key, value in report.items() if key != "analisis_por_rama"}
+
+
+def write_ndjson(report, stream):
+    """
+    Escriu l'informe en JSON per línies en un fitxer obert.
+
+    Args:
+        report (dict): Informe generat per build_report.
+        stream (io.TextIOBase): Fitxer de text obert per escriure.
+    """
+    stream.write(json.dumps({"tipo": "informe", **report_header(report)},
+                            ensure_ascii=False, separators=(',', ':')) + "\n")
+    for record in group_records(report):
+        stream.write(json.dumps({"tipo": "rama", **record},
+                                ensure_ascii=False, separators=(',', ':')) + "\n")
+
+
+def records_to_table(records, header=None):
+    """
+    Converteix registres de branca en una taula Arrow.
+
+    Els anys anòmals (llista de diccionaris) es desen com a text JSON.
+
+    Args:
+        records (iterable): Registres plans (vegeu group_records).
+        header (dict, opcional): Dades globals que es desen a les metadades.
+    Returns:
+        pyarrow.Table: Taula amb una fila per registre.
+    Raises:
+        ImportError: Si pyarrow no està disponible.
+    """
+    modules = _pyarrow()
+    if modules is None:
+        raise ImportError("El format parquet requereix pyarrow (pip install pyarrow).")
+    pyarrow, _ = modules
+
+    rows = [
+        {**record, "años_anomalos": json.dumps(record["años_anomalos"], ensure_ascii=False)}
+        for record in records
+    ]
+    table = pyarrow.Table.from_pylist(rows)
+    if header is not None:
+        table = table.replace_schema_metadata(
+            {"informe": json.dumps(header, ensure_ascii=False)}
+        )
+    return table
+
+
+def write_parquet(table, path):
+    """
+    Desa una taula Arrow en format Parquet.
+
+    Args:
+        table (pyarrow.Table): Taula a desar.
+        path (str): Ruta de sortida.
+    """
+    _, parquet = _pyarrow()
+    parquet.write_table(table, path)
+
+
+def write_report(report, output_base, fmt='json'):
+    """
+    Desa l'informe en el format indicat.
+
+    Args:
+        report (dict): Informe generat per build_report.
+        output_base (str): Ruta de sortida sense extensió.
+        fmt (str, opcional): Un dels REPORT_FORMATS. Per defecte 'json'.
+    Returns:
+        str: Ruta del fitxer desat.
+    Raises:
+        ValueError: Si el format no és vàlid.
+        ImportError: Si el format és 'parquet' i pyarrow no està disponible.
+    """
+    if fmt not in REPORT_FORMATS:
+        raise ValueError(f"Format d'informe no vàlid: {fmt}")
+    path = output_base + FORMAT_EXTENSIONS[fmt]
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    if fmt == 'parquet':
+        write_parquet(records_to_table(group_records(report), report_header(report)), path)
+        return path
+
+    with open(path, 'w', encoding='utf-8') as f:
+        if fmt == 'ndjson':
+            write_ndjson(report, f)
+        elif fmt == 'json-compact':
+            json.dump(report, f, ensure_ascii=False, separators=(',', ':'))
+        else:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    return path
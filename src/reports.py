@@ -0,0 +1,207 @@
+"""
+Mòdul de generació d'informes per granularitat.
+
+Genera el mateix informe que analyze_dataset per a cada universitat
+('Sigles'), tipus d'universitat ('Tipus universitat') i sexe ('Sexe').
+
+El dataset fusionat es parteix un sol cop per dimensió: s'ordenen les files
+per valor i cada partició s'envia al pool de processos com a arrays compactes
+(codis enters de curs i branca i les dues mètriques en float64), no com un
+DataFrame serialitzat. Cada procés reconstrueix la partició i executa
+build_report. Els informes es desen com a fitxers separats, com un fitxer
+JSON per línies (NDJSON) per dimensió, que s'escriu a mesura que arriben
+els resultats, o com una taula Parquet per dimensió amb una fila per
+partició i branca.
+"""
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.analysis import build_report
+from src.file_names import slugify
+from src.report_writers import (
+    group_records, is_parquet_available, records_to_table, write_parquet
+)
+
+REPORTS_DIR = "src/report/particions"
+REPORT_DIMENSIONS = ['Sigles', 'Tipus universitat', 'Sexe']
+REPORT_FORMATS = ['files', 'ndjson', 'parquet']
+
+# Columnes que necessita build_report.
+_CODE_COLS = ['Curs Acadèmic', 'Branca']
+_METRIC_COLS = ['% Abandonament a primer curs', 'Taxa rendiment']
+
+
+def partition_frame(df, dimension):
+    """
+    Parteix el dataset per una dimensió en arrays compactes.
+
+    Args:
+        df (pd.DataFrame): Dataset fusionat.
+        dimension (str): Columna de partició (ex: 'Sigles').
+    Returns:
+        dict: Vocabulari de cada columna codificada (llistes de valors).
+        list: Per a cada valor de la dimensió, en ordre d'aparició, una tupla
+        (valor, arrays) amb els codis i les mètriques de les seves files.
+    """
+    codes, values = pd.factorize(df[dimension])
+    vocabularies, encoded = {}, {}
+    for col in _CODE_COLS:
+        col_codes, uniques = pd.factorize(df[col])
+        vocabularies[col] = uniques.tolist()
+        encoded[col] = col_codes.astype(np.int32)
+    for col in _METRIC_COLS:
+        encoded[col] = df[col].to_numpy(dtype=np.float64)
+
+    # Una sola ordenació estable: cada partició és un tram contigu.
+    order = np.argsort(codes, kind='stable')
+    bounds = np.searchsorted(codes[order], np.arange(len(values) + 1))
+
+    partitions = []
+    for i, value in enumerate(values):
+        rows = order[bounds[i]:bounds[i + 1]]
+        partitions.append((value, {col: array[rows] for col, array in encoded.items()}))
+    return vocabularies, partitions
+
+
+def _rebuild_partition(vocabularies, arrays):
+    """
+    Reconstrueix el DataFrame d'una partició a partir dels arrays compactes.
+
+    Args:
+        vocabularies (dict): Vocabulari de cada columna codificada.
+        arrays (dict): Codis i mètriques de la partició.
+    Returns:
+        pd.DataFrame: Partició amb les columnes que necessita build_report.
+    """
+    data = {}
+    for col in _CODE_COLS:
+        vocabulary = np.asarray(vocabularies[col] + [np.nan], dtype=object)
+        # El codi -1 (valor nul) apunta a l'últim element, NaN.
+        data[col] = vocabulary[arrays[col]]
+    for col in _METRIC_COLS:
+        data[col] = arrays[col]
+    return pd.DataFrame(data)
+
+
+def _report_worker(job):
+    """
+    Genera l'informe d'una partició dins d'un procés del pool.
+
+    Args:
+        job (tuple): (dimensió, valor, vocabularis, arrays de la partició).
+    Returns:
+        dict | Exception: Informe de la partició o l'excepció produïda.
+    """
+    dimension, value, vocabularies, arrays = job
+    try:
+        report = build_report(_rebuild_partition(vocabularies, arrays))
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        return e
+    report["metadata"]["particion"] = {"dimension": dimension, "valor": value}
+    return report
+
+
+def iter_partition_reports(df, dimensions=None, max_workers=None):
+    """
+    Genera els informes de totes les particions en un pool de processos.
+
+    Args:
+        df (pd.DataFrame): Dataset fusionat.
+        dimensions (list, opcional): Dimensions de partició. Per defecte REPORT_DIMENSIONS.
+        max_workers (int, opcional): Nombre màxim de processos. Per defecte,
+            el nombre de CPUs.
+    Yields:
+        tuple: (dimensió, valor, informe o excepció), en l'ordre de les particions.
+    """
+    jobs = []
+    for dimension in dimensions or REPORT_DIMENSIONS:
+        vocabularies, partitions = partition_frame(df, dimension)
+        jobs.extend((dimension, value, vocabularies, arrays) for value, arrays in partitions)
+
+    if max_workers is None:
+        max_workers = min(len(jobs), os.cpu_count() or 1)
+
+    # Amb una sola partició o un sol procés no val la pena crear el pool.
+    if len(jobs) <= 1 or max_workers <= 1:
+        results = map(_report_worker, jobs)
+        for job, result in zip(jobs, results):
+            yield job[0], job[1], result
+        return
+
+    chunksize = max(1, len(jobs) // (max_workers * 4))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for job, result in zip(jobs, executor.map(_report_worker, jobs, chunksize=chunksize)):
+            yield job[0], job[1], result
+
+
+def generate_partition_reports(df, dimensions=None, fmt='files', output_dir=None,
+                               max_workers=None):
+    """
+    Genera i desa l'informe de cada universitat, tipus d'universitat i sexe.
+
+    Args:
+        df (pd.DataFrame): Dataset fusionat.
+        dimensions (list, opcional): Dimensions de partició. Per defecte REPORT_DIMENSIONS.
+        fmt (str, opcional): 'files' (un JSON per partició a <dimensió>/<valor>.json),
+            'ndjson' (un fitxer per dimensió amb una línia per partició) o
+            'parquet' (una taula per dimensió amb una fila per partició i branca).
+        output_dir (str, opcional): Carpeta de sortida. Per defecte REPORTS_DIR.
+        max_workers (int, opcional): Nombre màxim de processos.
+    Returns:
+        list: Rutes dels fitxers desats.
+    Raises:
+        ValueError: Si el format no és vàlid.
+        ImportError: Si el format és 'parquet' i pyarrow no està disponible.
+    """
+    if fmt not in REPORT_FORMATS:
+        raise ValueError(f"Format d'informe no vàlid: {fmt}")
+    if fmt == 'parquet' and not is_parquet_available():
+        raise ImportError("El format parquet requereix pyarrow (pip install pyarrow).")
+    output_dir = output_dir or REPORTS_DIR
+    os.makedirs(output_dir, exist_ok=True)
+
+    written, streams, rows, n_reports = [], {}, {}, 0
+    try:
+        for dimension, value, report in iter_partition_reports(df, dimensions, max_workers):
+            if isinstance(report, Exception):
+                print(f"Error generant l'informe de {dimension}={value}: {report}")
+                continue
+            n_reports += 1
+
+            if fmt == 'ndjson':
+                # Cada informe s'escriu en arribar, sense acumular-los en memòria.
+                if dimension not in streams:
+                    path = os.path.join(output_dir, f"{slugify(dimension)}.ndjson")
+                    # pylint: disable-next=consider-using-with
+                    streams[dimension] = open(path, 'w', encoding='utf-8')
+                    written.append(path)
+                streams[dimension].write(
+                    json.dumps(report, ensure_ascii=False, separators=(',', ':')) + "\n"
+                )
+            elif fmt == 'parquet':
+                # Només es guarden les files planes de cada branca, no l'informe sencer.
+                rows.setdefault(dimension, []).extend(
+                    {"valor": value, **record} for record in group_records(report)
+                )
+            else:
+                path = os.path.join(output_dir, slugify(dimension), f"{slugify(value)}.json")
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, 'w', encoding='utf-8') as f:
+                    json.dump(report, f, indent=2, ensure_ascii=False)
+                written.append(path)
+    finally:
+        for stream in streams.values():
+            stream.close()
+
+    for dimension, records in rows.items():
+        path = os.path.join(output_dir, f"{slugify(dimension)}.parquet")
+        write_parquet(records_to_table(records, {"dimension": dimension}), path)
+        written.append(path)
+
+    print(f"Informes per partició desats a {output_dir}: {n_reports} informes")
+    return written
@@ -0,0 +1,366 @@
+"""
+Mòdul de la base de dades SQLite amb els resultats de l'exercici 2.
+
+export_results desa el dataset fusionat i els dos datasets agregats en un
+fitxer SQLite local, amb un índex per a cadascuna de les columnes de
+INDEX_COLS. El fitxer es construeix a part i substitueix l'anterior de cop
+(os.replace), de manera que un lector mai no veu una exportació a mitges i
+les connexions obertes continuen llegint la versió anterior.
+
+ResultsDatabase respon consultes de selecció i d'agregació directament sobre
+el fitxer, en mode de només lectura, amb els mateixos filtres i estadístics
+que DatasetQuery (src/query.py). Diversos processos hi poden llegir alhora
+sense tornar a executar el flux ni llegir els fitxers Excel. El mòdul només
+fa servir la biblioteca estàndard: per consultar el fitxer no cal importar
+pandas.
+"""
+
+import json
+import math
+import os
+import sqlite3
+import time
+from urllib.request import pathname2url
+
+DATABASE_PATH = "data/resultats.sqlite"
+
+# Taules que es desen i es consulten.
+MERGED_TABLE = "fusionat"
+PERFORMANCE_TABLE = "rendiment_agregat"
+DROPOUT_TABLE = "abandonament_agregat"
+METADATA_TABLE = "metadades"
+
+# Columnes indexades, les mateixes que a src/query.py.
+INDEX_COLS = ['Branca', 'Sigles', 'Curs Acadèmic', 'Sexe']
+QUERY_STATS = ['count', 'mean', 'std', 'min', 'max', 'sum']
+
+# Tipus SQLite de cada tipus de columna de numpy (la resta es desen com a text).
+_SQL_TYPES = {'f': "REAL", 'i': "INTEGER", 'u': "INTEGER", 'b': "INTEGER"}
+
+
+def _quote(name):
+    """
+    Cita el nom d'una taula o columna per a SQL.
+
+    Args:
+        name (str): Nom.
+    Returns:
+        str: Identificador entre cometes dobles.
+    """
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _column_values(series):
+    """
+    Converteix una columna a valors de Python que SQLite pot desar.
+
+    Args:
+        series (pd.Series): Columna.
+    Returns:
+        list: Valors, amb None per als nuls (SQLite desa NaN com a NULL).
+    """
+    return [None if value != value else value for value in series.tolist()]
+
+
+def _create_table(connection, name, df):
+    """
+    Crea una taula, hi insereix les files del dataset i n'indexa les columnes.
+
+    Args:
+        connection (sqlite3.Connection): Base de dades en construcció.
+        name (str): Nom de la taula.
+        df (pd.DataFrame): Dataset.
+    """
+    columns = [str(col) for col in df.columns]
+    definitions = ", ".join(
+        f"{_quote(col)} {_SQL_TYPES.get(getattr(df[col].dtype, 'kind', 'O'), 'TEXT')}"
+        for col in columns
+    )
+    connection.execute(f"CREATE TABLE {_quote(name)} ({definitions})")
+    connection.executemany(
+        f"INSERT INTO {_quote(name)} VALUES ({', '.join('?' * len(columns))})",
+        zip(*(_column_values(df[col]) for col in columns))
+    )
+    # Els índexs es creen després d'inserir les files, que és més ràpid.
+    for col in INDEX_COLS:
+        if col in columns:
+            connection.execute(
+                f"CREATE INDEX {_quote(f'{name}_{INDEX_COLS.index(col)}')} "
+                f"ON {_quote(name)} ({_quote(col)})"
+            )
+
+
+def export_results(tables, path=None, metadata=None):
+    """
+    Desa els datasets en una base de dades SQLite indexada.
+
+    Args:
+        tables (dict): Nom de la taula -> pd.DataFrame.
+        path (str, opcional): Fitxer de la base de dades. Per defecte DATABASE_PATH.
+        metadata (dict, opcional): Dades addicionals serialitzables en JSON que
+            es desen a la taula METADATA_TABLE.
+    Returns:
+        str: Ruta del fitxer escrit.
+    """
+    path = path or DATABASE_PATH
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    metadata = {
+        **(metadata or {}),
+        "generado": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "filas": {name: len(df) for name, df in tables.items()},
+    }
+    try:
+        connection = sqlite3.connect(tmp_path)
+        try:
+            # El fitxer temporal només es fa visible un cop complet: no cal diari.
+            connection.execute("PRAGMA journal_mode = OFF")
+            connection.execute("PRAGMA synchronous = OFF")
+            with connection:
+                for name, df in tables.items():
+                    _create_table(connection, name, df)
+                connection.execute(
+                    f"CREATE TABLE {_quote(METADATA_TABLE)} (clave TEXT PRIMARY KEY, valor TEXT)"
+                )
+                connection.executemany(
+                    f"INSERT INTO {_quote(METADATA_TABLE)} VALUES (?, ?)",
+                    [(key, json.dumps(value, ensure_ascii=False, default=str))
+                     for key, value in metadata.items()]
+                )
+            connection.execute("ANALYZE")
+        finally:
+            connection.close()
+        os.replace(tmp_path, path)
+    finally:
+        # Si l'exportació falla, el fitxer temporal no es deixa a la carpeta.
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return path
+
+
+def _where(filters):
+    """
+    Tradueix els filtres al format de DatasetQuery en una condició SQL.
+
+    Args:
+        filters (dict): {columna: valor, llista/conjunt de valors o tupla
+            (inici, fi) amb extrems opcionals}.
+    Returns:
+        str: Clàusula WHERE (buida si no hi ha filtres).
+        list: Paràmetres de la clàusula.
+    Raises:
+        KeyError: Si alguna columna no està indexada.
+    """
+    clauses, params = [], []
+    for col, condition in (filters or {}).items():
+        if col not in INDEX_COLS:
+            raise KeyError(f"La columna '{col}' no està indexada")
+        column = _quote(col)
+
+        if isinstance(condition, tuple):
+            start, end = condition
+            # SQLite compara el text byte a byte, com l'ordre de les cadenes de Python.
+            if start is not None:
+                clauses.append(f"{column} >= ?")
+                params.append(start)
+            if end is not None:
+                clauses.append(f"{column} <= ?")
+                params.append(end)
+        elif isinstance(condition, (list, set, frozenset)):
+            # Sense ordenar: els valors poden barrejar tipus (ex: ['UB', 7]).
+            values = list(condition)
+            clauses.append(f"{column} IN ({', '.join('?' * len(values))})" if values else "0")
+            params.extend(values)
+        else:
+            clauses.append(f"{column} = ?")
+            params.append(condition)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def _moments_query(table, metric, where, group=None):
+    """
+    Construeix la consulta dels moments d'una mètrica, per grups o global.
+
+    La suma de quadrats de les desviacions es calcula en dues passades: primer
+    la mitjana de cada grup i després la suma de (x - mitjana)², de manera que
+    no es perd precisió per cancel·lació com amb SUM(x²) - SUM(x)²/n.
+
+    Args:
+        table (str): Taula.
+        metric (str): Mètrica a agregar.
+        where (str): Clàusula WHERE de _where.
+        group (str, opcional): Columna per agrupar. Sense columna, un sol grup.
+    Returns:
+        str: Consulta que retorna, per grup ordenat, la clau, les files, el
+        nombre de valors, la suma, la suma de quadrats de les desviacions, el
+        mínim i el màxim.
+    """
+    key = _quote(group) if group else "0"
+    return (
+        f"WITH seleccio AS (SELECT {key} AS clau, {_quote(metric)} AS valor, "
+        f"AVG({_quote(metric)}) OVER (PARTITION BY {key}) AS mitjana "
+        f"FROM {_quote(table)}{where}) "
+        "SELECT clau, COUNT(*), COUNT(valor), SUM(valor), "
+        "SUM((valor - mitjana) * (valor - mitjana)), MIN(valor), MAX(valor) "
+        "FROM seleccio GROUP BY clau ORDER BY clau"
+    )
+
+
+def _statistics(rows, count, total, m2, minimum, maximum):
+    """
+    Construeix el resultat d'una agregació a partir dels moments de SQLite.
+
+    Args:
+        rows (int): Files seleccionades.
+        count (int): Valors no nuls de la mètrica.
+        total (float | None): Suma dels valors.
+        m2 (float | None): Suma dels quadrats de les desviacions respecte a la mitjana.
+        minimum (float | None): Valor mínim.
+        maximum (float | None): Valor màxim.
+    Returns:
+        dict: 'rows' i els estadístics de QUERY_STATS (NaN si no hi ha cap valor).
+    """
+    result = {"rows": rows, "count": count}
+    if count == 0:
+        result.update({stat: math.nan for stat in QUERY_STATS if stat != "count"})
+        return result
+
+    result.update({
+        "mean": total / count,
+        "sum": total,
+        "std": math.sqrt(m2 / (count - 1)) if count > 1 else math.nan,
+        "min": minimum,
+        "max": maximum,
+    })
+    return result
+
+
+class ResultsDatabase:
+    """
+    Consultes de només lectura sobre la base de dades de resultats.
+    """
+
+    def __init__(self, path=None):
+        """
+        Obre la base de dades en mode de només lectura.
+
+        Args:
+            path (str, opcional): Fitxer de la base de dades. Per defecte DATABASE_PATH.
+        Raises:
+            FileNotFoundError: Si el fitxer no existeix.
+        """
+        self.path = path or DATABASE_PATH
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"No s'ha trobat la base de dades a la ruta: {self.path}")
+        self.connection = sqlite3.connect(
+            f"file:{pathname2url(os.path.abspath(self.path))}?mode=ro", uri=True
+        )
+
+    def close(self):
+        """Tanca la connexió."""
+        self.connection.close()
+
+    def __enter__(self):
+        """Permet fer servir la base de dades amb 'with'."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Tanca la connexió en sortir del bloc 'with'."""
+        self.close()
+
+    def tables(self):
+        """
+        Llista les taules de dades.
+
+        Returns:
+            list: Noms de les taules, sense la de metadades.
+        """
+        rows = self.connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' "
+            "AND name NOT LIKE 'sqlite_%' ORDER BY rowid"
+        )
+        return [name for (name,) in rows if name != METADATA_TABLE]
+
+    def metadata(self):
+        """
+        Llegeix les metadades de l'exportació.
+
+        Returns:
+            dict: Clau -> valor (inclou 'generado' i 'filas').
+        """
+        rows = self.connection.execute(f"SELECT clave, valor FROM {_quote(METADATA_TABLE)}")
+        return {key: json.loads(value) for key, value in rows}
+
+    def select(self, filters=None, table=MERGED_TABLE, columns=None):
+        """
+        Retorna les files d'una taula que compleixen els filtres.
+
+        Args:
+            filters (dict, opcional): Condicions per columna indexada.
+            table (str, opcional): Taula. Per defecte MERGED_TABLE.
+            columns (list, opcional): Columnes a retornar. Per defecte totes.
+        Returns:
+            list: Un diccionari {columna: valor} per fila, en l'ordre de la taula.
+        """
+        where, params = _where(filters)
+        selected = ", ".join(_quote(col) for col in columns) if columns else "*"
+        cursor = self.connection.execute(
+            f"SELECT {selected} FROM {_quote(table)}{where} ORDER BY rowid", params
+        )
+        names = [description[0] for description in cursor.description]
+        return [dict(zip(names, row)) for row in cursor]
+
+    def aggregate(self, metric, filters=None, stats=None, table=MERGED_TABLE):
+        """
+        Agrega una mètrica sobre les files que compleixen els filtres.
+
+        Args:
+            metric (str): Mètrica a agregar.
+            filters (dict, opcional): Condicions per columna indexada.
+            stats (list, opcional): Estadístics a retornar, de QUERY_STATS.
+                Per defecte tots.
+            table (str, opcional): Taula. Per defecte MERGED_TABLE.
+        Returns:
+            dict: Valor de cada estadístic (NaN si no hi ha cap valor), i
+            'rows' amb el nombre de files seleccionades.
+        """
+        where, params = _where(filters)
+        row = self.connection.execute(_moments_query(table, metric, where), params).fetchone()
+        # Sense cap fila seleccionada no hi ha cap grup.
+        result = _statistics(*row[1:]) if row else _statistics(0, 0, None, None, None, None)
+
+        if stats is None:
+            return result
+        return {stat: result[stat] for stat in ["rows", *stats]}
+
+    def group_by(self, col, metric, filters=None, stats=None, table=MERGED_TABLE):
+        """
+        Agrega una mètrica per a cada valor d'una columna indexada.
+
+        Args:
+            col (str): Columna indexada per agrupar (ex: 'Curs Acadèmic').
+            metric (str): Mètrica a agregar.
+            filters (dict, opcional): Condicions per columna indexada.
+            stats (list, opcional): Estadístics a retornar. Per defecte tots.
+            table (str, opcional): Taula. Per defecte MERGED_TABLE.
+        Returns:
+            dict: Valor de la columna -> resultat d'aggregate, només per als
+            valors amb alguna fila, ordenats.
+        """
+        if col not in INDEX_COLS:
+            raise KeyError(f"La columna '{col}' no està indexada")
+        where, params = _where(filters)
+        # Com DatasetQuery, les files amb la columna nul·la no formen cap grup.
+        where += f"{' AND' if where else ' WHERE'} {_quote(col)} IS NOT NULL"
+        rows = self.connection.execute(_moments_query(table, metric, where, col), params)
+
+        result = {}
+        for key, *sums in rows:
+            aggregated = _statistics(*sums)
+            result[key] = aggregated if stats is None else {
+                stat: aggregated[stat] for stat in ["rows", *stats]
+            }
+        return result
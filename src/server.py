@@ -0,0 +1,448 @@
+"""
+Mòdul del servidor HTTP local que manté les dades carregades en memòria.
+
+Cada execució de main.py torna a llegir els dos fitxers, netejar-los,
+fusionar-los i analitzar-los. En mode servidor això es fa un sol cop:
+DatasetService carrega el dataset fusionat amb update_merged_dataset (per
+tant, només es recalculen els cursos nous o modificats), construeix
+l'informe, les tendències i l'índex de consultes de src/query.py i desa les
+respostes ja serialitzades. Les peticions repetides només copien aquests
+bytes.
+
+Les peticions s'atenen amb asyncio. La recàrrega (POST /recarga) s'executa
+en un fil a part, de manera que mentrestant es continuen servint les dades
+anteriors, i les noves substitueixen les antigues de cop quan estan llestes.
+
+Rutes:
+
+- GET /informe: informe complet de l'exercici 4.
+- GET /analisis: anàlisi per branca.
+- GET /tendencias: mitjana de cada mètrica per branca i curs, i la tendència.
+- GET /rankings: rànquing de branques.
+- GET /consulta: agregació d'una mètrica amb filtres (vegeu query_filters).
+- GET /estado: fitxers carregats, data de càrrega i cursos recalculats.
+- POST /recarga: torna a carregar les dades si els fitxers han canviat
+  (o sempre, amb ?forzar=1).
+"""
+
+import asyncio
+import functools
+import json
+import math
+import os
+import time
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+from src.analysis import build_report, compute_group_statistics
+from src.data_loader import load_dataset_groups
+from src.dataset_files import expand_dataset_paths
+from src.incremental import update_merged_dataset
+from src.query import DatasetQuery
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8000
+
+# Nom de cada mètrica als paràmetres i a les respostes.
+METRIC_NAMES = {
+    'abandono': '% Abandonament a primer curs',
+    'rendimiento': 'Taxa rendiment',
+}
+
+# Paràmetre de la consulta -> columna indexada.
+FILTER_PARAMS = {
+    'rama': 'Branca',
+    'sigles': 'Sigles',
+    'sexo': 'Sexe',
+    'curso': 'Curs Acadèmic',
+}
+
+_MAX_HEADER_LINES = 100
+
+
+class RequestError(Exception):
+    """Petició no vàlida, amb l'estat HTTP que s'ha de retornar."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _json_safe(value):
+    """
+    Substitueix recursivament els NaN i els infinits per None.
+
+    Args:
+        value: Objecte serialitzable (diccionaris i llistes niats inclosos).
+    Returns:
+        El mateix objecte, sense valors que el JSON estàndard no admet.
+    """
+    if isinstance(value, dict):
+        return {key: _json_safe(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(item) for item in value]
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def _to_json(data):
+    """
+    Serialitza una resposta en JSON compacte (els NaN es converteixen en null).
+
+    Args:
+        data: Objecte serialitzable.
+    Returns:
+        bytes: JSON en UTF-8.
+    """
+    return json.dumps(_json_safe(data), ensure_ascii=False, separators=(',', ':'),
+                      allow_nan=False).encode('utf-8')
+
+
+def build_trends(df):
+    """
+    Calcula la mitjana de cada mètrica per branca i curs.
+
+    Args:
+        df (pd.DataFrame): Dataset fusionat.
+    Returns:
+        dict: Per a cada branca, {curs: {mètrica: mitjana}}.
+    """
+    _, yearly = compute_group_statistics(df, 'Branca')
+    trends = {}
+    for name, metric in METRIC_NAMES.items():
+        for branch, row in yearly[metric].iterrows():
+            for year, value in row.dropna().items():
+                trends.setdefault(branch, {}).setdefault(str(year), {})[name] = round(
+                    float(value), 4
+                )
+    return trends
+
+
+def query_filters(params):
+    """
+    Converteix els paràmetres de /consulta en una mètrica i uns filtres.
+
+    Paràmetres: metrica ('abandono' o 'rendimiento', per defecte
+    'rendimiento'), rama, sigles, sexo i curso (es poden repetir per
+    acceptar diversos valors), i desde/hasta per a un interval de cursos.
+
+    Args:
+        params (dict): Paràmetres de la URL (resultat de parse_qs).
+    Returns:
+        str: Columna de la mètrica.
+        dict: Filtres per a DatasetQuery.
+    Raises:
+        RequestError: Si la mètrica no és vàlida o s'hi combinen curso i desde/hasta.
+    """
+    name = params.get('metrica', ['rendimiento'])[-1]
+    if name not in METRIC_NAMES:
+        raise RequestError(HTTPStatus.BAD_REQUEST, f"Mètrica no vàlida: {name}")
+
+    filters = {}
+    for param, col in FILTER_PARAMS.items():
+        if param in params:
+            values = params[param]
+            filters[col] = values[0] if len(values) == 1 else values
+
+    if 'desde' in params or 'hasta' in params:
+        if 'curso' in params:
+            raise RequestError(HTTPStatus.BAD_REQUEST,
+                               "No es pot combinar 'curso' amb 'desde'/'hasta'")
+        filters['Curs Acadèmic'] = (params.get('desde', [None])[-1],
+                                    params.get('hasta', [None])[-1])
+    return METRIC_NAMES[name], filters
+
+
+class DatasetService:
+    """
+    Dades fusionades, informe i índex de consultes mantinguts en memòria.
+    """
+
+    def __init__(self, path_rendiment, path_abandonament, use_cache=True, store_dir=None):
+        """
+        Args:
+            path_rendiment (str): Fitxer, carpeta o patró glob del dataset de rendiment.
+            path_abandonament (str): Fitxer, carpeta o patró glob del dataset d'abandonament.
+            use_cache (bool, opcional): Si s'ha d'utilitzar la memòria cau columnar.
+            store_dir (str, opcional): Carpeta de les particions incrementals.
+        """
+        self.paths = [path_rendiment, path_abandonament]
+        self.use_cache = use_cache
+        self.store_dir = store_dir
+        self.snapshot = None
+
+    def file_signatures(self):
+        """
+        Retorna la data de modificació i la mida de cada fitxer de dades.
+
+        Les carpetes i els patrons glob es tornen a expandir, de manera que
+        també es detecten els fitxers nous o eliminats.
+
+        Returns:
+            dict: Ruta -> [mtime en ns, mida], o None si el fitxer no existeix.
+        """
+        signatures = {}
+        for pattern in self.paths:
+            try:
+                files = expand_dataset_paths(pattern)
+            except FileNotFoundError:
+                files = [pattern]
+            for path in files:
+                try:
+                    stat = os.stat(path)
+                    signatures[path] = [stat.st_mtime_ns, stat.st_size]
+                except OSError:
+                    signatures[path] = None
+        return signatures
+
+    def needs_reload(self):
+        """
+        Indica si els fitxers han canviat des de l'última càrrega.
+
+        Returns:
+            bool: True si no hi ha dades carregades o algun fitxer ha canviat.
+        """
+        return self.snapshot is None or self.snapshot["signatures"] != self.file_signatures()
+
+    def load(self, max_workers=None):
+        """
+        Carrega les dades i prepara totes les respostes.
+
+        És bloquejant; el servidor la crida des d'un fil a part.
+
+        Args:
+            max_workers (int, opcional): Processos de càrrega (vegeu
+                load_datasets_parallel). Des d'un fil a part ha de ser 1: crear
+                processos amb fork des d'un procés amb diversos fils no és segur.
+        Returns:
+            list: Cursos acadèmics que s'han recalculat.
+        Raises:
+            Exception: Si algun fitxer no s'ha pogut carregar.
+        """
+        signatures = self.file_signatures()
+        results = load_dataset_groups(self.paths, use_cache=self.use_cache,
+                                      max_workers=max_workers)
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+
+        merged_df, changed_years = update_merged_dataset(*results, store_dir=self.store_dir)
+        report = build_report(merged_df)
+
+        self.snapshot = {
+            "signatures": signatures,
+            "query": DatasetQuery(merged_df),
+            "responses": {
+                "/informe": _to_json(report),
+                "/analisis": _to_json(report["analisis_por_rama"]),
+                "/tendencias": _to_json({
+                    branch: {
+                        "tendencia_abandono": stats["tendencia_abandono"],
+                        "tendencia_rendimiento": stats["tendencia_rendimiento"],
+                        "cursos": yearly,
+                    }
+                    for branch, yearly in build_trends(merged_df).items()
+                    for stats in [report["analisis_por_rama"][branch]]
+                }),
+                "/rankings": _to_json(report["ranking_ramas"]),
+            },
+            "estado": {
+                "ficheros": self.paths,
+                "num_registros": len(merged_df),
+                "cargado": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "cursos_recalculados": changed_years,
+            },
+        }
+        return changed_years
+
+    def handle(self, method, target):
+        """
+        Respon una petició de lectura amb les dades carregades.
+
+        Args:
+            method (str): Mètode HTTP.
+            target (str): Ruta i paràmetres de la petició.
+        Returns:
+            bytes: Cos JSON de la resposta.
+        Raises:
+            RequestError: Si la ruta o el mètode no són vàlids.
+        """
+        url = urlsplit(target)
+        snapshot = self.snapshot
+        if url.path == "/recarga":
+            raise RequestError(HTTPStatus.METHOD_NOT_ALLOWED, "Utilitzeu POST /recarga")
+        if url.path not in snapshot["responses"] and url.path not in ("/consulta", "/estado"):
+            raise RequestError(HTTPStatus.NOT_FOUND, f"Ruta desconeguda: {url.path}")
+        if method != "GET":
+            raise RequestError(HTTPStatus.METHOD_NOT_ALLOWED, f"Mètode no permès: {method}")
+
+        if url.path == "/estado":
+            return _to_json(snapshot["estado"])
+        if url.path == "/consulta":
+            metric, filters = query_filters(parse_qs(url.query))
+            try:
+                return _to_json(snapshot["query"].aggregate(metric, filters))
+            except (KeyError, TypeError) as e:
+                raise RequestError(HTTPStatus.BAD_REQUEST, f"Filtre no vàlid: {e}") from e
+        return snapshot["responses"][url.path]
+
+
+class DatasetServer:
+    """
+    Servidor HTTP/1.1 mínim sobre asyncio per a un DatasetService.
+    """
+
+    def __init__(self, service):
+        """
+        Args:
+            service (DatasetService): Servei amb les dades ja carregades.
+        """
+        self.service = service
+        self._reload_lock = asyncio.Lock()
+
+    async def reload(self, force=False):
+        """
+        Torna a carregar les dades en un fil a part si els fitxers han canviat.
+
+        Args:
+            force (bool, opcional): Recarrega encara que els fitxers no hagin canviat.
+        Returns:
+            bytes: Cos JSON amb el resultat de la recàrrega.
+        """
+        # Les recàrregues simultànies s'esperen l'una a l'altra.
+        async with self._reload_lock:
+            if not force and not self.service.needs_reload():
+                return _to_json({"recargado": False, "cursos_recalculados": []})
+            loop = asyncio.get_running_loop()
+            changed_years = await loop.run_in_executor(
+                None, functools.partial(self.service.load, max_workers=1)
+            )
+        return _to_json({"recargado": True, "cursos_recalculados": changed_years})
+
+    async def respond(self, method, target):
+        """
+        Resol una petició.
+
+        Args:
+            method (str): Mètode HTTP.
+            target (str): Ruta i paràmetres de la petició.
+        Returns:
+            HTTPStatus: Estat de la resposta.
+            bytes: Cos JSON de la resposta.
+        """
+        try:
+            url = urlsplit(target)
+            if method == "POST" and url.path == "/recarga":
+                force = parse_qs(url.query).get('forzar', ['0'])[-1] not in ('0', '')
+                return HTTPStatus.OK, await self.reload(force)
+            return HTTPStatus.OK, self.service.handle(method, target)
+        except RequestError as e:
+            return e.status, _to_json({"error": str(e)})
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            return HTTPStatus.INTERNAL_SERVER_ERROR, _to_json({"error": str(e)})
+
+    async def handle_connection(self, reader, writer):
+        """
+        Atén les peticions d'una connexió (amb keep-alive) fins que es tanca.
+
+        Args:
+            reader (asyncio.StreamReader): Flux d'entrada.
+            writer (asyncio.StreamWriter): Flux de sortida.
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    break
+
+                headers = {}
+                for _ in range(_MAX_HEADER_LINES):
+                    line = await reader.readline()
+                    if not line.strip():
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                keep_alive = (headers.get('connection', '').lower() != 'close'
+                              and version == 'HTTP/1.1')
+                try:
+                    length = int(headers.get('content-length') or 0)
+                    if length < 0:
+                        raise ValueError(length)
+                except ValueError:
+                    # Sense una longitud vàlida no se sap on acaba la petició.
+                    status, keep_alive = HTTPStatus.BAD_REQUEST, False
+                    body = _to_json({"error": "Content-Length no vàlid: "
+                                              f"{headers['content-length']}"})
+                else:
+                    # El cos de la petició no s'utilitza, però s'ha de consumir.
+                    if length:
+                        await reader.readexactly(length)
+                    status, body = await self.respond(method, target)
+                writer.write(
+                    f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                    "Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+                    .encode('latin-1') + body
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """
+        Obre el socket del servidor.
+
+        Args:
+            host (str, opcional): Adreça on escoltar.
+            port (int, opcional): Port on escoltar (0 per triar-ne un de lliure).
+        Returns:
+            asyncio.Server: Servidor iniciat.
+        """
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+
+async def _serve_forever(server, host, port):
+    """
+    Inicia el servidor i l'executa fins que s'interromp.
+
+    Args:
+        server (DatasetServer): Servidor a executar.
+        host (str): Adreça on escoltar.
+        port (int): Port on escoltar.
+    """
+    tcp_server = await server.start(host, port)
+    address = tcp_server.sockets[0].getsockname()
+    print(f"Servidor escoltant a http://{address[0]}:{address[1]}/ (Ctrl+C per aturar)")
+    async with tcp_server:
+        await tcp_server.serve_forever()
+
+
+def serve(path_rendiment, path_abandonament, host=DEFAULT_HOST, port=DEFAULT_PORT,
+          use_cache=True):
+    """
+    Carrega les dades un cop i les serveix per HTTP fins que s'interromp.
+
+    Args:
+        path_rendiment (str): Ruta al dataset de rendiment.
+        path_abandonament (str): Ruta al dataset d'abandonament.
+        host (str, opcional): Adreça on escoltar.
+        port (int, opcional): Port on escoltar.
+        use_cache (bool, opcional): Si s'ha d'utilitzar la memòria cau columnar.
+    """
+    service = DatasetService(path_rendiment, path_abandonament, use_cache=use_cache)
+    print("Carregant i fusionant les dades...")
+    service.load()
+    try:
+        asyncio.run(_serve_forever(DatasetServer(service), host, port))
+    except KeyboardInterrupt:
+        print("\nServidor aturat.")
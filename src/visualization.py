@@ -5,62 +5,237 @@ Aquest mòdul conté les eines per generar representacions gràfiques de l'evolu
 temporal de les mètriques educatives. Utilitza Matplotlib per crear subplots
 comparatius entre branques d'estudi i genera un arxiu
 .png que desarem al directori src/img/.
+
+Els gràfics es dibuixen amb l'API orientada a objectes de Matplotlib (Figure
+i el llenç Agg), sense l'estat global de pyplot, de manera que es poden
+generar en paral·lel des de src/charts.py.
 """
 import os
-import matplotlib.pyplot as plt
 
+import numpy as np
+import pandas as pd
+
+from src.render_cache import is_fresh, load_manifest, record, save_manifest, series_fingerprint
+
+YEAR_COL = 'Curs Acadèmic'
+PLOT_METRICS = ('% Abandonament a primer curs', 'Taxa rendiment')
 
-def plot_temporal_trends(df, student_name):
+
+class TrendSeries:
     """
-    Genera i desa gràfics de línies sobre l'evolució de l'abandonament i el rendiment.
+    Sèries temporals preparades per dibuixar.
 
-    Aquesta funció crea una figura amb dos subplots:
-    1. L'evolució del percentatge d'abandonament per branca i curs.
-    2. L'evolució de la taxa de rendiment per branca i curs.
-    La imatge resultant es desa automàticament a la carpeta src/img/.
+    Conté, per a cada mètrica, una matriu grup × curs amb la mitjana de cada
+    combinació, calculada amb una sola agrupació del dataset. Els grups
+    (branques, universitats, etc.) segueixen l'ordre en què apareixen per
+    primera vegada en ordenar el dataset per curs, i els cursos estan ordenats.
+    Qualsevol gràfic pot reutilitzar-la sense tornar a filtrar el dataset.
+
+    Attributes:
+        group_col (str | list): Columna o columnes d'agrupació. Amb diverses
+            columnes, cada grup és una tupla de valors.
+        groups (list): Valors del grup, en ordre de dibuix.
+        years (list): Cursos acadèmics ordenats.
+        values (dict): Matriu (grups × cursos) de mitjanes per a cada mètrica.
+        present (np.ndarray): Matriu booleana que indica quines combinacions
+            grup-curs tenen files al dataset.
+    """
+
+    def __init__(self, group_col, groups, years, values, present):
+        """
+        Inicialitza les sèries.
+
+        Args:
+            group_col (str | list): Columna o columnes d'agrupació.
+            groups (list): Valors del grup, en ordre de dibuix.
+            years (list): Cursos acadèmics ordenats.
+            values (dict): Matriu de mitjanes per a cada mètrica.
+            present (np.ndarray): Matriu booleana de combinacions amb dades.
+        """
+        self.group_col = group_col
+        self.groups = groups
+        self.years = years
+        self.values = values
+        self.present = present
+
+    def lines(self, metric):
+        """
+        Recorre les línies d'una mètrica, una per grup.
+
+        Args:
+            metric (str): Nom de la mètrica.
+        Yields:
+            tuple: (posició, grup, cursos amb dades, mitjanes d'aquests cursos).
+        """
+        years = np.asarray(self.years, dtype=object)
+        matrix = self.values[metric]
+        for i, group in enumerate(self.groups):
+            mask = self.present[i]
+            yield i, group, list(years[mask]), matrix[i, mask]
+
+    def subset(self, indices, labels=None):
+        """
+        Retorna les sèries d'una part dels grups.
+
+        Args:
+            indices (list): Posicions dels grups a conservar.
+            labels (list, opcional): Noms nous dels grups (per exemple, només
+                la branca d'un grup compost). Per defecte es mantenen.
+        Returns:
+            TrendSeries: Sèries dels grups seleccionats.
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        groups = list(labels) if labels is not None else [self.groups[i] for i in indices]
+        return TrendSeries(self.group_col, groups, self.years,
+                           {metric: matrix[indices] for metric, matrix in self.values.items()},
+                           self.present[indices])
+
+    def to_frame(self, metric):
+        """
+        Retorna una mètrica com a taula grup × curs.
+
+        Args:
+            metric (str): Nom de la mètrica.
+        Returns:
+            pd.DataFrame: Taula amb els grups com a índex i els cursos com a columnes.
+        """
+        if isinstance(self.group_col, str):
+            index = pd.Index(self.groups, name=self.group_col)
+        else:
+            index = pd.MultiIndex.from_tuples(self.groups, names=self.group_col)
+        return pd.DataFrame(self.values[metric], index=index,
+                            columns=pd.Index(self.years, name=YEAR_COL))
+
+
+def _factorize_groups(df, group_col):
+    """
+    Codifica la columna o columnes d'agrupació com a enters.
 
     Args:
-        df (pd.DataFrame): Dataset fusionat que conté la informació a representar gràficament.
-        student_name (str): Nom de l'estudiant que s'utilitzarà per generar el
-            nom del fitxer de sortida (format: evolucio_nom_cognom.png).
+        df (pd.DataFrame): Dataset.
+        group_col (str | list): Columna o columnes d'agrupació.
+    Returns:
+        np.ndarray: Codi del grup de cada fila (-1 si hi ha algun valor nul).
+        list: Valors de cada codi (tuples si hi ha diverses columnes).
+    """
+    if isinstance(group_col, str):
+        codes, uniques = pd.factorize(df[group_col])
+        return codes, list(uniques)
+
+    factorized = [pd.factorize(df[col]) for col in group_col]
+    shape = tuple(len(uniques) for _, uniques in factorized)
+    valid = np.logical_and.reduce([codes >= 0 for codes, _ in factorized])
+    combined = np.ravel_multi_index([np.maximum(codes, 0) for codes, _ in factorized], shape)
+
+    codes = np.full(len(df), -1, dtype=np.int64)
+    codes[valid], flat = pd.factorize(combined[valid])
+    positions = np.unravel_index(flat, shape)
+    columns = [uniques.take(pos) for (_, uniques), pos in zip(factorized, positions)]
+    return codes, list(zip(*columns))
 
+
+def build_trend_series(df, group_col='Branca', metrics=PLOT_METRICS):
+    """
+    Calcula les sèries de cada grup i curs amb una única agrupació.
+
+    Args:
+        df (pd.DataFrame): Dataset fusionat.
+        group_col (str | list, opcional): Columna o columnes d'agrupació.
+            Per defecte 'Branca'.
+        metrics (tuple, opcional): Mètriques a calcular.
     Returns:
-        None: La funció no retorna cap valor, però genera i desa un fitxer PNG.
+        TrendSeries: Sèries preparades per dibuixar.
     """
-    # Ordenem el dataframe per Curs Acadèmic (per default ascendent -> de més antic a més actual).
-    df = df.sort_values('Curs Acadèmic')
-    branches = df['Branca'].unique()
+    n_rows = len(df)
+    group_codes, groups = _factorize_groups(df, group_col)
+    year_codes, years = pd.factorize(df[YEAR_COL], sort=True)
+    n_groups, n_years = len(groups), len(years)
 
-    # Creem el gràfic amb 2 subplots: taxa de rendiment acadèmic i % abandonament acadèmic.
-    _, (ax1, ax2) = plt.subplots(2, 1, figsize=(14, 10))
+    # Ordre dels grups: primer curs on apareixen i, dins d'aquest curs, primera fila.
+    valid = (group_codes >= 0) & (year_codes >= 0)
+    first = np.full(n_groups, np.iinfo(np.int64).max, dtype=np.int64)
+    rank = year_codes.astype(np.int64) * n_rows + np.arange(n_rows, dtype=np.int64)
+    np.minimum.at(first, group_codes[valid], rank[valid])
+    order = np.argsort(first, kind='stable')
 
-    # Definim els colors.
-    colors = plt.get_cmap('tab10').colors
+    # Una sola agrupació per la cel·la grup-curs per a totes les mètriques.
+    cells = group_codes[valid].astype(np.int64) * n_years + year_codes[valid]
+    grouped = df.loc[valid, list(metrics)].groupby(cells, sort=False).mean()
+    flat_index = grouped.index.to_numpy()
 
-    # SUBPLOT 1: Abandonament acadèmic.
-    for i, branch in enumerate(branches):
-        subset = df[df['Branca'] == branch]
-        # Agrupem per curs perquè hi ha diverses files per branca i calculem la mitjana.
-        plot_data = subset.groupby('Curs Acadèmic')['% Abandonament a primer curs'].mean()
+    present = np.zeros(n_groups * n_years, dtype=bool)
+    present[flat_index] = True
+    values = {}
+    for metric in metrics:
+        matrix = np.full(n_groups * n_years, np.nan)
+        matrix[flat_index] = grouped[metric].to_numpy(dtype=float)
+        values[metric] = matrix.reshape(n_groups, n_years)[order]
+
+    return TrendSeries(group_col, [groups[i] for i in order], list(years),
+                       values, present.reshape(n_groups, n_years)[order])
+
+
+def tab10_colors(groups):
+    """
+    Assigna a cada grup un color de la paleta tab10, en ordre.
+
+    Args:
+        groups (list): Grups en ordre de dibuix.
+    Returns:
+        dict: Color de cada grup.
+    """
+    from matplotlib import colormaps  # pylint: disable=import-outside-toplevel
+
+    colors = colormaps['tab10'].colors
+    return {group: colors[i % 10] for i, group in enumerate(groups)}
 
-        ax1.plot(plot_data.index, plot_data.values, marker='o', label=branch, color=colors[i % 10])
+
+def draw_trend_lines(ax, series, metric, colors, marker='o'):
+    """
+    Dibuixa una línia per grup amb l'evolució d'una mètrica.
+
+    Args:
+        ax (matplotlib.axes.Axes): Eixos on dibuixar.
+        series (TrendSeries): Sèries a dibuixar.
+        metric (str): Mètrica a dibuixar.
+        colors (dict): Color de cada grup.
+        marker (str, opcional): Marcador dels punts.
+    """
+    for _, group, years, means in series.lines(metric):
+        ax.plot(years, means, marker=marker, label=group, color=colors[group])
+
+
+def draw_trends_figure(fig, series, colors=None, subtitle=None):
+    """
+    Dibuixa a una figura els dos subplots d'abandonament i rendiment per curs.
+
+    Args:
+        fig (matplotlib.figure.Figure): Figura buida on dibuixar.
+        series (TrendSeries): Sèries a dibuixar, una línia per grup.
+        colors (dict, opcional): Color de cada grup. Per defecte, tab10 en ordre.
+        subtitle (str, opcional): Text que s'afegeix als títols (ex: 'UAB').
+    """
+    colors = colors or tab10_colors(series.groups)
+    suffix = f" ({subtitle})" if subtitle else ""
+
+    # Creem el gràfic amb 2 subplots: taxa de rendiment acadèmic i % abandonament acadèmic.
+    ax1, ax2 = fig.subplots(2, 1)
+
+    # SUBPLOT 1: Abandonament acadèmic.
+    draw_trend_lines(ax1, series, '% Abandonament a primer curs', colors, marker='o')
 
     # Afegim informació general del gràfic: títol, etiqueta, llegenda.
-    ax1.set_title("Evolució del % d'Abandonament per curs acadèmic", fontsize=14, fontweight='bold')
+    ax1.set_title(f"Evolució del % d'Abandonament per curs acadèmic{suffix}",
+                  fontsize=14, fontweight='bold')
     ax1.set_ylabel("% Abandonament")
     ax1.grid(True, linestyle='--', alpha=0.7)
     ax1.legend(title="Branques", bbox_to_anchor=(1.05, 1), loc='upper left')
 
     # SUBPLOT 2: Rendiment acadèmic.
-    for i, branch in enumerate(branches):
-        subset = df[df['Branca'] == branch]
-        # Fem el mateix que amb l'abandonament, agrupem per curs i calculem la mitjana.
-        plot_data = subset.groupby('Curs Acadèmic')['Taxa rendiment'].mean()
-
-        ax2.plot(plot_data.index, plot_data.values, marker='s', label=branch, color=colors[i % 10])
+    draw_trend_lines(ax2, series, 'Taxa rendiment', colors, marker='s')
 
     # Afegim informació general del gràfic: títol, etiquetes, llegenda.
-    ax2.set_title("Evolució de la Taxa de Rendiment per curs acadèmic",
+    ax2.set_title(f"Evolució de la Taxa de Rendiment per curs acadèmic{suffix}",
                   fontsize=14,
                   fontweight='bold'
                   )
@@ -70,8 +245,52 @@ def plot_temporal_trends(df, student_name):
     ax2.legend(title="Branques", bbox_to_anchor=(1.05, 1), loc='upper left')
 
     # Ajustaments finals de format
-    plt.xticks(rotation=45)
-    plt.tight_layout()
+    ax2.tick_params(axis='x', labelrotation=45)
+    fig.tight_layout()
+
+
+def new_figure(figsize):
+    """
+    Crea una figura amb el llenç Agg, sense registrar-la a pyplot.
+
+    Args:
+        figsize (tuple): Mida de la figura en polzades.
+    Returns:
+        matplotlib.figure.Figure: Figura nova.
+    """
+    # pylint: disable=import-outside-toplevel
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def plot_temporal_trends(df, student_name, series=None, use_cache=True):
+    """
+    Genera i desa gràfics de línies sobre l'evolució de l'abandonament i el rendiment.
+
+    Aquesta funció crea una figura amb dos subplots:
+    1. L'evolució del percentatge d'abandonament per branca i curs.
+    2. L'evolució de la taxa de rendiment per branca i curs.
+    La imatge resultant es desa automàticament a la carpeta src/img/.
+
+    Args:
+        df (pd.DataFrame): Dataset fusionat que conté la informació a representar gràficament.
+        student_name (str): Nom de l'estudiant que s'utilitzarà per generar el
+            nom del fitxer de sortida (format: evolucio_nom_cognom.png).
+        series (TrendSeries, opcional): Sèries per branca ja calculades amb
+            build_trend_series. Si no s'indiquen, es calculen a partir de df.
+        use_cache (bool, opcional): Si és True (per defecte), no es torna a
+            desar la imatge quan les sèries i els paràmetres no han canviat.
+
+    Returns:
+        None: La funció no retorna cap valor, però genera i desa un fitxer PNG.
+    """
+    # Calculem d'entrada la mitjana de cada branca i curs per a les dues mètriques.
+    if series is None:
+        series = build_trend_series(df, 'Branca')
 
     # Desem la visualització a la carpeta src/img.
     output_dir = "src/img"
@@ -82,5 +301,22 @@ def plot_temporal_trends(df, student_name):
     filename = f"evolucio_{student_name.lower().replace(' ', '_')}.png"
     save_path = os.path.join(output_dir, filename)
 
-    plt.savefig(save_path, dpi=300, bbox_inches='tight')
+    # Si les dades dibuixades no han canviat, reutilitzem la imatge existent.
+    manifest = load_manifest(output_dir)
+    fingerprint = series_fingerprint([series], {"figure": "evolucio", "dpi": 300,
+                                                "figsize": [14, 10]})
+    if use_cache and is_fresh(manifest, filename, fingerprint):
+        print(f"Gràfic sense canvis, es manté: {save_path}")
+        return
+
+    fig = new_figure((14, 10))
+    try:
+        draw_trends_figure(fig, series)
+        fig.savefig(save_path, dpi=300, bbox_inches='tight')
+    finally:
+        # Alliberem la figura explícitament: no està registrada a pyplot.
+        fig.clear()
     print(f"Gràfic desat correctament a: {save_path}")
+
+    record(manifest, filename, fingerprint, [save_path])
+    save_manifest(output_dir, manifest)
@@ -2,10 +2,12 @@
 Tests unitaris per a l'exercici 1: Càrrega de Datasets.
 """
 
+import os
+import tempfile
 import unittest
 from unittest.mock import patch
 import pandas as pd
-from src.data_loader import load_dataset
+from src.data_loader import load_dataset, iter_dataset_batches, load_datasets_parallel
 
 
 class TestExercici1(unittest.TestCase):
@@ -68,6 +70,52 @@ class TestExercici1(unittest.TestCase):
         mock_exists.assert_called_with("data/rendiment_estudiants.xlsx")
         mock_read_excel.assert_called_with("data/rendiment_estudiants.xlsx")
 
+    def test_iter_dataset_batches(self):
+        """Verifica que la lectura per lots retorna el mateix que read_excel."""
+        df = pd.DataFrame({
+            'Branca': ['Salut', 'Arts', 'Ciències', 'Salut', 'Arts'],
+            'Taxa rendiment': [0.8, 1, None, 0.5, 0.25]
+        })
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "dades.xlsx")
+            df.to_excel(path, index=False)
+
+            batches = list(iter_dataset_batches(path, batch_size=2))
+
+        self.assertEqual([len(b) for b in batches], [2, 2, 1])
+        pd.testing.assert_frame_equal(pd.concat(batches, ignore_index=True), df)
+
+    def test_iter_dataset_batches_rejects_late_text(self):
+        """Verifica que el text d'una columna numèrica en un lot posterior dona error."""
+        df = pd.DataFrame({
+            'Branca': ['Salut', 'Arts', 'Ciències'],
+            'Taxa rendiment': [0.8, 0.5, 'n/d']
+        })
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "dades.xlsx")
+            df.to_excel(path, index=False)
+
+            with self.assertRaisesRegex(ValueError, "'Taxa rendiment'.*fila 4"):
+                list(iter_dataset_batches(path, batch_size=2))
+            # En un sol lot la columna no es considera numèrica i el text es conserva.
+            self.assertEqual(next(iter_dataset_batches(path))['Taxa rendiment'].tolist(),
+                             [0.8, 0.5, 'n/d'])
+
+    def test_load_datasets_parallel(self):
+        """Verifica la càrrega en paral·lel i que els errors s'informen per fitxer."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path_a = os.path.join(tmp_dir, "a.xlsx")
+            path_b = os.path.join(tmp_dir, "b.xlsx")
+            pd.DataFrame({'col1': [1, 2]}).to_excel(path_a, index=False)
+            pd.DataFrame({'col2': [3]}).to_excel(path_b, index=False)
+            missing = os.path.join(tmp_dir, "no_existeixo.xlsx")
+
+            results = load_datasets_parallel([path_a, missing, path_b], max_workers=2)
+
+        self.assertEqual(results[0]['col1'].tolist(), [1, 2])
+        self.assertIsInstance(results[1], FileNotFoundError)
+        self.assertEqual(results[2]['col2'].tolist(), [3])
+
 
 if __name__ == '__main__':
     unittest.main()
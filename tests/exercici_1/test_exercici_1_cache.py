@@ -0,0 +1,99 @@
+"""
+Tests unitaris per a la memòria cau columnar de l'exercici 1.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+import pandas as pd
+from src import data_cache
+from src.data_loader import load_dataset
+
+
+@unittest.skipUnless(data_cache.is_cache_available(), "pyarrow no està instal·lat")
+class TestDataCache(unittest.TestCase):
+    """Suite de tests per a la memòria cau dels datasets."""
+
+    def setUp(self):
+        """Crea un fitxer Excel petit i una carpeta de memòria cau temporal."""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.tmp_dir, "cache")
+        self.xlsx_path = os.path.join(self.tmp_dir, "dades.xlsx")
+        pd.DataFrame({
+            'Branca': ['Salut', 'Salut', 'Arts', 'Arts'],
+            'Sexe': ['DONA', 'HOME', 'DONA', 'HOME'],
+            'Taxa rendiment': [0.8, 0.7, 0.6, 0.9]
+        }).to_excel(self.xlsx_path, index=False)
+
+        self.patcher = patch.object(data_cache, 'CACHE_DIR', self.cache_dir)
+        self.patcher.start()
+
+    def tearDown(self):
+        """Elimina els fitxers temporals."""
+        self.patcher.stop()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_second_load_skips_excel(self):
+        """Verifica que la segona càrrega no torna a llegir l'Excel."""
+        first = load_dataset(self.xlsx_path, use_cache=True)
+
+        with patch('pandas.read_excel') as mock_read_excel:
+            second = load_dataset(self.xlsx_path, use_cache=True)
+            mock_read_excel.assert_not_called()
+
+        pd.testing.assert_frame_equal(first, second)
+        self.assertEqual(second['Branca'].dtype, 'category')
+
+    def test_same_types_without_cache(self):
+        """Verifica que la memòria cau no canvia els tipus del dataset carregat."""
+        direct = load_dataset(self.xlsx_path)
+        self.assertEqual(direct['Branca'].dtype, 'category')
+        pd.testing.assert_frame_equal(load_dataset(self.xlsx_path, use_cache=True), direct)
+
+    def test_unsupported_column_is_not_cached(self):
+        """Verifica que una columna amb números i text es carrega sense desar-la."""
+        pd.DataFrame({'Sigles': ['UB', 7, 'UAB', 'UB'], 'Taxa rendiment': [0.8, 0.7, 0.6, 0.9]}
+                     ).to_excel(self.xlsx_path, index=False)
+
+        df = load_dataset(self.xlsx_path, use_cache=True)
+
+        pd.testing.assert_frame_equal(df, load_dataset(self.xlsx_path))
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+    def test_read_only_cache_hit(self):
+        """Verifica que una entrada es llegeix encara que no se'n pugui actualitzar la data."""
+        first = load_dataset(self.xlsx_path, use_cache=True)
+
+        with patch('os.utime', side_effect=PermissionError), \
+                patch('pandas.read_excel') as mock_read_excel:
+            second = load_dataset(self.xlsx_path, use_cache=True)
+            mock_read_excel.assert_not_called()
+
+        pd.testing.assert_frame_equal(first, second)
+
+    def test_modified_file_invalidates_entry(self):
+        """Verifica que un canvi al fitxer genera una entrada nova i esborra l'antiga."""
+        load_dataset(self.xlsx_path, use_cache=True)
+        pd.DataFrame({'Branca': ['Ciències'], 'Taxa rendiment': [0.5]}).to_excel(
+            self.xlsx_path, index=False
+        )
+
+        df = load_dataset(self.xlsx_path, use_cache=True)
+
+        self.assertEqual(len(df), 1)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+    def test_invalidate_and_size_limit(self):
+        """Verifica la invalidació explícita i el límit de mida."""
+        load_dataset(self.xlsx_path, use_cache=True)
+        self.assertEqual(data_cache.enforce_size_limit(self.cache_dir, max_bytes=0), 1)
+
+        load_dataset(self.xlsx_path, use_cache=True)
+        self.assertEqual(data_cache.invalidate_cache(self.xlsx_path), 1)
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+"""
+Tests unitaris per a la càrrega de datasets repartits en diversos fitxers.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+import pandas as pd
+from src.data_loader import concat_datasets, iter_dataset_files_batches, load_dataset_groups
+from src.dataset_files import expand_dataset_paths, is_multi_file
+
+
+class TestMultiFileLoading(unittest.TestCase):
+    """Suite de tests per a carpetes, patrons glob, esquemes i concatenació."""
+
+    def setUp(self):
+        """Desa un fitxer de rendiment per curs i un d'abandonament en una carpeta temporal."""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.years = []
+        for i, year in enumerate(['20-21', '21-22', '22-23']):
+            frame = pd.DataFrame({
+                'Curs Acadèmic': [year] * 2,
+                'Sigles': ['UB', 'UAB'],
+                'Taxa rendiment': [0.7 + i / 10, 0.6 + i / 10]
+            })
+            frame.to_excel(os.path.join(self.tmp_dir, f"rendiment_{year}.xlsx"), index=False)
+            self.years.append(frame)
+        pd.DataFrame({'Curs Acadèmic': ['20-21'], 'Sigles': ['UB'],
+                      '% Abandonament a primer curs': [0.1]}).to_excel(
+            os.path.join(self.tmp_dir, "abandonament.xlsx"), index=False
+        )
+
+    def tearDown(self):
+        """Elimina la carpeta temporal."""
+        shutil.rmtree(self.tmp_dir)
+
+    def test_expand_paths(self):
+        """Verifica l'expansió de carpetes i patrons i l'error si no hi ha cap fitxer."""
+        pattern = os.path.join(self.tmp_dir, "rendiment_*.xlsx")
+
+        self.assertEqual(len(expand_dataset_paths(self.tmp_dir)), 4)
+        self.assertEqual([os.path.basename(p) for p in expand_dataset_paths(pattern)],
+                         ['rendiment_20-21.xlsx', 'rendiment_21-22.xlsx', 'rendiment_22-23.xlsx'])
+        self.assertEqual(expand_dataset_paths("un_fitxer.xlsx"), ["un_fitxer.xlsx"])
+        with self.assertRaises(FileNotFoundError):
+            expand_dataset_paths(os.path.join(self.tmp_dir, "*.csv"))
+
+    def test_file_name_with_glob_characters(self):
+        """Verifica que un fitxer existent amb '[' al nom no es tracta com un patró."""
+        path = os.path.join(self.tmp_dir, "rendiment [2023].xlsx")
+        self.years[0].to_excel(path, index=False)
+
+        self.assertFalse(is_multi_file(path))
+        self.assertEqual(expand_dataset_paths(path), [path])
+        pd.testing.assert_frame_equal(load_dataset_groups([path])[0],
+                                      self.years[0].astype({'Curs Acadèmic': 'category'}))
+
+    def test_load_groups_concatenates_and_checks_schema(self):
+        """Verifica la concatenació per dataset i el rebuig d'esquemes diferents."""
+        perf, drop, mixed = load_dataset_groups([
+            os.path.join(self.tmp_dir, "rendiment_*.xlsx"),
+            os.path.join(self.tmp_dir, "abandonament.xlsx"),
+            self.tmp_dir
+        ], max_workers=2)
+
+        # Cada curs és una categoria del seu fitxer i la concatenació les uneix.
+        pd.testing.assert_frame_equal(perf, pd.concat(self.years, ignore_index=True).astype(
+            {'Curs Acadèmic': 'category'}))
+        self.assertEqual(len(drop), 1)
+        self.assertIsInstance(mixed, ValueError)
+        self.assertEqual(sum(len(batch) for batch in iter_dataset_files_batches(
+            os.path.join(self.tmp_dir, "rendiment_*.xlsx"), batch_size=4)), 6)
+
+    def test_concat_keeps_categories(self):
+        """Verifica que les columnes categòriques es concatenen amb un vocabulari comú."""
+        frames = [frame.astype({'Sigles': 'category'}) for frame in self.years]
+        frames[2] = frames[2].assign(Sigles=pd.Categorical(['UdG', 'UB']))
+
+        result = concat_datasets(frames)
+
+        self.assertIsInstance(result['Sigles'].dtype, pd.CategoricalDtype)
+        self.assertEqual(result['Sigles'].cat.categories.tolist(), ['UAB', 'UB', 'UdG'])
+        self.assertEqual(result['Sigles'].tolist(), ['UB', 'UAB'] * 2 + ['UdG', 'UB'])
+        self.assertIs(concat_datasets(frames[:1]), frames[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
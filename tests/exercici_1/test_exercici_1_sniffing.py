@@ -0,0 +1,83 @@
+"""
+Tests unitaris per a la identificació dels fitxers de dades per la capçalera.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+import pandas as pd
+from src.data_processing import GROUP_COLS, clean_and_homogenize
+from src.dataset_files import DATASET_SCHEMAS, read_header, sniff_dataset, sniff_dataset_files
+
+
+class TestSniffing(unittest.TestCase):
+    """Suite de tests per a la lectura de la capçalera i la validació de columnes."""
+
+    def setUp(self):
+        """Desa un fitxer de cada tipus amb les columnes mínimes i una columna extra."""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.paths = {}
+        for kind, columns in DATASET_SCHEMAS.items():
+            frame = pd.DataFrame([[f"{col} {i}" for col in columns] for i in range(3)],
+                                 columns=columns).assign(Estudi='Medicina')
+            self.paths[kind] = os.path.join(self.tmp_dir, f"{kind}.xlsx")
+            frame.to_excel(self.paths[kind], index=False)
+
+    def tearDown(self):
+        """Elimina la carpeta temporal."""
+        shutil.rmtree(self.tmp_dir)
+
+    def _write(self, name, frame):
+        """Desa un DataFrame a la carpeta temporal i en retorna la ruta."""
+        path = os.path.join(self.tmp_dir, name)
+        frame.to_excel(path, index=False)
+        return path
+
+    def test_sniff_by_columns(self):
+        """Verifica el tipus, les columnes i el nombre de files, independentment del nom."""
+        header, n_rows = read_header(self.paths['abandonament'])
+        result = sniff_dataset(self.paths['rendiment'])
+
+        self.assertEqual(header, DATASET_SCHEMAS['abandonament'] + ['Estudi'])
+        self.assertEqual(n_rows, 3)
+        self.assertEqual((result['tipo'], result['filas']), ('rendiment', 3))
+        renamed = os.path.join(self.tmp_dir, "abandonament_fals.xlsx")
+        shutil.copy(self.paths['rendiment'], renamed)
+        self.assertEqual(sniff_dataset(renamed)['tipo'], 'rendiment')
+
+    def test_rejects_invalid_files(self):
+        """Verifica el rebuig de columnes que falten, tipus ambigus i fitxers no Excel."""
+        missing = self._write("sense_sigles.xlsx", pd.DataFrame(
+            columns=[c for c in DATASET_SCHEMAS['rendiment'] if c != 'Sigles']))
+        ambiguous = self._write("ambigu.xlsx", pd.DataFrame(
+            columns=DATASET_SCHEMAS['rendiment'] + ['% Abandonament a primer curs']))
+        not_excel = os.path.join(self.tmp_dir, "text.xlsx")
+        with open(not_excel, 'w', encoding='utf-8') as f:
+            f.write("Curs Acadèmic;Taxa rendiment\n")
+
+        with self.assertRaisesRegex(ValueError, "Sigles"):
+            sniff_dataset(missing)
+        for path in (ambiguous, not_excel):
+            with self.assertRaises(ValueError):
+                sniff_dataset(path)
+        with self.assertRaises(FileNotFoundError):
+            sniff_dataset(os.path.join(self.tmp_dir, "no_existeix.xlsx"))
+
+    def test_sniff_files_and_schemas(self):
+        """Verifica els patrons amb tipus barrejats i que els esquemes són els que es netegen."""
+        self.assertEqual(sniff_dataset_files(os.path.join(self.tmp_dir, "rend*.xlsx")),
+                         'rendiment')
+        with self.assertRaisesRegex(ValueError, "barreja"):
+            sniff_dataset_files(self.tmp_dir)
+
+        perf, drop = clean_and_homogenize(
+            pd.DataFrame(columns=DATASET_SCHEMAS['rendiment']),
+            pd.DataFrame(columns=DATASET_SCHEMAS['abandonament'])
+        )
+        self.assertEqual(set(perf.columns), set(GROUP_COLS) | {'Taxa rendiment'})
+        self.assertEqual(set(drop.columns), set(GROUP_COLS) | {'% Abandonament a primer curs'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+"""
+Tests de temps d'arrencada del punt d'entrada main.py.
+
+Comproven que importar main.py o els mòduls d'una etapa no carrega les
+llibreries pesades que només necessiten les etapes posteriors, i que el
+temps d'importació de main.py es manté per sota d'un llindar.
+"""
+
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Temps màxim d'importació acumulat de main.py (en microsegons).
+MAX_MAIN_IMPORT_US = 500_000
+
+
+def _run_python(code, *flags):
+    """Executa codi en un intèrpret nou des de l'arrel del projecte."""
+    result = subprocess.run(
+        [sys.executable, *flags, "-c", code],
+        cwd=ROOT_DIR, capture_output=True, text=True, check=True
+    )
+    return result
+
+
+def _loaded_modules(module):
+    """Retorna els mòduls pesats carregats després d'importar un mòdul."""
+    code = (
+        f"import sys, {module}; "
+        "print(' '.join(m for m in ('pandas', 'scipy', 'matplotlib', 'pyarrow', 'openpyxl') "
+        "if m in sys.modules))"
+    )
+    return set(_run_python(code).stdout.split())
+
+
+class TestStartup(unittest.TestCase):
+    """Suite de tests per a les importacions diferides."""
+
+    def test_main_does_not_import_scientific_stack(self):
+        """Verifica que importar main.py no carrega cap llibreria pesada."""
+        self.assertEqual(_loaded_modules("main"), set())
+
+    def test_loader_does_not_import_plotting_or_stats(self):
+        """Verifica que l'etapa de càrrega no carrega matplotlib ni scipy."""
+        loaded = _loaded_modules("src.data_loader")
+        self.assertNotIn('matplotlib', loaded)
+        self.assertNotIn('scipy', loaded)
+
+    def test_sniffing_uses_only_standard_library(self):
+        """Verifica que identificar un fitxer per la capçalera no carrega pandas ni openpyxl."""
+        self.assertEqual(_loaded_modules("src.dataset_files"), set())
+
+    def test_results_database_uses_only_standard_library(self):
+        """Verifica que consultar la base de dades de resultats no carrega pandas."""
+        self.assertEqual(_loaded_modules("src.results_db"), set())
+
+    def test_analysis_and_visualization_defer_heavy_imports(self):
+        """Verifica que scipy i matplotlib només es carreguen en executar l'etapa."""
+        self.assertNotIn('scipy', _loaded_modules("src.analysis"))
+        self.assertNotIn('matplotlib', _loaded_modules("src.visualization"))
+
+    def test_main_import_time_budget(self):
+        """Verifica que el temps d'importació de main.py no supera el llindar."""
+        stderr = _run_python("import main", "-X", "importtime").stderr
+        main_line = [line for line in stderr.splitlines() if line.rstrip().endswith("| main")]
+        cumulative_us = int(main_line[-1].split("|")[1])
+
+        self.assertLess(cumulative_us, MAX_MAIN_IMPORT_US)
+
+
+if __name__ == '__main__':
+    unittest.main()
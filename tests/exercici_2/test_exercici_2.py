@@ -6,8 +6,12 @@ l'agregació per branques i la fusió final (merge) dels datasets.
 """
 
 import unittest
+import numpy as np
 import pandas as pd
-from src.data_processing import clean_and_homogenize, aggregate_by_branch, merge_datasets
+from src.data_processing import (
+    clean_and_homogenize, aggregate_by_branch, aggregate_by_branch_batches, merge_datasets,
+    encode_group_keys
+)
 
 
 class TestExercici2(unittest.TestCase):
@@ -60,6 +64,43 @@ class TestExercici2(unittest.TestCase):
         self.assertNotIn('Crèdits ordinaris superats', df_p.columns)
         self.assertNotIn('Universitat', df_p.columns)
 
+    def test_clean_and_homogenize_dtypes(self):
+        """Verifica les categories comunes, la reducció sense pèrdua i l'absència de còpies."""
+        self.aband_data['% Abandonament a primer curs'] = [0.25, 0.5]
+        df_p, df_a = clean_and_homogenize(self.perf_data, self.aband_data)
+
+        # El mateix valor té el mateix codi als dos datasets.
+        self.assertEqual(df_p['Sexe'].dtype, df_a['Sexe'].dtype)
+        self.assertEqual(df_p['Sexe'].cat.categories.tolist(), ['Dona', 'Home'])
+        self.assertEqual(df_p['Sexe'].cat.codes.tolist(), df_a['Sexe'].cat.codes.tolist())
+
+        # Només es redueix a float32 la mètrica que no perd precisió.
+        self.assertEqual(df_a['% Abandonament a primer curs'].dtype, np.float32)
+        self.assertEqual(df_p['Taxa rendiment'].dtype, np.float64)
+        self.assertTrue(np.shares_memory(df_p['Taxa rendiment'].to_numpy(),
+                                         self.perf_data['Taxa rendiment'].to_numpy()))
+        self.assertEqual(self.perf_data['Sexe'].dtype, object)
+
+        # L'agregació continua en float64 i la fusió dona el mateix resultat.
+        merged = merge_datasets(aggregate_by_branch(df_p, 'Taxa rendiment'),
+                                aggregate_by_branch(df_a, '% Abandonament a primer curs'))
+        self.assertEqual(merged['% Abandonament a primer curs'].dtype, np.float64)
+        self.assertEqual(merged['Sexe'].tolist(), ['Dona', 'Home'])
+
+    def test_clean_and_homogenize_mixed_type_keys(self):
+        """Verifica la neteja i la fusió quan una columna de la clau barreja números i text."""
+        self.perf_data['Sigles'] = ['UB', 7]
+        self.aband_data['Sigles'] = ['UB', 7]
+        df_p, df_a = clean_and_homogenize(self.perf_data, self.aband_data)
+
+        self.assertEqual(df_p['Sigles'].cat.categories.tolist(), [7, 'UB'])
+        self.assertEqual(df_p['Sigles'].dtype, df_a['Sigles'].dtype)
+
+        merged = merge_datasets(aggregate_by_branch(df_p, 'Taxa rendiment'),
+                                aggregate_by_branch(df_a, '% Abandonament a primer curs'))
+        self.assertEqual(merged[['Sigles', 'Sexe']].values.tolist(), [[7, 'Home'], ['UB', 'Dona']])
+        self.assertEqual(merged['% Abandonament a primer curs'].tolist(), [0.2, 0.1])
+
     def test_aggregate_by_branch(self):
         """Verifica que l'agrupació calcula correctament la mitjana."""
         # Creem un cas amb dues files que s'han d'agrupar en una.
@@ -80,6 +121,61 @@ class TestExercici2(unittest.TestCase):
         self.assertEqual(len(df_res), 1)
         self.assertEqual(df_res['Valor'].iloc[0], 15.0)
 
+    def test_aggregate_by_branch_batches(self):
+        """Verifica que l'agregació per lots coincideix amb l'agregació completa."""
+        df_to_group = pd.DataFrame({
+            'Curs Acadèmic': ['21-22', '21-22', '21-22', '22-23', '22-23'],
+            'Tipus universitat': ['P', 'P', 'P', 'P', 'P'],
+            'Sigles': ['U', 'U', 'U', 'U', 'U'],
+            'Tipus Estudi': ['G', 'G', 'G', 'G', 'G'],
+            'Branca': ['B', 'B', 'B', 'B', 'B'],
+            'Sexe': ['D', 'D', 'H', 'D', 'D'],
+            'Integrat S/N': ['S', 'S', 'S', 'S', 'S'],
+            'Valor': [10.0, 20.0, 5.0, None, 30.0]
+        })
+        batches = [df_to_group.iloc[i:i + 2] for i in range(0, len(df_to_group), 2)]
+
+        df_res = aggregate_by_branch_batches(batches, 'Valor')
+
+        pd.testing.assert_frame_equal(df_res, aggregate_by_branch(df_to_group, 'Valor'))
+
+    def test_encode_group_keys_shared(self):
+        """Verifica que la clau codificada és comuna als dos datasets i manté l'ordre."""
+        df_a = pd.DataFrame({'X': ['b', 'a', 'b', None], 'Y': ['1', '2', '1', '1']})
+        df_b = pd.DataFrame({'X': ['a', 'c'], 'Y': ['2', '1']})
+
+        keys_a, keys_b = encode_group_keys(df_a, df_b, cols=['X', 'Y'])
+
+        # Files iguals tenen la mateixa clau, també entre datasets diferents.
+        self.assertEqual(keys_a[0], keys_a[2])
+        self.assertEqual(keys_a[1], keys_b[0])
+        # L'ordre de les claus segueix l'ordre de les etiquetes i els nuls van primer.
+        self.assertLess(keys_a[3], keys_a[1])
+        self.assertLess(keys_a[1], keys_a[0])
+        self.assertLess(keys_a[0], keys_b[1])
+
+    def test_mixed_type_keys(self):
+        """Verifica l'agregació i la fusió amb una columna de la clau amb números i text."""
+        df = pd.DataFrame({
+            'Curs Acadèmic': ['21-22'] * 5, 'Tipus universitat': ['P'] * 5,
+            'Sigles': ['UB', 3, 'UAB', 3, 'UB'], 'Tipus Estudi': ['G'] * 5,
+            'Branca': ['B'] * 5, 'Sexe': ['D'] * 5, 'Integrat S/N': ['S'] * 5,
+            'Valor': [1.0, 2.0, 3.0, 4.0, 5.0]
+        })
+
+        df_res = aggregate_by_branch(df, 'Valor')
+
+        # Mateix resultat i ordre que groupby: els números van abans que el text.
+        expected = df.groupby(
+            ['Curs Acadèmic', 'Tipus universitat', 'Sigles', 'Tipus Estudi', 'Branca',
+             'Sexe', 'Integrat S/N']
+        )['Valor'].mean().reset_index()
+        pd.testing.assert_frame_equal(df_res, expected)
+        self.assertEqual(df_res['Sigles'].tolist(), [3, 'UAB', 'UB'])
+
+        merged = merge_datasets(df_res, df_res.rename(columns={'Valor': 'Altre'}).head(2))
+        self.assertEqual(merged['Sigles'].tolist(), [3, 'UAB'])
+
     def test_merge_datasets_inner(self):
         """Verifica que la fusió inner només manté les files coincidents."""
         # Preparem dades ja netejades i agregades.
@@ -0,0 +1,128 @@
+"""
+Tests unitaris de paritat entre els motors de càlcul de l'agregació i la fusió.
+"""
+
+import unittest
+from unittest import mock
+import numpy as np
+import pandas as pd
+from src import engines
+from src.data_processing import (
+    GROUP_COLS, clean_and_homogenize, aggregate_by_branch, merge_datasets
+)
+from src.engines import check_engine, is_engine_available
+from src.pipeline import merged_dataset_pipeline
+
+
+def _raw_datasets(n_rows=400, seed=0):
+    """Genera dos datasets originals amb grups repetits, valors nuls i claus sense parella."""
+    rng = np.random.default_rng(seed)
+
+    def column(values):
+        return rng.choice(values, n_rows)
+
+    common = {
+        'Curs Acadèmic': column(['19-20', '20-21', '21-22']),
+        'Sigles': column(['UB', 'UAB', 'UdL', 'UPF']),
+        'Tipus Estudi': column(['grau', 'màster']),
+        'Branca': column(['Salut', 'Ciències', 'Enginyeria i Arquitectura']),
+    }
+    perf = pd.DataFrame({
+        **common,
+        'Tipus universitat': column(['PÚBLICA', 'PRIVADA']),
+        'Sexe': column(['DONA', 'HOME']),
+        'Integrat S/N': column(['Integrat', 'Adscrit']),
+        'Taxa rendiment': rng.random(n_rows),
+    })
+    drop = pd.DataFrame({
+        **{col: values[::-1] for col, values in common.items()},
+        'Naturalesa universitat responsable': column(['PÚBLICA', 'PRIVADA']),
+        'Sexe Alumne': column(['DONA', 'HOME']),
+        'Tipus de centre': column(['Integrat', 'Adscrit']),
+        '% Abandonament a primer curs': rng.random(n_rows).astype(np.float32).astype(np.float64),
+    })
+    perf.loc[::37, 'Taxa rendiment'] = np.nan
+    perf.loc[5, 'Branca'] = None
+    drop.loc[11, 'Sigles'] = None
+    return perf, drop
+
+
+class TestEngines(unittest.TestCase):
+    """Suite de tests per comprovar que tots els motors donen el resultat de pandas."""
+
+    def setUp(self):
+        """Prepara els datasets netejats i el resultat de referència amb pandas."""
+        self.clean = clean_and_homogenize(*_raw_datasets())
+        self.expected = self._run('pandas')
+
+    def _run(self, engine):
+        """Agrega i fusiona els datasets netejats amb un motor."""
+        perf_agg = aggregate_by_branch(self.clean[0], 'Taxa rendiment', engine=engine)
+        drop_agg = aggregate_by_branch(self.clean[1], '% Abandonament a primer curs',
+                                       engine=engine)
+        return perf_agg, drop_agg, merge_datasets(perf_agg, drop_agg, engine=engine)
+
+    def _assert_parity(self, engine):
+        """Compara els tres resultats d'un motor amb els de pandas."""
+        for expected, result in zip(self.expected, self._run(engine)):
+            pd.testing.assert_frame_equal(result, expected, check_exact=False, rtol=1e-12)
+        # La fusió conserva l'ordre del dataset de l'esquerra, també sense agregar.
+        pd.testing.assert_frame_equal(
+            merge_datasets(self.expected[0][::-1], self.expected[1], engine=engine),
+            merge_datasets(self.expected[0][::-1], self.expected[1]),
+            check_exact=False, rtol=1e-12
+        )
+
+    @unittest.skipUnless(is_engine_available('polars'), "polars no està instal·lat")
+    def test_polars_parity(self):
+        """Verifica que Polars dona les mateixes files, ordre i tipus que pandas."""
+        self._assert_parity('polars')
+
+    @unittest.skipUnless(is_engine_available('duckdb'), "duckdb no està instal·lat")
+    def test_duckdb_parity(self):
+        """Verifica que DuckDB dona les mateixes files, ordre i tipus que pandas."""
+        self._assert_parity('duckdb')
+
+    def test_mixed_type_keys_parity(self):
+        """Verifica les claus amb números i text: cap clau perduda i l'ordre de pandas."""
+        engines_available = [engine for engine in ('polars', 'duckdb')
+                             if is_engine_available(engine)]
+        if not engines_available:
+            self.skipTest("polars i duckdb no estan instal·lats")
+
+        perf, drop = _raw_datasets()
+        for frame in (perf, drop):
+            # Codis numèrics entre sigles de text i cursos enters ('10' < '7' com a text).
+            frame['Sigles'] = frame['Sigles'].map({'UB': 7, 'UAB': 10, 'UdL': 'UdL', 'UPF': 'UPF'})
+            frame['Curs Acadèmic'] = frame['Curs Acadèmic'].map(
+                {'19-20': 7, '20-21': 10, '21-22': 2021})
+        self.clean = clean_and_homogenize(perf, drop)
+        self.expected = self._run('pandas')
+        self.assertIn(10, self.expected[0]['Sigles'].tolist())
+
+        for engine in engines_available:
+            with self.subTest(engine=engine):
+                self._assert_parity(engine)
+
+    def test_engine_checks_and_pipeline_key(self):
+        """Verifica els errors de motor i que el motor forma part de la clau de les etapes."""
+        self.assertTrue(is_engine_available('pandas'))
+        with self.assertRaises(ValueError):
+            check_engine('spark')
+        # pylint: disable=protected-access
+        with mock.patch.dict(engines._MODULES, {'duckdb': False}):
+            self.assertFalse(is_engine_available('duckdb'))
+            with self.assertRaises(ImportError):
+                aggregate_by_branch(self.clean[0], 'Taxa rendiment', engine='duckdb')
+
+        keys = {
+            engine: merged_dataset_pipeline("a.xlsx", "b.xlsx", use_cache=False,
+                                            engine=engine).key('merge')
+            for engine in engines.ENGINES
+        }
+        self.assertEqual(len(set(keys.values())), len(engines.ENGINES))
+        self.assertEqual(self.expected[2].columns.tolist()[:len(GROUP_COLS)], GROUP_COLS)
+
+
+if __name__ == '__main__':
+    unittest.main()
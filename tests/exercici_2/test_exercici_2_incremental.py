@@ -0,0 +1,74 @@
+"""
+Tests unitaris per a la fusió incremental de l'exercici 2.
+"""
+
+import shutil
+import tempfile
+import unittest
+import pandas as pd
+from src.data_processing import clean_and_homogenize, aggregate_by_branch, merge_datasets
+from src.incremental import update_merged_dataset
+
+
+class TestIncremental(unittest.TestCase):
+    """Suite de tests per a l'actualització incremental per curs acadèmic."""
+
+    def setUp(self):
+        """Prepara dos cursos de dades i una carpeta de particions temporal."""
+        self.store_dir = tempfile.mkdtemp()
+        common = {
+            'Curs Acadèmic': ['20-21', '20-21', '21-22', '21-22'],
+            'Sigles': ['UB', 'UB', 'UB', 'UAB'],
+            'Tipus Estudi': ['grau'] * 4,
+            'Branca': ['Salut'] * 4,
+            'Unitat': ['F'] * 4,
+        }
+        self.raw_perf = pd.DataFrame({
+            **common,
+            'Tipus universitat': ['PÚBLICA'] * 4,
+            'Sexe': ['DONA', 'HOME', 'DONA', 'HOME'],
+            'Integrat S/N': ['Integrat'] * 4,
+            'Taxa rendiment': [0.8, 0.7, 0.9, 0.6]
+        })
+        self.raw_drop = pd.DataFrame({
+            **common,
+            'Naturalesa universitat responsable': ['PÚBLICA'] * 4,
+            'Sexe Alumne': ['DONA', 'HOME', 'DONA', 'HOME'],
+            'Tipus de centre': ['Integrat'] * 4,
+            '% Abandonament a primer curs': [0.1, 0.2, 0.15, 0.3]
+        })
+
+    def tearDown(self):
+        """Elimina la carpeta de particions."""
+        shutil.rmtree(self.store_dir)
+
+    def _full_merge(self):
+        """Calcula el dataset fusionat complet de referència."""
+        perf_clean, drop_clean = clean_and_homogenize(self.raw_perf, self.raw_drop)
+        return merge_datasets(
+            aggregate_by_branch(perf_clean, 'Taxa rendiment'),
+            aggregate_by_branch(drop_clean, '% Abandonament a primer curs')
+        )
+
+    def test_first_run_matches_full_merge(self):
+        """Verifica que la primera execució recalcula tots els cursos."""
+        merged, changed = update_merged_dataset(self.raw_perf, self.raw_drop, self.store_dir)
+
+        self.assertEqual(changed, ['20-21', '21-22'])
+        pd.testing.assert_frame_equal(merged, self._full_merge())
+
+    def test_only_changed_year_is_recomputed(self):
+        """Verifica que només es recalculen els cursos modificats o nous."""
+        update_merged_dataset(self.raw_perf, self.raw_drop, self.store_dir)
+        _, changed = update_merged_dataset(self.raw_perf, self.raw_drop, self.store_dir)
+        self.assertEqual(changed, [])
+
+        self.raw_perf.loc[3, 'Taxa rendiment'] = 0.5
+        merged, changed = update_merged_dataset(self.raw_perf, self.raw_drop, self.store_dir)
+
+        self.assertEqual(changed, ['21-22'])
+        pd.testing.assert_frame_equal(merged, self._full_merge())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+"""
+Tests unitaris per al graf d'etapes amb artefactes persistents.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+import pandas as pd
+from src.data_processing import clean_and_homogenize, aggregate_by_branch, merge_datasets
+from src.pipeline import ArtifactStore, Pipeline, Stage, merged_dataset_pipeline
+
+
+class TestPipeline(unittest.TestCase):
+    """Suite de tests per a les claus, la reutilització d'artefactes i el graf de l'exercici 2."""
+
+    def setUp(self):
+        """Prepara un magatzem temporal i un fitxer de dades."""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.store = ArtifactStore(os.path.join(self.tmp_dir, "artefactes"))
+        self.source = os.path.join(self.tmp_dir, "dades.txt")
+        with open(self.source, 'w', encoding='utf-8') as f:
+            f.write("1 2 3")
+        self.calls = []
+
+    def tearDown(self):
+        """Elimina la carpeta temporal."""
+        shutil.rmtree(self.tmp_dir)
+
+    def _pipeline(self, factor=2):
+        """Construeix un graf de tres etapes que registra les execucions."""
+        def read(path):
+            self.calls.append('read')
+            with open(path, encoding='utf-8') as f:
+                return [int(v) for v in f.read().split()]
+
+        def scale(values, factor):
+            self.calls.append('scale')
+            return [v * factor for v in values]
+
+        def total(values):
+            self.calls.append('total')
+            return sum(values)
+
+        return Pipeline([
+            Stage('read', read, params={"path": self.source}, sources=[self.source],
+                  persist=False),
+            Stage('scale', scale, inputs=['read'], params={"factor": factor}),
+            Stage('total', total, inputs=['scale']),
+        ], store=self.store)
+
+    def test_resumes_from_deepest_artifact(self):
+        """Verifica que una segona execució llegeix l'últim artefacte sense executar res."""
+        self.assertEqual(self._pipeline().run('total'), 12)
+        self.assertEqual(self.calls, ['read', 'scale', 'total'])
+
+        self.calls.clear()
+        self.assertEqual(self._pipeline().run('total'), 12)
+        self.assertEqual(self._pipeline().run('scale'), [2, 4, 6])
+        self.assertEqual(self.calls, [])
+
+    def test_keys_depend_on_params_and_sources(self):
+        """Verifica que un canvi de paràmetre o de dades invalida les etapes posteriors."""
+        self._pipeline().run('total')
+
+        self.calls.clear()
+        self.assertEqual(self._pipeline(factor=3).run('total'), 18)
+        self.assertEqual(self.calls, ['read', 'scale', 'total'])
+
+        with open(self.source, 'w', encoding='utf-8') as f:
+            f.write("1 2 3 4")
+        self.calls.clear()
+        self.assertEqual(self._pipeline().run('total'), 20)
+        self.assertEqual(self.calls, ['read', 'scale', 'total'])
+
+    def test_unwritable_store_keeps_result(self):
+        """Verifica que un magatzem que no es pot escriure no interromp l'execució."""
+        blocker = os.path.join(self.tmp_dir, "fitxer")
+        with open(blocker, 'w', encoding='utf-8') as f:
+            f.write("")
+        self.store = ArtifactStore(os.path.join(blocker, "artefactes"))
+
+        self.assertEqual(self._pipeline().run('total'), 12)
+        self.store.put('total', 'clau', lambda: None)
+
+        self.store = ArtifactStore(os.path.join(self.tmp_dir, "artefactes"))
+        self.store.put('total', 'clau', lambda: None)
+        self.assertEqual(os.listdir(self.store.store_dir), [])
+
+    def test_load_key_covers_loading_modules(self):
+        """Verifica que la clau de la càrrega inclou els mòduls que en decideixen els tipus."""
+        stage = merged_dataset_pipeline("a.xlsx", "b.xlsx", use_cache=False).stages['load']
+        self.assertTrue({'src.data_loader', 'src.data_cache', 'src.dataset_files'}
+                        <= set(stage.modules))
+
+    def test_merged_dataset_pipeline(self):
+        """Verifica que el graf de l'exercici 2 dona el mateix resultat i es reutilitza."""
+        raw_perf = pd.DataFrame({
+            'Curs Acadèmic': ['20-21', '20-21'], 'Tipus universitat': ['PÚBLICA'] * 2,
+            'Sigles': ['UB'] * 2, 'Tipus Estudi': ['grau'] * 2, 'Branca': ['Salut'] * 2,
+            'Sexe': ['DONA', 'HOME'], 'Integrat S/N': ['Integrat'] * 2,
+            'Taxa rendiment': [0.8, 0.7]
+        })
+        raw_drop = pd.DataFrame({
+            'Curs Acadèmic': ['20-21', '20-21'],
+            'Naturalesa universitat responsable': ['PÚBLICA'] * 2,
+            'Sigles': ['UB'] * 2, 'Tipus Estudi': ['grau'] * 2, 'Branca': ['Salut'] * 2,
+            'Sexe Alumne': ['DONA', 'HOME'], 'Tipus de centre': ['Integrat'] * 2,
+            '% Abandonament a primer curs': [0.1, 0.2]
+        })
+        paths = [os.path.join(self.tmp_dir, name) for name in ("rendiment.xlsx", "aband.xlsx")]
+
+        def load(path_rendiment, path_abandonament, use_cache):
+            self.calls.append((path_rendiment, path_abandonament, use_cache))
+            return raw_perf, raw_drop
+
+        first = merged_dataset_pipeline(*paths, store=self.store, load=load).run('merge')
+        second = merged_dataset_pipeline(*paths, store=self.store, load=load).run('merge')
+
+        perf_clean, drop_clean = clean_and_homogenize(raw_perf, raw_drop)
+        expected = merge_datasets(aggregate_by_branch(perf_clean, 'Taxa rendiment'),
+                                  aggregate_by_branch(drop_clean, '% Abandonament a primer curs'))
+        pd.testing.assert_frame_equal(first, expected)
+        pd.testing.assert_frame_equal(second, expected)
+        self.assertEqual(self.calls, [(paths[0], paths[1], True)])
+
+
+if __name__ == '__main__':
+    unittest.main()
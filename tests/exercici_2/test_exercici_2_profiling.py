@@ -0,0 +1,81 @@
+"""
+Tests unitaris per a la instrumentació de rendiment de les etapes.
+"""
+
+import csv
+import json
+import os
+import tempfile
+import unittest
+import pandas as pd
+from src import data_processing
+from src.profiling import StageProfiler
+
+
+class TestProfiling(unittest.TestCase):
+    """Suite de tests per al registre de temps, memòria i files."""
+
+    def setUp(self):
+        """Prepara un dataset petit de rendiment."""
+        self.df = pd.DataFrame({
+            'Curs Acadèmic': ['21-22', '21-22', '22-23'],
+            'Tipus universitat': ['P', 'P', 'P'],
+            'Sigles': ['U', 'U', 'U'],
+            'Tipus Estudi': ['G', 'G', 'G'],
+            'Branca': ['B', 'B', 'B'],
+            'Sexe': ['D', 'D', 'D'],
+            'Integrat S/N': ['S', 'S', 'S'],
+            'Taxa rendiment': [0.5, 0.7, 0.9]
+        })
+
+    def test_stage_and_function_records(self):
+        """Verifica que es registren les etapes i les funcions niades amb les seves files."""
+        profiler = StageProfiler(enabled=True)
+        profiler.instrument(data_processing)
+        profiler.start()
+        try:
+            with profiler.stage("aggregate", len(self.df)) as stage:
+                result = data_processing.aggregate_by_branch(self.df, 'Taxa rendiment')
+                stage["rows_out"] = len(result)
+        finally:
+            profiler.stop()
+
+        records = {record["name"]: record for record in profiler.records}
+        function = records["data_processing.aggregate_by_branch"]
+        self.assertEqual(function["parent"], "aggregate")
+        self.assertEqual((function["rows_in"], function["rows_out"]), (3, 2))
+        self.assertEqual(records["aggregate"]["rows_out"], 2)
+        self.assertGreaterEqual(records["aggregate"]["wall_s"], function["wall_s"])
+
+        # stop() restaura la funció original.
+        self.assertNotIn("wrapper", data_processing.aggregate_by_branch.__code__.co_name)
+
+    def test_write_trace_formats(self):
+        """Verifica que la traça es desa en JSON i en CSV."""
+        profiler = StageProfiler(enabled=True)
+        profiler.start()
+        with profiler.stage("clean"):
+            data_processing.clean_performance(self.df)
+        profiler.stop()
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            json_path = profiler.write_trace("json", tmp_dir)
+            csv_path = profiler.write_trace("csv", tmp_dir)
+
+            with open(json_path, 'r', encoding='utf-8') as f:
+                self.assertEqual(json.load(f)["registros"][0]["name"], "clean")
+            with open(csv_path, 'r', encoding='utf-8') as f:
+                self.assertEqual(next(csv.DictReader(f))["kind"], "stage")
+
+    def test_disabled_profiler_records_nothing(self):
+        """Verifica que el registre desactivat no desa res."""
+        profiler = StageProfiler(enabled=False)
+        with profiler.stage("load") as stage:
+            stage["rows_out"] = 1
+
+        self.assertEqual(profiler.records, [])
+        self.assertIsNone(profiler.write_trace("json", os.devnull))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,181 @@
+"""
+Tests unitaris per a l'exportació dels resultats a SQLite i les consultes sobre el fitxer.
+"""
+
+import math
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+import pandas as pd
+from src.pipeline import merged_dataset_pipeline
+from src.query import DatasetQuery
+from src.results_db import INDEX_COLS, MERGED_TABLE, ResultsDatabase, export_results
+
+METRIC = '% Abandonament a primer curs'
+
+
+def _merged(n_rows=60, seed=0):
+    """Genera un dataset fusionat amb valors nuls a les mètriques."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'Curs Acadèmic': rng.choice(['19-20', '20-21', '21-22'], n_rows),
+        'Tipus universitat': rng.choice(['PÚBLICA', 'PRIVADA'], n_rows),
+        'Sigles': rng.choice(['UB', 'UAB', 'UdL'], n_rows),
+        'Tipus Estudi': ['grau'] * n_rows,
+        'Branca': rng.choice(['Salut', 'Ciències', 'Arts i humanitats'], n_rows),
+        'Sexe': rng.choice(['DONA', 'HOME'], n_rows),
+        'Integrat S/N': ['Integrat'] * n_rows,
+        'Taxa rendiment': rng.random(n_rows),
+        METRIC: rng.random(n_rows),
+    })
+    df.loc[::7, METRIC] = np.nan
+    return df.astype({col: 'category' for col in INDEX_COLS})
+
+
+class TestResultsDatabase(unittest.TestCase):
+    """Suite de tests per a l'exportació, els índexs i les consultes de ResultsDatabase."""
+
+    def setUp(self):
+        """Exporta un dataset fusionat a una base de dades temporal."""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "resultats.sqlite")
+        self.df = _merged()
+        export_results({MERGED_TABLE: self.df}, self.path, {"fuentes": ["a.xlsx"]})
+
+    def tearDown(self):
+        """Elimina la carpeta temporal."""
+        shutil.rmtree(self.tmp_dir)
+
+    def _assert_same_stats(self, result, expected):
+        """Compara dos resultats d'agregació tenint en compte els NaN."""
+        self.assertEqual(result.keys(), expected.keys())
+        for stat, value in expected.items():
+            if isinstance(value, float) and math.isnan(value):
+                self.assertTrue(math.isnan(result[stat]), stat)
+            else:
+                self.assertAlmostEqual(result[stat], value, places=9, msg=stat)
+
+    def test_queries_match_in_memory_index(self):
+        """Verifica que les consultes sobre el fitxer donen el mateix que DatasetQuery."""
+        query = DatasetQuery(self.df)
+        filters = [None, {'Sigles': 'UB'}, {'Sexe': ['DONA'], 'Curs Acadèmic': ('20-21', None)},
+                   {'Branca': 'Enginyeria'}]
+
+        with ResultsDatabase(self.path) as db:
+            for condition in filters:
+                self._assert_same_stats(db.aggregate(METRIC, condition),
+                                        query.aggregate(METRIC, condition))
+                self.assertEqual(len(db.select(condition)), len(query.select(condition)))
+
+            grouped = db.group_by('Curs Acadèmic', METRIC, {'Sigles': ['UB', 'UdL']}, ['mean'])
+            expected = query.group_by('Curs Acadèmic', METRIC, {'Sigles': ['UB', 'UdL']}, ['mean'])
+            self.assertEqual(list(grouped), list(expected))
+            for value, result in grouped.items():
+                self._assert_same_stats(result, expected[value])
+
+            self.assertEqual(db.select({'Sigles': 'UB'}, columns=['Sigles'])[0], {'Sigles': 'UB'})
+            self.assertEqual(db.metadata()["filas"], {MERGED_TABLE: len(self.df)})
+            with self.assertRaises(KeyError):
+                db.aggregate(METRIC, {'Tipus Estudi': 'grau'})
+
+    def test_std_without_cancellation(self):
+        """Verifica la desviació típica de valors grans amb poca variació."""
+        df = self.df.assign(**{METRIC: 1e6 + np.random.default_rng(1).random(len(self.df)) * 1e-3})
+        export_results({MERGED_TABLE: df}, self.path)
+
+        with ResultsDatabase(self.path) as db:
+            result = db.aggregate(METRIC, {'Sigles': 'UB'})
+            grouped = db.group_by('Sexe', METRIC)
+
+        values = df.loc[df['Sigles'] == 'UB', METRIC]
+        self.assertAlmostEqual(result["std"] / values.std(), 1.0, places=9)
+        expected = DatasetQuery(df).aggregate(METRIC, {'Sigles': 'UB'})
+        self.assertAlmostEqual(result["std"] / expected["std"], 1.0, places=6)
+        for sex, stats in grouped.items():
+            self.assertAlmostEqual(stats["std"] / df.loc[df['Sexe'] == sex, METRIC].std(), 1.0,
+                                   places=9)
+
+    def test_mixed_type_list_filter(self):
+        """Verifica un filtre amb una llista de valors de tipus diferents."""
+        df = self.df.astype({'Sigles': object})
+        df.loc[df['Sigles'] == 'UAB', 'Sigles'] = 7
+        df = df.astype({'Sigles': 'category'})
+        export_results({MERGED_TABLE: df}, self.path)
+
+        with ResultsDatabase(self.path) as db:
+            result = db.aggregate(METRIC, {'Sigles': ['UB', 7]})
+            rows = db.select({'Sigles': ['UB', 7]})
+
+        self._assert_same_stats(result, DatasetQuery(df).aggregate(METRIC, {'Sigles': ['UB', 7]}))
+        self.assertEqual(len(rows), int(df['Sigles'].isin(['UB', 7]).sum()))
+
+    def test_failed_export_removes_tmp_file(self):
+        """Verifica que una exportació fallida no deixa el fitxer temporal ni toca l'anterior."""
+        with mock.patch('src.results_db._create_table', side_effect=sqlite3.OperationalError):
+            with self.assertRaises(sqlite3.OperationalError):
+                export_results({MERGED_TABLE: self.df.head(5)}, self.path)
+
+        self.assertEqual(os.listdir(self.tmp_dir), ["resultats.sqlite"])
+        with ResultsDatabase(self.path) as db:
+            self.assertEqual(len(db.select()), len(self.df))
+
+    def test_indexes_and_read_only_access(self):
+        """Verifica els índexs de cada columna i que el fitxer s'obre en només lectura."""
+        with ResultsDatabase(self.path) as db:
+            indexed = {
+                db.connection.execute(f"PRAGMA index_info(\"{name}\")").fetchone()[2]
+                for _, name, *_ in db.connection.execute(f"PRAGMA index_list({MERGED_TABLE})")
+            }
+            self.assertEqual(indexed, set(INDEX_COLS))
+            with self.assertRaises(sqlite3.OperationalError):
+                db.connection.execute(f"DELETE FROM {MERGED_TABLE}")
+
+        with self.assertRaises(FileNotFoundError):
+            ResultsDatabase(os.path.join(self.tmp_dir, "no_existeix.sqlite"))
+
+    def test_export_replaces_file_atomically(self):
+        """Verifica que un lector obert continua veient l'exportació anterior."""
+        reader = ResultsDatabase(self.path)
+        try:
+            export_results({MERGED_TABLE: self.df.head(5)}, self.path)
+            self.assertEqual(len(reader.select()), len(self.df))
+            with ResultsDatabase(self.path) as db:
+                self.assertEqual(len(db.select()), 5)
+        finally:
+            reader.close()
+        self.assertEqual(os.listdir(self.tmp_dir), ["resultats.sqlite"])
+
+    def test_pipeline_export_stage(self):
+        """Verifica que l'etapa 'export' desa les tres taules i retorna el dataset fusionat."""
+        raw_perf = pd.DataFrame({
+            'Curs Acadèmic': ['20-21', '20-21'], 'Tipus universitat': ['PÚBLICA'] * 2,
+            'Sigles': ['UB'] * 2, 'Tipus Estudi': ['grau'] * 2, 'Branca': ['Salut'] * 2,
+            'Sexe': ['DONA', 'HOME'], 'Integrat S/N': ['Integrat'] * 2,
+            'Taxa rendiment': [0.8, 0.7]
+        })
+        raw_drop = raw_perf.rename(columns={
+            'Tipus universitat': 'Naturalesa universitat responsable', 'Sexe': 'Sexe Alumne',
+            'Integrat S/N': 'Tipus de centre', 'Taxa rendiment': METRIC
+        })
+
+        pipeline = merged_dataset_pipeline(
+            "rendiment.xlsx", "aband.xlsx", use_cache=False, export_path=self.path,
+            load=lambda **kwargs: (raw_perf, raw_drop)
+        )
+        merged = pipeline.run('export')
+
+        pd.testing.assert_frame_equal(merged, pipeline.run('merge'))
+        with ResultsDatabase(self.path) as db:
+            self.assertEqual(db.tables(), [MERGED_TABLE, 'rendiment_agregat',
+                                           'abandonament_agregat'])
+            self.assertEqual(db.select(columns=['Sexe', METRIC]),
+                             [{'Sexe': 'DONA', METRIC: 0.8}, {'Sexe': 'HOME', METRIC: 0.7}])
+            self.assertEqual(db.metadata()["motor"], 'pandas')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+"""
+Tests unitaris per al generador de datasets sintètics dels benchmarks.
+"""
+
+import unittest
+import pandas as pd
+from benchmarks.synthetic import generate_datasets
+from src.data_processing import clean_and_homogenize, aggregate_by_branch, merge_datasets
+
+PERF_COLUMNS = [
+    'Curs Acadèmic', 'Tipus universitat', 'Universitat', 'Sigles', 'Unitat',
+    'Tipus Estudi', 'Branca', 'Codi Estudi', 'Estudi', 'Sexe', 'Integrat S/N',
+    'Crèdits ordinaris superats', 'Crèdits ordinaris matriculats', 'Taxa rendiment'
+]
+DROP_COLUMNS = [
+    'Curs Acadèmic', 'Naturalesa universitat responsable', 'Universitat Responsable',
+    'Sigles', 'Unitat', 'Tipus Estudi', 'Branca', 'Estudi', 'Sexe Alumne',
+    'Tipus de centre', '% Abandonament a primer curs'
+]
+
+
+class TestSynthetic(unittest.TestCase):
+    """Suite de tests per a l'esquema i la reproductibilitat de les dades sintètiques."""
+
+    def test_schema_and_scale(self):
+        """Verifica que els datasets tenen l'esquema original i la mida escalada."""
+        perf, drop = generate_datasets(scale=0.1, seed=3)
+
+        self.assertEqual(list(perf.columns), PERF_COLUMNS)
+        self.assertEqual(list(drop.columns), DROP_COLUMNS)
+        self.assertEqual((len(perf), len(drop)), (1412, 1088))
+        self.assertEqual(perf['Branca'].nunique(), 5)
+        self.assertNotIn('UOC', set(drop['Sigles']))
+
+    def test_reproducible_and_runs_through_pipeline(self):
+        """Verifica que la mateixa llavor dona les mateixes dades i que el flux les processa."""
+        perf, drop = generate_datasets(scale=0.1, seed=3)
+        pd.testing.assert_frame_equal(perf, generate_datasets(scale=0.1, seed=3)[0])
+
+        perf_clean, drop_clean = clean_and_homogenize(perf, drop)
+        merged = merge_datasets(aggregate_by_branch(perf_clean, 'Taxa rendiment'),
+                                aggregate_by_branch(drop_clean, '% Abandonament a primer curs'))
+
+        self.assertGreater(len(merged), 0)
+        self.assertTrue(set(merged['Curs Acadèmic']) <= {'19-20', '20-21', '21-22', '22-23'})
+
+
+if __name__ == '__main__':
+    unittest.main()
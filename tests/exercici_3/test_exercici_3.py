@@ -8,6 +8,7 @@ i assegura que el fitxer .png es crea correctament al directori de proves.
 # 1. Standard Library Imports
 import unittest
 import os
+from unittest.mock import patch
 
 # 2. Third Party Imports
 import matplotlib
@@ -15,7 +16,8 @@ import matplotlib.pyplot as plt
 import pandas as pd
 
 # 3. Local Application Imports
-from src.visualization import plot_temporal_trends
+from src import render_cache
+from src.visualization import build_trend_series, plot_temporal_trends
 
 # Configurem Matplotlib per a mode no interactiu (no obre finestres).
 matplotlib.use('Agg')
@@ -65,6 +67,52 @@ class TestExercici3(unittest.TestCase):
         # Si falla, unittest ho marca com Error automàticament.
         plot_temporal_trends(single_branch_df, "Single_Branch")
 
+    def test_plot_skips_unchanged_data(self):
+        """Verifica que no es torna a desar la imatge si les dades no han canviat."""
+        plot_temporal_trends(self.test_df, self.student_name)
+        os.utime(self.expected_path, (0, 0))
+
+        plot_temporal_trends(self.test_df, self.student_name)
+        self.assertEqual(os.path.getmtime(self.expected_path), 0)
+
+        # Amb use_cache=False sempre es torna a generar.
+        plot_temporal_trends(self.test_df, self.student_name, use_cache=False)
+        self.assertGreater(os.path.getmtime(self.expected_path), 0)
+
+    def test_fingerprint_follows_drawing_code(self):
+        """Verifica que l'empremta canvia si canvia el codi de dibuix o Matplotlib."""
+        series = build_trend_series(self.test_df)
+        fingerprint = render_cache.series_fingerprint([series], {"dpi": 50})
+
+        self.assertTrue(render_cache.drawing_version().endswith(f":{matplotlib.__version__}"))
+        with patch.object(render_cache, '_DRAWING_VERSION', "codi-modificat"):
+            self.assertNotEqual(render_cache.series_fingerprint([series], {"dpi": 50}),
+                                fingerprint)
+        self.assertEqual(render_cache.series_fingerprint([series], {"dpi": 50}), fingerprint)
+
+    def test_build_trend_series(self):
+        """Verifica la matriu branca × curs i l'ordre de les branques."""
+        df = pd.concat([self.test_df, pd.DataFrame({
+            'Curs Acadèmic': ['2021-22', '2019-20'],
+            'Branca': ['Salut', 'Ciències'],
+            'Taxa rendiment': [0.9, 0.6],
+            '% Abandonament a primer curs': [0.02, 0.2]
+        })], ignore_index=True)
+
+        series = build_trend_series(df)
+
+        self.assertEqual(series.groups, ['Ciències', 'Salut', 'Arts'])
+        self.assertEqual(series.years, ['2019-20', '2020-21', '2021-22'])
+        table = series.to_frame('Taxa rendiment')
+        self.assertAlmostEqual(table.loc['Salut', '2021-22'], 0.875)
+        self.assertTrue(pd.isna(table.loc['Arts', '2019-20']))
+
+        # Cada línia només inclou els cursos amb dades del grup.
+        lines = {group: (years, list(means))
+                 for _, group, years, means in series.lines('Taxa rendiment')}
+        self.assertEqual(lines['Ciències'], (['2019-20'], [0.6]))
+        self.assertEqual(lines['Arts'][0], ['2020-21', '2021-22'])
+
     def tearDown(self):
         """Neteja de les imatges de test generades."""
         # Neteja imatge del primer test.
@@ -0,0 +1,112 @@
+"""
+Tests unitaris per a la generació de gràfics per dimensió.
+"""
+
+import os
+import tempfile
+import unittest
+import pandas as pd
+from src.charts import (  # pylint: disable=protected-access
+    _draw_multiples, build_chart_jobs, generate_dimension_charts, parse_output_spec, render_charts
+)
+
+
+class TestCharts(unittest.TestCase):
+    """Suite de tests per als gràfics per dimensió i petits múltiples."""
+
+    def setUp(self):
+        """Prepara un dataset fusionat petit amb dues universitats."""
+        self.df = pd.DataFrame({
+            'Curs Acadèmic': ['20-21', '21-22', '20-21', '21-22', '20-21', '21-22'],
+            'Sigles': ['UB', 'UB', 'UB', 'UB', 'UdG', 'UdG'],
+            'Sexe': ['DONA', 'DONA', 'HOME', 'HOME', 'DONA', 'DONA'],
+            'Branca': ['Salut', 'Salut', 'Arts', 'Arts', 'Salut', 'Salut'],
+            'Taxa rendiment': [0.8, 0.85, 0.7, 0.72, 0.9, 0.91],
+            '% Abandonament a primer curs': [0.1, 0.08, 0.15, 0.12, 0.05, 0.04]
+        })
+
+    def test_parse_output_spec(self):
+        """Verifica la interpretació de format i DPI de cada sortida."""
+        self.assertEqual(parse_output_spec("svg:72"), {"format": "svg", "dpi": 72})
+        self.assertEqual(parse_output_spec("PNG")["format"], "png")
+        with self.assertRaises(ValueError):
+            parse_output_spec("png:0")
+
+    def test_jobs_per_dimension_value(self):
+        """Verifica que hi ha un gràfic per valor i una graella per mètrica."""
+        jobs = build_chart_jobs(self.df, ['Sigles'], output_dir="out")
+        paths = sorted(job["path"] for job in jobs)
+
+        self.assertEqual(paths, [
+            os.path.join("out", "sigles", name)
+            for name in ["multiples_abandonament", "multiples_rendiment", "ub", "udg"]
+        ])
+        ub_job = next(job for job in jobs if job["path"].endswith("ub"))
+        self.assertEqual(ub_job["series"].groups, ['Salut', 'Arts'])
+
+    def test_colliding_file_names_get_suffix(self):
+        """Verifica que dos valors amb el mateix nom de fitxer no se sobreescriuen."""
+        df = self.df.assign(Sigles=['Màster/Postgrau'] * 4 + ['Màster Postgrau'] * 2)
+
+        jobs = build_chart_jobs(df, ['Sigles'], output_dir="out")
+        paths = {job["title"]: job["path"] for job in jobs if job["kind"] == "trends"}
+
+        self.assertEqual(paths, {
+            "Sigles: Màster/Postgrau": os.path.join("out", "sigles", "màster_postgrau"),
+            "Sigles: Màster Postgrau": os.path.join("out", "sigles", "màster_postgrau_2"),
+        })
+
+    def test_multiples_legend_adds_no_lines(self):
+        """Verifica que la llegenda de la graella no afegeix línies buides al primer panell."""
+        job = next(job for job in build_chart_jobs(self.df, ['Sigles'])
+                   if job["kind"] == "multiples")
+
+        fig = _draw_multiples(job)
+
+        first_panel = fig.axes[0]
+        self.assertTrue(all(len(line.get_xdata()) > 0 for line in first_panel.lines))
+        self.assertEqual(len(fig.legends[0].get_texts()), len(job["colors"]))
+
+    def test_generate_every_output_format(self):
+        """Verifica que cada gràfic es desa en tots els formats demanats."""
+        outputs = [{"format": "png", "dpi": 50}, {"format": "svg", "dpi": 50}]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            saved = generate_dimension_charts(self.df, ['Sexe'], outputs, tmp_dir)
+
+            self.assertEqual(len(saved), 8)
+            self.assertTrue(all(os.path.getsize(path) > 0 for path in saved))
+            self.assertTrue(os.path.exists(os.path.join(tmp_dir, "sexe", "home.svg")))
+
+    def test_unchanged_charts_are_not_rendered_again(self):
+        """Verifica que la memòria cau omet els gràfics sense canvis i refà els modificats."""
+        outputs = [{"format": "png", "dpi": 40}]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            generate_dimension_charts(self.df, ['Sigles'], outputs, tmp_dir)
+            udg_path = os.path.join(tmp_dir, "sigles", "udg.png")
+            ub_path = os.path.join(tmp_dir, "sigles", "ub.png")
+            os.utime(udg_path, (0, 0))
+            os.utime(ub_path, (0, 0))
+
+            # Només canvien les dades de la UB.
+            changed = self.df.copy()
+            changed.loc[0, 'Taxa rendiment'] = 0.5
+            saved = generate_dimension_charts(changed, ['Sigles'], outputs, tmp_dir)
+
+            self.assertEqual(len(saved), 4)
+            self.assertEqual(os.path.getmtime(udg_path), 0)
+            self.assertGreater(os.path.getmtime(ub_path), 0)
+
+    def test_render_in_process_pool(self):
+        """Verifica la renderització en diversos processos i el retorn d'errors."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            jobs = build_chart_jobs(self.df, ['Sexe'], [{"format": "png", "dpi": 40}], tmp_dir)
+            jobs[0]["outputs"] = [{"format": "inexistent", "dpi": 40}]
+
+            results = render_charts(jobs, max_workers=2)
+
+            self.assertIsInstance(results[0], Exception)
+            self.assertTrue(all(os.path.exists(paths[0]) for paths in results[1:]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -8,8 +8,12 @@ estadístiques per branca i la correcta generació de l'informe JSON.
 import unittest
 import os
 import json
+import numpy as np
 import pandas as pd
-from src.analysis import get_tendencia, analyze_dataset
+from src.analysis import (
+    get_tendencia, analyze_dataset, build_report, get_group_analysis, classify_trends,
+    detect_anomalies
+)
 
 
 class TestExercici4(unittest.TestCase):
@@ -36,6 +40,109 @@ class TestExercici4(unittest.TestCase):
         self.assertEqual(get_tendencia(years, decreixent), "decreciente")
         self.assertEqual(get_tendencia(years, estable), "estable")
 
+    def test_trend_with_missing_year_is_stable(self):
+        """Verifica que un any de la sèrie sense valor fa la tendència estable, com linregress."""
+        self.assertEqual(get_tendencia(['a', 'b', 'c'], [0.1, np.nan, 0.5]), "estable")
+        result = classify_trends([[0.1, np.nan, 0.5, 0.7], [0.1, np.nan, 0.5, np.nan]],
+                                 observed=[[True, True, True, True], [True, False, True, False]])
+        self.assertEqual(result['tendencia'].tolist(), ["estable", "creciente"])
+        self.assertTrue(np.isnan(result['slope'][0]))
+
+        # Un any sense files no forma part de la sèrie; un any amb files sense valor, sí.
+        df = pd.DataFrame({
+            'Curs Acadèmic': ['19-20', '21-22', '19-20', '20-21', '21-22'],
+            'Branca': ['A', 'A', 'B', 'B', 'B'],
+            'Taxa rendiment': [0.1, 0.5, 0.1, np.nan, 0.5],
+            '% Abandonament a primer curs': [0.5, 0.1, 0.5, 0.3, 0.1]
+        })
+        analysis = get_group_analysis(df, 'Branca')
+        self.assertEqual(analysis['A']['tendencia_rendimiento'], "creciente")
+        self.assertEqual(analysis['B']['tendencia_rendimiento'], "estable")
+        self.assertEqual(analysis['B']['tendencia_abandono'], "decreciente")
+
+    def test_null_keys_in_group_analysis(self):
+        """Verifica que una branca nul·la o un grup sense curs no interrompen l'informe."""
+        df = self.test_df.astype({'Curs Acadèmic': object, 'Branca': object})
+        df.loc[0, 'Branca'] = np.nan
+        df.loc[3:, 'Curs Acadèmic'] = None
+
+        report = build_report(df)
+        analysis = report['analisis_por_rama']
+
+        self.assertEqual(len(analysis), 3)
+        null_branch = next(stats for group, stats in analysis.items() if pd.isna(group))
+        self.assertTrue(np.isnan(null_branch['rendimiento_medio']))
+        self.assertEqual(null_branch['tendencia_rendimiento'], "estable")
+        self.assertEqual(analysis['Branca B']['rendimiento_medio'], 0.5)
+        self.assertEqual(analysis['Branca B']['tendencia_rendimiento'], "estable")
+        self.assertEqual(report['metadata']['periodo_temporal'], ['2020-21', '2021-22', '2022-23'])
+
+    def test_classify_trends_batch(self):
+        """Verifica la classificació vectoritzada amb anys sense dades i llindar configurable."""
+        values = np.array([
+            [10, 20, 30, np.nan],
+            [30, np.nan, 20, 10],
+            [1.0, 1.02, 1.04, 1.06],
+            [5, np.nan, np.nan, np.nan]
+        ])
+
+        result = classify_trends(values)
+
+        self.assertEqual(result['tendencia'].tolist(),
+                         ["creciente", "decreciente", "creciente", "estable"])
+        np.testing.assert_allclose(result['slope'][:3], [10, -10, 0.02])
+        np.testing.assert_allclose(result['rvalue'][:3], [1, -1, 1])
+        self.assertTrue(np.isnan(result['slope'][3]))
+
+        # Amb un llindar més alt, la tercera sèrie passa a ser estable.
+        self.assertEqual(classify_trends(values, threshold=0.05)['tendencia'][2], "estable")
+
+    def test_detect_anomalies_batch(self):
+        """Verifica la puntuació z robusta de moltes sèries, amb MAD nul·la i historial curt."""
+        values = np.array([
+            [0.10, 0.11, 0.09, 0.10, 0.40],
+            [0.20, 0.20, 0.20, 0.50, 0.20],
+            [0.30, 0.30, 0.30, 0.30, 0.30],
+            [0.10, np.nan, np.nan, np.nan, 0.90]
+        ])
+
+        scores, flags = detect_anomalies(values)
+
+        self.assertEqual(np.argwhere(flags).tolist(), [[0, 4], [1, 3]])
+        # La MAD (0.01) dona una escala inferior a la mínima, que és la que s'aplica.
+        np.testing.assert_allclose(scores[0, 4], 0.30 / 0.02)
+        np.testing.assert_allclose(scores[1, 3], 0.30 / (1.2533 * 0.06))
+        self.assertTrue((scores[2] == 0).all())
+        # Amb només dos anys amb dades no hi ha prou historial.
+        self.assertTrue(np.isnan(scores[3]).all())
+
+    def test_detect_anomalies_short_noisy_series(self):
+        """Verifica que una sèrie curta amb soroll moderat no té cap any anòmal."""
+        scores, flags = detect_anomalies([
+            [0.10, 0.11, 0.17, 0.10, 0.12],
+            [0.80, 0.81, 0.80, 0.79, 0.84],
+            [0.10, 0.11, 0.17, np.nan, np.nan],
+        ])
+
+        self.assertFalse(flags.any())
+        self.assertLess(np.nanmax(np.abs(scores)), 3.5)
+        # Tres anys no són prou historial.
+        self.assertTrue(np.isnan(scores[2]).all())
+
+    def test_anomalous_years_in_group_analysis(self):
+        """Verifica que els anys anòmals apareixen a l'anàlisi del grup."""
+        df = pd.DataFrame({
+            'Curs Acadèmic': ['18-19', '19-20', '20-21', '21-22', '22-23'],
+            'Branca': ['Branca A'] * 5,
+            'Taxa rendiment': [0.80, 0.82, 0.81, 0.79, 0.40],
+            '% Abandonament a primer curs': [0.1, 0.1, 0.1, 0.1, 0.1]
+        })
+
+        anomalies = get_group_analysis(df, 'Branca')['Branca A']['años_anomalos']
+
+        self.assertEqual(len(anomalies), 1)
+        self.assertEqual((anomalies[0]['curso'], anomalies[0]['metrica']), ('22-23', 'rendimiento'))
+
     def test_analyze_dataset_full_flow(self):
         """Comprova que l'informe es genera i conté les claus correctes."""
         report = analyze_dataset(self.test_df)
@@ -60,6 +167,17 @@ class TestExercici4(unittest.TestCase):
         self.assertEqual(data['metadata']['num_registros'], 6)
         self.assertEqual(len(data['analisis_por_rama']), 2)
 
+    def test_group_analysis_other_key(self):
+        """Verifica que l'anàlisi agrupat funciona amb una clau diferent de la branca."""
+        df = self.test_df.assign(Sexe=['DONA', 'HOME'] * 3)
+
+        analysis = get_group_analysis(df, 'Sexe')
+
+        self.assertEqual(list(analysis), ['DONA', 'HOME'])
+        self.assertEqual(analysis['DONA']['rendimiento_min'], 0.1)
+        self.assertEqual(analysis['DONA']['rendimiento_max'], 0.9)
+        self.assertEqual(analysis['HOME']['abandono_medio'], 0.4)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,93 @@
+"""
+Tests unitaris per als acumuladors estadístics d'una sola passada.
+"""
+
+import pickle
+import unittest
+import numpy as np
+import pandas as pd
+from src.accumulators import RunningCovariance, RunningMoments
+from src.analysis import build_report, compute_global_statistics
+
+
+class TestAccumulators(unittest.TestCase):
+    """Suite de tests per a mitjana, variància, correlació i fusió d'acumuladors."""
+
+    def setUp(self):
+        """Prepara dues variables aleatòries correlacionades."""
+        rng = np.random.default_rng(4)
+        self.x = rng.normal(0.1, 0.05, size=1000)
+        self.y = 0.9 - 0.5 * self.x + rng.normal(0, 0.02, size=1000)
+
+    def test_moments_match_numpy(self):
+        """Verifica la mitjana, la desviació i els extrems amb les seves etiquetes."""
+        labels = np.arange(len(self.x))
+        moments = RunningMoments().update(self.x, labels)
+
+        self.assertAlmostEqual(moments.mean, self.x.mean(), places=12)
+        self.assertAlmostEqual(moments.std(), self.x.std(ddof=1), places=12)
+        self.assertEqual(moments.max_label, self.x.argmax())
+        self.assertEqual(moments.min_label, self.x.argmin())
+
+    def test_merged_chunks_equal_single_pass(self):
+        """Verifica que fusionar fragments (també serialitzats) dona el mateix resultat."""
+        whole = RunningCovariance().update(self.x, self.y)
+
+        merged = RunningCovariance()
+        for start in range(0, len(self.x), 137):
+            part = RunningCovariance().update(self.x[start:start + 137], self.y[start:start + 137])
+            merged.merge(pickle.loads(pickle.dumps(part)))
+
+        self.assertEqual(merged.count, whole.count)
+        self.assertAlmostEqual(merged.correlation(), whole.correlation(), places=12)
+        self.assertAlmostEqual(whole.correlation(), np.corrcoef(self.x, self.y)[0, 1], places=12)
+
+    def test_correlation_uses_pairwise_complete_rows(self):
+        """Verifica que les files amb algun NaN s'ometen sense desalinear les variables."""
+        x = np.array([1.0, np.nan, 3.0, 4.0, 5.0])
+        y = np.array([2.0, 10.0, np.nan, 8.0, 10.0])
+
+        cov = RunningCovariance().update(x, y)
+
+        self.assertEqual(cov.count, 3)
+        self.assertAlmostEqual(cov.correlation(), 1.0)
+        self.assertTrue(np.isnan(RunningCovariance().update([1.0], [2.0]).correlation()))
+
+    def test_global_statistics_by_chunks(self):
+        """Verifica que l'anàlisi global per fragments coincideix amb l'anàlisi sencera."""
+        df = pd.DataFrame({
+            'Branca': np.where(self.x > 0.1, 'A', 'B'),
+            '% Abandonament a primer curs': self.x,
+            'Taxa rendiment': self.y
+        })
+
+        whole = compute_global_statistics(df)
+        chunked = compute_global_statistics(df, chunk_size=100)
+
+        self.assertAlmostEqual(chunked["abandono"].mean, whole["abandono"].mean, places=12)
+        self.assertEqual(chunked["rendimiento"].max_label, whole["rendimiento"].max_label)
+        self.assertEqual(whole["abandono"].max_label, 'A')
+        self.assertAlmostEqual(chunked["correlacion"].correlation(),
+                               whole["correlacion"].correlation(), places=12)
+
+    def test_empty_metric_has_no_mean(self):
+        """Verifica que una mètrica sense cap valor dona NaN i no una mitjana de 0."""
+        moments = RunningMoments().update([np.nan, np.nan])
+        self.assertEqual(moments.count, 0)
+        self.assertTrue(np.isnan(moments.mean))
+        self.assertTrue(np.isnan(moments.variance(ddof=0)))
+        self.assertTrue(np.isnan(moments.std()))
+
+        df = pd.DataFrame({
+            'Curs Acadèmic': ['20-21'] * 4,
+            'Branca': ['A', 'A', 'B', 'B'],
+            '% Abandonament a primer curs': [np.nan] * 4,
+            'Taxa rendiment': self.y[:4]
+        })
+        report = build_report(df)["estadisticas_globales"]
+        self.assertTrue(np.isnan(report["abandono_medio"]))
+        self.assertAlmostEqual(report["rendimiento_medio"], round(self.y[:4].mean(), 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
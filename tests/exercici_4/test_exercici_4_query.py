@@ -0,0 +1,73 @@
+"""
+Tests unitaris per a les consultes indexades sobre el dataset fusionat.
+"""
+
+import unittest
+import numpy as np
+import pandas as pd
+from src.query import DatasetQuery
+
+
+class TestDatasetQuery(unittest.TestCase):
+    """Suite de tests per als índexs, la selecció de files i les agregacions."""
+
+    def setUp(self):
+        """Prepara un dataset fusionat aleatori amb algun valor nul."""
+        rng = np.random.default_rng(18)
+        n = 500
+        self.df = pd.DataFrame({
+            'Curs Acadèmic': rng.choice(['19-20', '20-21', '21-22', '22-23', '23-24'], n),
+            'Sigles': rng.choice(['UAB', 'UB', 'UdG', 'UPC'], n),
+            'Sexe': rng.choice(['DONA', 'HOME'], n),
+            'Branca': rng.choice(['Salut', 'Arts', 'Ciències'], n),
+            'Taxa rendiment': rng.uniform(0.5, 1.0, n),
+            '% Abandonament a primer curs': rng.uniform(0.0, 0.4, n)
+        })
+        self.df.loc[::37, 'Taxa rendiment'] = np.nan
+        self.query = DatasetQuery(self.df)
+
+    def test_aggregate_matches_pandas_filter(self):
+        """Verifica que l'agregació per cel·les coincideix amb filtrar amb pandas."""
+        filters = {'Sigles': 'UB', 'Sexe': 'DONA', 'Curs Acadèmic': ('20-21', '22-23')}
+        expected = self.df[
+            (self.df['Sigles'] == 'UB') & (self.df['Sexe'] == 'DONA')
+            & self.df['Curs Acadèmic'].between('20-21', '22-23')
+        ]['Taxa rendiment']
+
+        result = self.query.aggregate('Taxa rendiment', filters)
+
+        self.assertEqual(result['rows'], len(expected))
+        self.assertEqual(result['count'], expected.count())
+        for stat in ['mean', 'std', 'min', 'max', 'sum']:
+            self.assertAlmostEqual(result[stat], getattr(expected, stat)(), places=12)
+
+    def test_rows_and_group_by(self):
+        """Verifica la selecció de files amb llistes i intervals oberts i l'agrupació."""
+        filters = {'Branca': ['Arts', 'Salut'], 'Curs Acadèmic': (None, '20-21')}
+        mask = (self.df['Branca'].isin(['Arts', 'Salut'])
+                & (self.df['Curs Acadèmic'] <= '20-21'))
+
+        self.assertEqual(self.query.rows(filters).tolist(), np.flatnonzero(mask).tolist())
+        pd.testing.assert_frame_equal(self.query.select(filters), self.df[mask])
+
+        by_year = self.query.group_by('Curs Acadèmic', '% Abandonament a primer curs',
+                                      {'Sigles': 'UdG'}, stats=['mean'])
+        expected = self.df[self.df['Sigles'] == 'UdG'].groupby('Curs Acadèmic')[
+            '% Abandonament a primer curs'].mean()
+        self.assertEqual(list(by_year), expected.index.tolist())
+        for year, value in expected.items():
+            self.assertAlmostEqual(by_year[year]['mean'], value, places=12)
+
+    def test_empty_selection_and_unknown_column(self):
+        """Verifica el resultat sense files i l'error amb columnes no indexades."""
+        result = self.query.aggregate('Taxa rendiment', {'Sigles': 'UVic'})
+
+        self.assertEqual((result['rows'], result['count']), (0, 0))
+        self.assertTrue(np.isnan(result['mean']))
+        self.assertEqual(len(self.query.rows({'Sigles': 'UVic'})), 0)
+        with self.assertRaises(KeyError):
+            self.query.aggregate('Taxa rendiment', {'Tipus Estudi': 'Grau'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+"""
+Tests unitaris per als informes per partició (universitat, tipus i sexe).
+"""
+
+import json
+import os
+import tempfile
+import unittest
+import pandas as pd
+from src.analysis import build_report
+from src.reports import generate_partition_reports, iter_partition_reports, partition_frame
+
+
+class TestPartitionReports(unittest.TestCase):
+    """Suite de tests per a la partició compacta i la generació d'informes."""
+
+    def setUp(self):
+        """Prepara un dataset fusionat amb dues universitats i dos sexes."""
+        self.df = pd.DataFrame({
+            'Curs Acadèmic': ['20-21', '21-22', '22-23'] * 4,
+            'Sigles': ['UB'] * 6 + ['UdG'] * 6,
+            'Sexe': (['DONA'] * 3 + ['HOME'] * 3) * 2,
+            'Branca': ['Salut'] * 3 + ['Arts'] * 3 + ['Salut'] * 6,
+            'Taxa rendiment': [0.8, 0.82, 0.84, 0.7, 0.69, 0.71, 0.9, 0.88, 0.86, 0.6, 0.6, 0.6],
+            '% Abandonament a primer curs': [0.1, 0.09, 0.08, 0.2, 0.22, 0.21,
+                                             0.05, 0.06, 0.07, 0.3, 0.3, 0.3]
+        })
+
+    def test_partition_frame_is_compact(self):
+        """Verifica que les particions són arrays de codis i mètriques, no DataFrames."""
+        vocabularies, partitions = partition_frame(self.df, 'Sigles')
+
+        self.assertEqual(vocabularies['Branca'], ['Salut', 'Arts'])
+        self.assertEqual([value for value, _ in partitions], ['UB', 'UdG'])
+        arrays = partitions[1][1]
+        self.assertEqual(arrays['Branca'].tolist(), [0] * 6)
+        self.assertEqual(arrays['Taxa rendiment'].tolist(), [0.9, 0.88, 0.86, 0.6, 0.6, 0.6])
+
+    def test_reports_match_filtered_analysis(self):
+        """Verifica que cada informe és igual al de la partició filtrada amb pandas."""
+        for dimension, value, report in iter_partition_reports(self.df, ['Sexe'], max_workers=2):
+            expected = build_report(self.df[self.df[dimension] == value])
+
+            self.assertEqual(report['metadata'].pop('particion'),
+                             {"dimension": dimension, "valor": value})
+            self.assertEqual(json.dumps(report, sort_keys=True),
+                             json.dumps(expected, sort_keys=True))
+
+    def test_output_formats(self):
+        """Verifica la sortida en fitxers separats i en NDJSON per dimensió."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            files = generate_partition_reports(self.df, ['Sigles', 'Sexe'], 'files', tmp_dir)
+            lines = generate_partition_reports(self.df, ['Sigles'], 'ndjson', tmp_dir)
+
+            self.assertEqual(len(files), 4)
+            self.assertTrue(os.path.exists(os.path.join(tmp_dir, "sigles", "udg.json")))
+            with open(lines[0], 'r', encoding='utf-8') as f:
+                records = [json.loads(line) for line in f]
+            self.assertEqual([r['metadata']['particion']['valor'] for r in records], ['UB', 'UdG'])
+
+        with self.assertRaises(ValueError):
+            generate_partition_reports(self.df, fmt='xml')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,173 @@
+"""
+Tests unitaris per al servidor HTTP local amb les dades en memòria.
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+import pandas as pd
+from src.analysis import build_report
+from src.data_loader import load_dataset_groups
+from src.server import DatasetServer, DatasetService, RequestError, _to_json
+
+
+def _strict_loads(body):
+    """Llegeix JSON estàndard: falla si hi ha NaN o Infinity."""
+    def reject(constant):
+        raise ValueError(f"Valor no vàlid en JSON: {constant}")
+    return json.loads(body, parse_constant=reject)
+
+
+class TestDatasetServer(unittest.TestCase):
+    """Suite de tests per a les respostes, les consultes i la recàrrega incremental."""
+
+    def setUp(self):
+        """Desa dos cursos de dades de rendiment i abandonament en fitxers Excel."""
+        self.tmp_dir = tempfile.mkdtemp()
+        common = {
+            'Curs Acadèmic': ['20-21', '20-21', '21-22', '21-22'],
+            'Sigles': ['UB', 'UB', 'UB', 'UAB'],
+            'Tipus Estudi': ['grau'] * 4,
+            'Branca': ['Salut'] * 4,
+            'Unitat': ['F'] * 4,
+        }
+        self.raw_perf = pd.DataFrame({
+            **common,
+            'Tipus universitat': ['PÚBLICA'] * 4,
+            'Sexe': ['DONA', 'HOME', 'DONA', 'HOME'],
+            'Integrat S/N': ['Integrat'] * 4,
+            'Taxa rendiment': [0.8, 0.7, 0.9, 0.6]
+        })
+        raw_drop = pd.DataFrame({
+            **common,
+            'Naturalesa universitat responsable': ['PÚBLICA'] * 4,
+            'Sexe Alumne': ['DONA', 'HOME', 'DONA', 'HOME'],
+            'Tipus de centre': ['Integrat'] * 4,
+            '% Abandonament a primer curs': [0.1, 0.2, 0.15, 0.3]
+        })
+        self.path_perf = os.path.join(self.tmp_dir, "rendiment.xlsx")
+        path_drop = os.path.join(self.tmp_dir, "abandonament.xlsx")
+        self.raw_perf.to_excel(self.path_perf, index=False)
+        raw_drop.to_excel(path_drop, index=False)
+
+        self.service = DatasetService(self.path_perf, path_drop, use_cache=False,
+                                      store_dir=os.path.join(self.tmp_dir, "store"))
+        self.service.load()
+
+    def tearDown(self):
+        """Elimina els fitxers temporals."""
+        shutil.rmtree(self.tmp_dir)
+
+    def _get(self, target):
+        """Retorna la resposta JSON d'una petició GET."""
+        return json.loads(self.service.handle("GET", target))
+
+    def test_responses_and_queries(self):
+        """Verifica l'informe, les tendències, les consultes i els errors de ruta."""
+        rankings = self._get("/rankings")
+        trends = self._get("/tendencias")
+        result = self._get("/consulta?metrica=rendimiento&sigles=UB&desde=21-22")
+
+        self.assertEqual(rankings, json.loads(json.dumps(
+            build_report(self.service.snapshot["query"].df)["ranking_ramas"]
+        )))
+        self.assertEqual(list(trends['Salut']['cursos']), ['20-21', '21-22'])
+        self.assertEqual((result['rows'], result['mean']), (1, 0.9))
+        self.assertIsNone(self._get("/consulta?sigles=UVic")['mean'])
+
+        with self.assertRaises(RequestError):
+            self._get("/desconeguda")
+        with self.assertRaises(RequestError):
+            self._get("/consulta?metrica=matricula")
+
+    def test_nested_nan_is_null(self):
+        """Verifica que els NaN niats de l'informe es serialitzen com a null."""
+        report = build_report(pd.DataFrame({
+            'Curs Acadèmic': ['20-21', '20-21'],
+            'Branca': ['Salut', 'Ciències'],
+            '% Abandonament a primer curs': [0.1, 0.2],
+            'Taxa rendiment': [0.8, np.nan]
+        }))
+
+        parsed = _strict_loads(_to_json(report))
+
+        self.assertIsNone(parsed["analisis_por_rama"]["Salut"]["abandono_std"])
+        self.assertIsNone(parsed["estadisticas_globales"]["correlacion_abandono_rendimiento"])
+        self.assertEqual(_strict_loads(_to_json({"a": [1.0, float("inf")]})), {"a": [1.0, None]})
+        for target in ("/informe", "/analisis", "/tendencias", "/rankings", "/estado"):
+            _strict_loads(self.service.handle("GET", target))
+
+    def test_http_roundtrip_and_reload(self):
+        """Verifica dues peticions per la mateixa connexió i la recàrrega dels cursos canviats."""
+        server = DatasetServer(self.service)
+
+        async def scenario():
+            tcp_server = await server.start("127.0.0.1", 0)
+            port = tcp_server.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+
+            responses = []
+            for request in ("GET /estado HTTP/1.1\r\n\r\n",
+                            "POST /recarga HTTP/1.1\r\nConnection: close\r\n\r\n"):
+                writer.write(request.encode('latin-1'))
+                status = await reader.readline()
+                headers = {}
+                while (line := await reader.readline()) != b"\r\n":
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.lower()] = value.strip()
+                body = await reader.readexactly(int(headers['content-length']))
+                responses.append((status.split()[1], json.loads(body)))
+            writer.close()
+
+            # Es modifica un curs: la recàrrega només recalcula aquell curs.
+            self.raw_perf.loc[3, 'Taxa rendiment'] = 0.5
+            self.raw_perf.to_excel(self.path_perf, index=False)
+            os.utime(self.path_perf, ns=(0, 0))
+            responses.append(json.loads(await server.reload()))
+
+            tcp_server.close()
+            await tcp_server.wait_closed()
+            return responses
+
+        estado, unchanged, reloaded = asyncio.run(scenario())
+
+        self.assertEqual(estado, (b"200", estado[1]))
+        self.assertEqual(estado[1]['num_registros'], 4)
+        self.assertEqual(unchanged, (b"200", {"recargado": False, "cursos_recalculados": []}))
+        self.assertEqual(reloaded, {"recargado": True, "cursos_recalculados": ['21-22']})
+        self.assertEqual(self._get("/consulta?sigles=UAB")['mean'], 0.5)
+
+    def test_invalid_content_length_and_reload_workers(self):
+        """Verifica la resposta 400 a un Content-Length no vàlid i la recàrrega sense processos."""
+        server = DatasetServer(self.service)
+
+        async def request(length):
+            tcp_server = await server.start("127.0.0.1", 0)
+            port = tcp_server.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(f"GET /estado HTTP/1.1\r\nContent-Length: {length}\r\n\r\n"
+                         .encode('latin-1'))
+            response = await reader.read()
+            writer.close()
+            tcp_server.close()
+            await tcp_server.wait_closed()
+            return response
+
+        for length in ("abc", "-5"):
+            status_line, _, body = asyncio.run(request(length)).partition(b"\r\n\r\n")
+            self.assertTrue(status_line.startswith(b"HTTP/1.1 400"), status_line)
+            self.assertIn("Content-Length", json.loads(body)["error"])
+
+        # La recàrrega s'executa en un fil: no ha de crear processos amb fork.
+        with mock.patch('src.server.load_dataset_groups', wraps=load_dataset_groups) as load:
+            asyncio.run(server.reload(force=True))
+        self.assertEqual(load.call_args.kwargs["max_workers"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
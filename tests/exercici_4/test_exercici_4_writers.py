@@ -0,0 +1,75 @@
+"""
+Tests unitaris per als formats de sortida de l'informe estadístic.
+"""
+
+import json
+import os
+import tempfile
+import unittest
+import pandas as pd
+from src.analysis import build_report
+from src.report_writers import is_parquet_available, write_report
+from src.reports import generate_partition_reports
+
+
+class TestReportWriters(unittest.TestCase):
+    """Suite de tests per als formats JSON compacte, NDJSON i Parquet."""
+
+    def setUp(self):
+        """Prepara un informe de dues branques."""
+        self.df = pd.DataFrame({
+            'Curs Acadèmic': ['20-21', '21-22', '22-23'] * 2,
+            'Sexe': ['DONA', 'HOME'] * 3,
+            'Branca': ['Salut'] * 3 + ['Arts'] * 3,
+            'Taxa rendiment': [0.8, 0.82, 0.84, 0.7, 0.69, 0.71],
+            '% Abandonament a primer curs': [0.1, 0.09, 0.08, 0.2, 0.22, 0.21]
+        })
+        self.report = build_report(self.df)
+
+    def test_compact_json_is_smaller_and_equal(self):
+        """Verifica que el JSON compacte té el mateix contingut i ocupa menys."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            base = os.path.join(tmp_dir, "informe")
+            indented = write_report(self.report, base, 'json')
+            compact = write_report(self.report, base, 'json-compact')
+
+            self.assertNotEqual(indented, compact)
+            self.assertLess(os.path.getsize(compact), os.path.getsize(indented))
+            with open(compact, 'r', encoding='utf-8') as f:
+                self.assertEqual(json.load(f), json.loads(json.dumps(self.report)))
+
+    def test_ndjson_one_line_per_branch(self):
+        """Verifica la capçalera i una línia per branca al NDJSON."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = write_report(self.report, os.path.join(tmp_dir, "informe"), 'ndjson')
+            with open(path, 'r', encoding='utf-8') as f:
+                records = [json.loads(line) for line in f]
+
+        self.assertEqual(records[0]['tipo'], "informe")
+        self.assertIn('ranking_ramas', records[0])
+        self.assertEqual([r['rama'] for r in records[1:]], ['Salut', 'Arts'])
+        self.assertEqual(records[2]['rendimiento_medio'],
+                         self.report['analisis_por_rama']['Arts']['rendimiento_medio'])
+
+    @unittest.skipUnless(is_parquet_available(), "pyarrow no està instal·lat")
+    def test_parquet_columns_and_filters(self):
+        """Verifica que es pot llegir una columna o una branca del Parquet."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = write_report(self.report, os.path.join(tmp_dir, "informe"), 'parquet')
+            arts = pd.read_parquet(path, columns=['rama', 'abandono_medio'],
+                                   filters=[('rama', '==', 'Arts')])
+            partitions = generate_partition_reports(self.df, ['Sexe'], 'parquet', tmp_dir)
+            by_sex = pd.read_parquet(partitions[0])
+
+        self.assertEqual(arts['abandono_medio'].tolist(), [0.21])
+        self.assertEqual(sorted(set(by_sex['valor'])), ['DONA', 'HOME'])
+        self.assertEqual(len(by_sex), 4)
+
+    def test_invalid_format(self):
+        """Verifica que un format desconegut genera un error."""
+        with self.assertRaises(ValueError):
+            write_report(self.report, "informe", 'xml')
+
+
+if __name__ == '__main__':
+    unittest.main()